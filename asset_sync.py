@@ -0,0 +1,383 @@
+#!/usr/bin/env python3
+"""
+Data server -> connector asset sync
+===================================
+
+Publishes every file in the data server registry (GET /files/list) as an
+EDC asset plus a contract definition, in one idempotent pass:
+
+1. read the registry and the connector's synced assets / contract
+   definitions (ids starting with SYNC_ASSET_PREFIX) concurrently
+2. diff them by a hash of the payload each file should produce, stored in
+   the entity's privateProperties as syncHash
+3. apply only the differences with at most `concurrency` calls in flight:
+   assets before their contract definitions, contract definitions before
+   the assets they point to when deleting
+
+Re-running against an unchanged registry only reads listings. Entities
+the UI or other tools created (no syncSource private property) are never
+updated or deleted.
+"""
+
+import asyncio
+import hashlib
+import os
+import threading
+import time
+import uuid
+from typing import Any, Dict, List, Optional
+
+import orjson
+
+from edc_client import AsyncEdcClient, AsyncRunner, id_starts_with, query_spec
+
+EDC_NS = "https://w3id.org/edc/v0.0.1/ns/"
+
+# Synced entities: asset "<prefix><file id>", contract definition "<asset id>-offer"
+SYNC_ASSET_PREFIX = os.getenv("SYNC_ASSET_PREFIX", "file-")
+SYNC_SOURCE = "data-server"
+# Management API calls in flight while applying a sync
+SYNC_CONCURRENCY = int(os.getenv("SYNC_CONCURRENCY", "16"))
+# Page sizes for the connector listings / the data server registry (max 100 there)
+SYNC_LISTING_PAGE_SIZE = 500
+REGISTRY_PAGE_SIZE = 100
+# Errors kept per run for display
+SYNC_ERROR_LIMIT = 50
+# Finished runs are forgotten after this many seconds
+SYNC_RUN_RETENTION = 3600
+
+PLANNING = "PLANNING"
+APPLYING = "APPLYING"
+COMPLETED = "COMPLETED"
+FAILED = "FAILED"
+
+CREATE = "create"
+UPDATE = "update"
+DELETE = "delete"
+
+ASSET = "asset"
+CONTRACT_DEFINITION = "contract_definition"
+
+
+def asset_id_for(file_id: str) -> str:
+    return f"{SYNC_ASSET_PREFIX}{file_id}"
+
+
+def contract_definition_id_for(asset_id: str) -> str:
+    return f"{asset_id}-offer"
+
+
+def sync_hash(payload: Dict[str, Any]) -> str:
+    """Hash of an entity payload, ignoring its privateProperties"""
+    content = {k: v for k, v in payload.items() if k != "privateProperties"}
+    return hashlib.sha256(orjson.dumps(content, option=orjson.OPT_SORT_KEYS)).hexdigest()[:32]
+
+
+def _with_sync_marker(payload: Dict[str, Any]) -> Dict[str, Any]:
+    payload["privateProperties"] = {"syncSource": SYNC_SOURCE, "syncHash": sync_hash(payload)}
+    return payload
+
+
+def asset_payload(file_info: Dict[str, Any], public_base_url: str) -> Dict[str, Any]:
+    """Asset for one registry entry; the data address is the file's download URL"""
+    return _with_sync_marker({
+        "@context": {"@vocab": EDC_NS},
+        "@type": "Asset",
+        "@id": asset_id_for(file_info["id"]),
+        "properties": {
+            "name": file_info.get("title") or file_info.get("filename"),
+            "description": file_info.get("description", ""),
+            "contenttype": file_info.get("content_type") or "application/octet-stream",
+            "fileName": file_info.get("filename"),
+        },
+        "dataAddress": {
+            "@type": "DataAddress",
+            "type": "HttpData",
+            "baseUrl": f"{public_base_url.rstrip('/')}/files/{file_info['id']}/download",
+        },
+    })
+
+
+def contract_definition_payload(asset_id: str, access_policy_id: str, contract_policy_id: str) -> Dict[str, Any]:
+    return _with_sync_marker({
+        "@context": {"@vocab": EDC_NS},
+        "@type": "ContractDefinition",
+        "@id": contract_definition_id_for(asset_id),
+        "accessPolicyId": access_policy_id,
+        "contractPolicyId": contract_policy_id,
+        "assetsSelector": [{
+            "@type": "CriterionDto",
+            "operandLeft": f"{EDC_NS}id",
+            "operator": "=",
+            "operandRight": asset_id,
+        }],
+    })
+
+
+def _private_property(entity: Dict[str, Any], name: str):
+    private = entity.get("privateProperties") or {}
+    return private.get(name, private.get(f"{EDC_NS}{name}"))
+
+
+def synced_hashes(entities: List[Dict[str, Any]]) -> Dict[str, str]:
+    """{id: syncHash} of the entities created by a sync"""
+    return {
+        entity["@id"]: _private_property(entity, "syncHash")
+        for entity in entities
+        if _private_property(entity, "syncSource") == SYNC_SOURCE
+    }
+
+
+def plan_sync(
+    files: List[Dict[str, Any]],
+    assets: Dict[str, str],
+    contract_definitions: Dict[str, str],
+    public_base_url: str,
+    access_policy_id: str,
+    contract_policy_id: str,
+) -> List[Dict[str, Any]]:
+    """Operations turning the synced entities into the registry's desired state
+
+    assets / contract_definitions are the {id: syncHash} maps of what the
+    connector currently holds. Each operation is {"action", "kind", "id",
+    "payload"}; an empty list means everything is in sync.
+    """
+    operations = []
+    wanted_assets = set()
+    wanted_definitions = set()
+    for file_info in files:
+        asset = asset_payload(file_info, public_base_url)
+        definition = contract_definition_payload(asset["@id"], access_policy_id, contract_policy_id)
+        wanted_assets.add(asset["@id"])
+        wanted_definitions.add(definition["@id"])
+        for kind, payload, current in ((ASSET, asset, assets), (CONTRACT_DEFINITION, definition, contract_definitions)):
+            if payload["@id"] not in current:
+                operations.append({"action": CREATE, "kind": kind, "id": payload["@id"], "payload": payload})
+            elif current[payload["@id"]] != payload["privateProperties"]["syncHash"]:
+                operations.append({"action": UPDATE, "kind": kind, "id": payload["@id"], "payload": payload})
+
+    for kind, current, wanted in ((CONTRACT_DEFINITION, contract_definitions, wanted_definitions),
+                                  (ASSET, assets, wanted_assets)):
+        for entity_id in sorted(set(current) - wanted):
+            operations.append({"action": DELETE, "kind": kind, "id": entity_id, "payload": None})
+    return operations
+
+
+def summarize_plan(operations: List[Dict[str, Any]]) -> Dict[str, Dict[str, int]]:
+    """{kind: {action: count}}"""
+    summary = {kind: {CREATE: 0, UPDATE: 0, DELETE: 0} for kind in (ASSET, CONTRACT_DEFINITION)}
+    for operation in operations:
+        summary[operation["kind"]][operation["action"]] += 1
+    return summary
+
+
+async def fetch_registry(client: AsyncEdcClient, registry_url: str, timeout: float = 30,
+                         concurrency: int = SYNC_CONCURRENCY) -> List[Dict[str, Any]]:
+    """All files of the data server registry (remaining pages are read `concurrency` at a time)"""
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def page(offset: int) -> Dict[str, Any]:
+        url = f"{registry_url.rstrip('/')}/files/list?limit={REGISTRY_PAGE_SIZE}&offset={offset}"
+        async with semaphore:
+            response = await client.probe(url, timeout=timeout)
+        response.raise_for_status()
+        return response.json()
+
+    first = await page(0)
+    total = first["pagination"]["total"]
+    rest = await asyncio.gather(*(page(offset) for offset in range(REGISTRY_PAGE_SIZE, total, REGISTRY_PAGE_SIZE)))
+    return first["data"] + [f for p in rest for f in p["data"]]
+
+
+async def fetch_synced(client: AsyncEdcClient, kind: str, timeout: float = 30) -> Dict[str, str]:
+    """{id: syncHash} of the synced assets or contract definitions on the connector"""
+    query = client.query_assets if kind == ASSET else client.query_contract_definitions
+    entities = []
+    offset = 0
+    while True:
+        spec = query_spec(offset, SYNC_LISTING_PAGE_SIZE, id_starts_with(SYNC_ASSET_PREFIX), sort_field="id")
+        response = await query(spec, timeout=timeout)
+        response.raise_for_status()
+        page = response.json()
+        entities.extend(page)
+        if len(page) < SYNC_LISTING_PAGE_SIZE:
+            return synced_hashes(entities)
+        offset += SYNC_LISTING_PAGE_SIZE
+
+
+async def apply_operation(client: AsyncEdcClient, operation: Dict[str, Any]):
+    """Run one operation; raises RuntimeError on an unexpected HTTP status
+
+    Creates fall back to an update when the entity already exists and was
+    created by a sync, and deletes accept an entity that is already gone,
+    so an interrupted run can simply be repeated. An existing entity
+    created by someone else is reported as a conflict and left untouched.
+    """
+    asset = operation["kind"] == ASSET
+    if operation["action"] == DELETE:
+        delete = client.delete_asset if asset else client.delete_contract_definition
+        response = await delete(operation["id"])
+        if response.status_code not in (200, 204, 404):
+            raise RuntimeError(f"HTTP {response.status_code} {response.text}")
+        return
+
+    create = client.create_asset if asset else client.create_contract_definition
+    update = client.update_asset if asset else client.update_contract_definition
+    if operation["action"] == CREATE:
+        response = await create(operation["payload"])
+        if response.status_code != 409:
+            if response.status_code not in (200, 201):
+                raise RuntimeError(f"HTTP {response.status_code} {response.text}")
+            return
+        # 同じIDのエンティティが既にある: 同期で作成したものだけ上書きする
+        get = client.get_asset if asset else client.get_contract_definition
+        response = await get(operation["id"])
+        if response.status_code != 200:
+            raise RuntimeError(f"HTTP {response.status_code} {response.text}")
+        if _private_property(response.json(), "syncSource") != SYNC_SOURCE:
+            raise RuntimeError(f"Conflict: {operation['id']} already exists and was not created by the sync")
+    response = await update(operation["payload"])
+    if response.status_code not in (200, 204):
+        raise RuntimeError(f"HTTP {response.status_code} {response.text}")
+
+
+class SyncRun:
+    """Progress of one sync (or dry run)"""
+
+    def __init__(self, dry_run: bool, concurrency: int):
+        self.run_id = uuid.uuid4().hex[:12]
+        self.dry_run = dry_run
+        self.concurrency = concurrency
+        self.state = PLANNING
+        self.files = 0
+        self.summary: Optional[Dict[str, Dict[str, int]]] = None
+        self.total = 0
+        self.done = 0
+        self.failed = 0
+        self.skipped = 0
+        self.errors: List[Dict[str, str]] = []
+        self.error: Optional[str] = None
+        self.started_at = time.time()
+        self.planned_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+
+    def snapshot(self) -> Dict[str, Any]:
+        now = time.time()
+        apply_time = (self.finished_at or now) - self.planned_at if self.planned_at else 0
+        return {
+            "run_id": self.run_id,
+            "dry_run": self.dry_run,
+            "concurrency": self.concurrency,
+            "state": self.state,
+            "files": self.files,
+            "summary": self.summary,
+            "total": self.total,
+            "done": self.done,
+            "failed": self.failed,
+            "skipped": self.skipped,
+            "errors": list(self.errors),
+            "error": self.error,
+            "plan_time": (self.planned_at or self.finished_at or now) - self.started_at,
+            "wall_time": (self.finished_at or now) - self.started_at,
+            "throughput": self.done / apply_time if apply_time > 0 else None,
+            "finished_at": self.finished_at,
+        }
+
+
+class AssetSyncer:
+    """Runs syncs on the shared event loop; pages poll run snapshots"""
+
+    def __init__(self, runner: AsyncRunner, client: AsyncEdcClient, registry_url: str, public_base_url: str):
+        self.runner = runner
+        self.client = client
+        self.registry_url = registry_url
+        self.public_base_url = public_base_url
+        self._runs: Dict[str, SyncRun] = {}
+        self._lock = threading.Lock()
+
+    def submit(self, access_policy_id: str, contract_policy_id: str, concurrency: int = SYNC_CONCURRENCY,
+               dry_run: bool = False) -> str:
+        """Start a sync and return its run id (dry_run only computes the plan)"""
+        run = SyncRun(dry_run, max(1, concurrency))
+        with self._lock:
+            self._prune()
+            self._runs[run.run_id] = run
+        self.runner.submit(self._run(run, access_policy_id, contract_policy_id),
+                           job="Preview sync" if dry_run else "Sync data server files")
+        return run.run_id
+
+    def get(self, run_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            run = self._runs.get(run_id)
+            return run.snapshot() if run else None
+
+    def _prune(self):
+        expire_before = time.time() - SYNC_RUN_RETENTION
+        for run_id in [i for i, r in self._runs.items() if r.finished_at and r.finished_at < expire_before]:
+            del self._runs[run_id]
+
+    def _update(self, run: SyncRun, **fields):
+        with self._lock:
+            for name, value in fields.items():
+                setattr(run, name, value)
+
+    async def _run(self, run: SyncRun, access_policy_id: str, contract_policy_id: str):
+        try:
+            files, assets, definitions = await asyncio.gather(
+                fetch_registry(self.client, self.registry_url, concurrency=run.concurrency),
+                fetch_synced(self.client, ASSET),
+                fetch_synced(self.client, CONTRACT_DEFINITION),
+            )
+            operations = plan_sync(files, assets, definitions, self.public_base_url,
+                                   access_policy_id, contract_policy_id)
+            self._update(run, files=len(files), summary=summarize_plan(operations), total=len(operations),
+                         planned_at=time.time(), state=COMPLETED if run.dry_run else APPLYING)
+            if run.dry_run:
+                return
+
+            # 依存関係の順に2段階で適用: アセット作成・更新と契約定義の削除 → 契約定義の作成・更新とアセットの削除
+            semaphore = asyncio.Semaphore(run.concurrency)
+            first = [o for o in operations if (o["kind"] == ASSET) != (o["action"] == DELETE)]
+            second = [o for o in operations if (o["kind"] == ASSET) == (o["action"] == DELETE)]
+            applied = await asyncio.gather(*(self._apply(run, operation, semaphore) for operation in first))
+            # アセットの作成・更新に失敗した契約定義は作成・更新しない（同じ原因で二重に失敗するため）
+            failed_assets = {o["id"] for o, ok in zip(first, applied) if not ok and o["kind"] == ASSET}
+            blocked = {contract_definition_id_for(asset_id) for asset_id in failed_assets}
+            runnable = []
+            for operation in second:
+                if operation["kind"] == CONTRACT_DEFINITION and operation["id"] in blocked:
+                    self._record_error(run, operation, "skipped: the asset operation failed", skipped=True)
+                else:
+                    runnable.append(operation)
+            await asyncio.gather(*(self._apply(run, operation, semaphore) for operation in runnable))
+            self._update(run, state=COMPLETED if not run.failed else FAILED)
+        except Exception as e:
+            self._update(run, state=FAILED, error=str(e) or type(e).__name__)
+        finally:
+            self._update(run, finished_at=time.time())
+
+    async def _apply(self, run: SyncRun, operation: Dict[str, Any], semaphore: asyncio.Semaphore) -> bool:
+        """Apply one operation, recording the outcome on the run; returns whether it succeeded"""
+        async with semaphore:
+            try:
+                await apply_operation(self.client, operation)
+            except Exception as e:
+                self._record_error(run, operation, str(e) or type(e).__name__)
+                return False
+            with self._lock:
+                run.done += 1
+            return True
+
+    def _record_error(self, run: SyncRun, operation: Dict[str, Any], error: str, skipped: bool = False):
+        with self._lock:
+            if skipped:
+                run.skipped += 1
+            else:
+                run.failed += 1
+            if len(run.errors) < SYNC_ERROR_LIMIT:
+                run.errors.append({
+                    "action": operation["action"],
+                    "kind": operation["kind"],
+                    "id": operation["id"],
+                    "error": error,
+                })
@@ -4,24 +4,43 @@ Simple Data Sharing API for EDC
 サンプルデータを提供するシンプルなAPIサーバー
 """
 
-from fastapi import FastAPI, HTTPException, Query, UploadFile, File, Form
+from fastapi import FastAPI, HTTPException, Query, Request, UploadFile, File, Form
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse, FileResponse
+from fastapi.responses import JSONResponse, FileResponse, Response, StreamingResponse
 from fastapi.staticfiles import StaticFiles
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple, Union, Iterator
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+import asyncio
+import gzip
+import logging
+import threading
+import time
 import json
 import uuid
 import os
 import shutil
 import csv
+import numpy as np
+import orjson
 import pandas as pd
-from datetime import datetime
+from pyarrow import ArrowException
+from datetime import datetime, timedelta
 from pathlib import Path
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """起動時にコールドファイルの階層化タスクを開始し、終了時にレジストリを保存"""
+    task = asyncio.create_task(tiering_loop())
+    yield
+    task.cancel()
+    save_saved_files_registry()
+
 app = FastAPI(
     title="Simple Data Server API",
     description="Simple data sharing API for Eclipse Data Connector with file storage",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # データ保存用ディレクトリ
@@ -29,6 +48,31 @@ DATA_DIR = Path("./saved_data")
 DATA_DIR.mkdir(exist_ok=True)
 SAVE_DIR = DATA_DIR / "files"
 SAVE_DIR.mkdir(exist_ok=True)
+# Excelをシートごとに変換したParquetの保存先
+CONVERTED_DIR = DATA_DIR / "converted"
+CONVERTED_DIR.mkdir(exist_ok=True)
+# 先頭行・サンプル行のプレビュー保存先
+PREVIEW_DIR = DATA_DIR / "previews"
+PREVIEW_DIR.mkdir(exist_ok=True)
+
+# プレビュー行数とメモリキャッシュのエントリ数
+PREVIEW_ROWS = int(os.getenv("PREVIEW_ROWS", "10"))
+PREVIEW_CACHE_SIZE = int(os.getenv("PREVIEW_CACHE_SIZE", "256"))
+
+# 一定期間アクセスのないファイルを圧縮して退避するアーカイブ層
+ARCHIVE_DIR = DATA_DIR / "archive"
+ARCHIVE_DIR.mkdir(exist_ok=True)
+
+# ストレージ容量制限（バイト、0は無制限）とカテゴリ別の制限（JSON: {"カテゴリ": バイト}）
+STORAGE_QUOTA_BYTES = int(os.getenv("STORAGE_QUOTA_BYTES", "0"))
+CATEGORY_QUOTAS: Dict[str, int] = json.loads(os.getenv("CATEGORY_QUOTAS", "{}"))
+# この日数アクセスされていないファイルをアーカイブ層へ移動
+COLD_AFTER_DAYS = float(os.getenv("COLD_AFTER_DAYS", "30"))
+TIERING_INTERVAL_SECONDS = int(os.getenv("TIERING_INTERVAL_SECONDS", "3600"))
+
+# EDCからのコールバックイベントの保持期間（秒）とロングポーリングの最大待ち時間（秒）
+CALLBACK_RETENTION_SECONDS = float(os.getenv("CALLBACK_RETENTION_SECONDS", "3600"))
+CALLBACK_LONG_POLL_MAX = float(os.getenv("CALLBACK_LONG_POLL_MAX", "30"))
 
 # CORS設定
 app.add_middleware(
@@ -44,6 +88,8 @@ static_dir = Path("./static")
 static_dir.mkdir(exist_ok=True)
 app.mount("/static", StaticFiles(directory="static"), name="static")
 
+logger = logging.getLogger("data-server")
+
 # 保存されたファイルの情報を保存
 saved_files_registry = []
 
@@ -64,6 +110,501 @@ def save_saved_files_registry():
 # 起動時にレジストリを読み込み
 load_saved_files_registry()
 
+# アーカイブ・復元処理の排他制御と統計情報
+storage_lock = threading.RLock()
+storage_metrics = {
+    "archived_files_total": 0,
+    "archived_bytes_total": 0,
+    "rehydrations_total": 0,
+    "rehydrated_bytes_total": 0,
+    "rehydration_seconds_total": 0.0,
+    "rehydration_seconds_max": 0.0,
+    "tiering_errors_total": 0,
+    "last_tiering_error": None,
+}
+
+def _orjson_default(obj: Any) -> Any:
+    """orjsonが直接扱えない値（numpyスカラー、NaT等）を変換"""
+    if obj is pd.NaT or obj is pd.NA:
+        return None
+    if isinstance(obj, np.generic):
+        return obj.item()
+    if isinstance(obj, pd.Timestamp):
+        return obj.isoformat()
+    if isinstance(obj, pd.Timedelta):
+        return str(obj)
+    raise TypeError(f"Type is not JSON serializable: {type(obj).__name__}")
+
+class FastJSONResponse(JSONResponse):
+    """orjson (C実装) でシリアライズする高速JSONレスポンス
+
+    jsonable_encoderを経由しないよう、エンドポイントはこのクラスのインスタンスを直接返す。
+    DataFrameのスライスは frame_records() で事前にJSON化したものをそのまま埋め込む。
+    """
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(
+            content,
+            default=_orjson_default,
+            option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS,
+        )
+
+def _frame_json(df: pd.DataFrame) -> bytes:
+    """DataFrameをレコード配列のJSONに変換（NaN/NaTはnullになる）
+
+    列ごとにPythonの値へ変換してorjsonでエンコードするので、浮動小数点数は丸められず元の値に戻る。
+    """
+    columns = [df.iloc[:, i].tolist() for i in range(df.shape[1])]
+    records = [dict(zip(df.columns, row)) for row in zip(*columns)] if columns else [{} for _ in range(len(df))]
+    return orjson.dumps(
+        records,
+        default=_orjson_default,
+        option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS,
+    )
+
+def frame_records(df: pd.DataFrame) -> orjson.Fragment:
+    """DataFrameをレコード配列のJSONとして直接シリアライズ"""
+    return orjson.Fragment(_frame_json(df))
+
+def find_file_info(file_id: str) -> Optional[Dict[str, Any]]:
+    """レジストリからファイル情報を検索"""
+    for f in saved_files_registry:
+        if f["id"] == file_id:
+            return f
+    return None
+
+def converted_sheet_path(file_id: str, sheet_index: int) -> Path:
+    """変換済みシートのParquetファイルパス"""
+    return CONVERTED_DIR / file_id / f"sheet_{sheet_index}.parquet"
+
+def _write_sheet_parquet(df: pd.DataFrame, path: Path):
+    """シートをParquetで保存（型が混在する列は文字列として保存）"""
+    df.columns = [str(c) for c in df.columns]
+    try:
+        df.to_parquet(path, index=False)
+    except (TypeError, ValueError, ArrowException):
+        for col in df.columns:
+            if df[col].dtype == object:
+                df[col] = df[col].astype("string")
+        df.to_parquet(path, index=False)
+
+def convert_workbook(file_info: Dict[str, Any]):
+    """Excelブックを一度だけ読み込み、シートごとにParquetへ変換してレジストリに記録"""
+    file_path = Path(file_info["file_path"])
+    stat = file_path.stat()
+
+    target_dir = CONVERTED_DIR / file_info["id"]
+    shutil.rmtree(target_dir, ignore_errors=True)
+    target_dir.mkdir(parents=True)
+
+    sheets = []
+    workbook = pd.read_excel(file_path, sheet_name=None)
+    for index, (name, df) in enumerate(workbook.items()):
+        _write_sheet_parquet(df, converted_sheet_path(file_info["id"], index))
+        sheets.append({"name": str(name), "rows": len(df)})
+
+    file_info["sheets"] = sheets
+    file_info["source_mtime"] = stat.st_mtime
+    file_info["source_size"] = stat.st_size
+
+def ensure_workbook_converted(file_info: Dict[str, Any]):
+    """未変換またはブックが更新されている場合のみ再変換"""
+    file_path = Path(file_info["file_path"])
+    stat = file_path.stat()
+    sheets = file_info.get("sheets")
+    is_fresh = (
+        sheets
+        and file_info.get("source_mtime") == stat.st_mtime
+        and file_info.get("source_size") == stat.st_size
+        and all(converted_sheet_path(file_info["id"], i).exists() for i in range(len(sheets)))
+    )
+    if not is_fresh:
+        convert_workbook(file_info)
+        save_saved_files_registry()
+
+def resolve_sheet_index(file_info: Dict[str, Any], sheet: Optional[str]) -> int:
+    """シート名またはインデックス指定をシート番号に解決（未指定時は先頭シート）"""
+    sheets = file_info.get("sheets", [])
+    if sheet is None:
+        return 0
+    for index, info in enumerate(sheets):
+        if info["name"] == sheet:
+            return index
+    if sheet.isdigit() and int(sheet) < len(sheets):
+        return int(sheet)
+    raise HTTPException(status_code=404, detail=f"Sheet not found: {sheet}")
+
+# 追記（セグメント追加）に対応する形式
+APPENDABLE_EXTENSIONS = ['.csv', '.json', '.txt']
+
+def file_segments(file_info: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """データセットを構成するセグメント一覧（追記のないファイルはバージョン1の単一セグメント）"""
+    return file_info.get("segments") or [{"version": 1, "file_path": file_info["file_path"]}]
+
+def latest_version(file_info: Dict[str, Any]) -> int:
+    return file_segments(file_info)[-1]["version"]
+
+def select_segments(
+    file_info: Dict[str, Any], version: Optional[int] = None, since: Optional[int] = None
+) -> List[Dict[str, Any]]:
+    """version以下かつsinceより新しいセグメントを選択"""
+    if version is not None and not 1 <= version <= latest_version(file_info):
+        raise HTTPException(status_code=404, detail=f"Version not found: {version}")
+    return [
+        s for s in file_segments(file_info)
+        if (version is None or s["version"] <= version) and (since is None or s["version"] > since)
+    ]
+
+def read_segment(file_path: Path, file_extension: str) -> Union[pd.DataFrame, List[Any]]:
+    """1セグメントを読み込む（.txtは行文字列のリスト）"""
+    if file_extension == ".csv":
+        return pd.read_csv(file_path)
+
+    if file_extension == ".json":
+        with open(file_path, 'r', encoding='utf-8') as f:
+            json_data = json.load(f)
+        return json_data if isinstance(json_data, list) else [json_data]
+
+    if file_extension == ".txt":
+        with open(file_path, 'r', encoding='utf-8') as f:
+            return [line.strip() for line in f]
+
+    raise HTTPException(status_code=400, detail="Unsupported file format for data extraction")
+
+def load_file_rows(
+    file_info: Dict[str, Any],
+    sheet: Optional[str] = None,
+    version: Optional[int] = None,
+    since: Optional[int] = None
+) -> Union[pd.DataFrame, List[Any]]:
+    """ファイル全体を行の集合として読み込む
+
+    .csv/.xlsx はDataFrame、.json/.txt はリストを返す。
+    .xlsx は変換済みのParquetから読み込み、ブック自体は再パースしない。
+    追記されたデータセットは version/since で選択したセグメントを連結する。
+    """
+    file_extension = file_info["file_extension"]
+
+    if file_extension == ".xlsx":
+        select_segments(file_info, version, since)
+        if since is not None and since >= 1:
+            return pd.DataFrame()
+        ensure_workbook_converted(file_info)
+        sheet_index = resolve_sheet_index(file_info, sheet)
+        return pd.read_parquet(converted_sheet_path(file_info["id"], sheet_index))
+
+    segments = select_segments(file_info, version, since)
+    parts = [read_segment(Path(s["file_path"]), file_extension) for s in segments]
+
+    if file_extension == ".csv":
+        if not parts:
+            return pd.DataFrame()
+        return parts[0] if len(parts) == 1 else pd.concat(parts, ignore_index=True)
+
+    rows = [row for part in parts for row in part]
+    if file_extension == ".txt":
+        # 行番号はデータセット全体での通し番号
+        first_line = sum(
+            s.get("rows", 0) for s in file_segments(file_info)
+            if since is not None and s["version"] <= since
+        )
+        return [{"line_number": first_line + i + 1, "content": line} for i, line in enumerate(rows)]
+    return rows
+
+def load_file_page(
+    file_info: Dict[str, Any],
+    offset: int,
+    limit: int,
+    sheet: Optional[str] = None,
+    version: Optional[int] = None,
+    since: Optional[int] = None
+) -> Tuple[int, Union[pd.DataFrame, List[Any]]]:
+    """ファイルを読み込み、総行数と指定範囲の行を返す"""
+    rows = load_file_rows(file_info, sheet, version, since)
+    if isinstance(rows, pd.DataFrame):
+        return len(rows), rows.iloc[offset:offset + limit]
+    return len(rows), rows[offset:offset + limit]
+
+def iter_segment_bytes(file_info: Dict[str, Any], segments: List[Dict[str, Any]]) -> Iterator[bytes]:
+    """セグメントを1つのファイルとして連結したバイト列を順に返す
+
+    CSVは2つ目以降のヘッダー行を除き、JSONは配列として結合する。
+    """
+    file_extension = file_info["file_extension"]
+    if file_extension == ".json" and len(segments) > 1:
+        rows = [row for s in segments for row in read_segment(Path(s["file_path"]), ".json")]
+        yield orjson.dumps(rows)
+        return
+
+    for index, segment in enumerate(segments):
+        last_chunk = b""
+        with open(segment["file_path"], 'rb') as f:
+            if file_extension == ".csv" and index > 0:
+                f.readline()
+            while chunk := f.read(1024 * 1024):
+                yield chunk
+                last_chunk = chunk
+        # 改行で終わらないセグメントの後ろに改行を補う
+        if index < len(segments) - 1 and last_chunk and not last_chunk.endswith(b"\n"):
+            yield b"\n"
+
+def segment_row_count(file_path: Path, file_extension: str) -> int:
+    """セグメントの行数"""
+    return len(read_segment(file_path, file_extension))
+
+def page_payload(page: Union[pd.DataFrame, List[Any]]) -> Any:
+    """レスポンスに埋め込む形にページを変換（DataFrameはdictを経由しない）"""
+    if isinstance(page, pd.DataFrame):
+        return frame_records(page)
+    return page
+
+def page_rows(page: Union[pd.DataFrame, List[Any]]) -> List[Dict[str, Any]]:
+    """CSV/HTML表示用にページを行dictのリストへ変換"""
+    if isinstance(page, pd.DataFrame):
+        return page.to_dict('records')
+    return page
+
+# プレビュー生成用の乱数生成器と、エンコード済みレスポンスのLRUキャッシュ
+_preview_rng = np.random.default_rng()
+_preview_cache: "OrderedDict[Tuple[str, str], bytes]" = OrderedDict()
+
+def _select_records(rows: Union[pd.DataFrame, List[Any]], positions: List[int]) -> List[Any]:
+    """指定位置の行だけをJSON互換のレコードに変換"""
+    if isinstance(rows, pd.DataFrame):
+        return orjson.loads(_frame_json(rows.iloc[positions]))
+    return [rows[p] for p in positions]
+
+def reservoir_update(preview: Dict[str, Any], rows: Union[pd.DataFrame, List[Any]], k: int):
+    """Algorithm Rでリザーバサンプルを更新（seenを引き継ぐので追記分にも継続適用できる）
+
+    置換判定はnumpyでまとめて行い、最終的に採用された行だけをレコードに変換する。
+    """
+    seen = preview["seen"]
+    sample = preview["sample"]
+    n = len(rows)
+
+    # リザーバが埋まるまではそのまま追加
+    fill = min(max(k - len(sample), 0), n)
+    if fill:
+        sample.extend(_select_records(rows, list(range(fill))))
+
+    # 以降の行は確率 k/(i+1) で既存スロットを置換（後の置換が優先）
+    replacements: Dict[int, int] = {}
+    if n > fill:
+        global_index = np.arange(seen + fill, seen + n)
+        slots = _preview_rng.integers(0, global_index + 1)
+        hits = np.nonzero(slots < k)[0]
+        for position, slot in zip(hits + fill, slots[hits]):
+            replacements[int(slot)] = int(position)
+    if replacements:
+        records = _select_records(rows, list(replacements.values()))
+        for slot, record in zip(replacements.keys(), records):
+            sample[slot] = record
+
+    preview["seen"] = seen + n
+
+def build_preview(file_info: Dict[str, Any]) -> Dict[str, Any]:
+    """先頭N行とリザーバサンプルを生成してディスクに保存（.xlsxは先頭シート）"""
+    ensure_hot(file_info)
+    rows = load_file_rows(file_info)
+    preview = {
+        "head": _select_records(rows, list(range(min(PREVIEW_ROWS, len(rows))))),
+        "sample": [],
+        "seen": 0,
+    }
+    reservoir_update(preview, rows, PREVIEW_ROWS)
+    with open(PREVIEW_DIR / f"{file_info['id']}.json", 'wb') as f:
+        f.write(orjson.dumps(preview, default=_orjson_default))
+    invalidate_preview_cache(file_info["id"])
+    return preview
+
+def load_preview(file_info: Dict[str, Any]) -> Dict[str, Any]:
+    """保存済みプレビューを読み込み（未生成なら生成）"""
+    preview_path = PREVIEW_DIR / f"{file_info['id']}.json"
+    if preview_path.exists():
+        with open(preview_path, 'rb') as f:
+            return orjson.loads(f.read())
+    return build_preview(file_info)
+
+def invalidate_preview_cache(file_id: str):
+    """メモリ上のプレビューキャッシュを破棄"""
+    for mode in ("head", "sample"):
+        _preview_cache.pop((file_id, mode), None)
+
+def preview_response_body(file_info: Dict[str, Any], mode: str) -> bytes:
+    """エンコード済みのプレビューレスポンスを返す（LRUキャッシュ）"""
+    key = (file_info["id"], mode)
+    body = _preview_cache.get(key)
+    if body is not None:
+        _preview_cache.move_to_end(key)
+        return body
+
+    preview = load_preview(file_info)
+    body = orjson.dumps({
+        "file_info": {
+            "id": file_info["id"],
+            "title": file_info["title"],
+            "filename": file_info["filename"],
+            "category": file_info["category"]
+        },
+        "mode": mode,
+        "data": preview[mode],
+        "total": preview["seen"]
+    })
+    _preview_cache[key] = body
+    if len(_preview_cache) > PREVIEW_CACHE_SIZE:
+        _preview_cache.popitem(last=False)
+    return body
+
+def archive_path_for(file_path: Union[str, Path]) -> Path:
+    """アーカイブ層での保存パス"""
+    return ARCHIVE_DIR / f"{Path(file_path).name}.gz"
+
+def last_access_time(file_info: Dict[str, Any]) -> datetime:
+    """最終アクセス日時（未アクセスなら保存日時）"""
+    return datetime.fromisoformat(file_info.get("last_access") or file_info["save_time"])
+
+def touch_file(file_info: Dict[str, Any]):
+    """最終アクセス日時を更新（レジストリは次回の保存時に永続化）"""
+    file_info["last_access"] = datetime.now().isoformat()
+
+def is_archived(file_info: Dict[str, Any]) -> bool:
+    return file_info.get("tier") == "archive"
+
+def archive_file(file_info: Dict[str, Any]):
+    """ファイルをgzip圧縮してアーカイブ層へ移動（変換済みシートは破棄）"""
+    with storage_lock:
+        if is_archived(file_info):
+            return
+        archived_size = 0
+        for segment in file_segments(file_info):
+            file_path = Path(segment["file_path"])
+            archive_path = archive_path_for(file_path)
+            with open(file_path, 'rb') as src, gzip.open(archive_path, 'wb', compresslevel=6) as dst:
+                shutil.copyfileobj(src, dst)
+            file_path.unlink()
+            archived_size += archive_path.stat().st_size
+        shutil.rmtree(CONVERTED_DIR / file_info["id"], ignore_errors=True)
+
+        file_info["tier"] = "archive"
+        file_info["archived_size"] = archived_size
+        file_info["archived_at"] = datetime.now().isoformat()
+        storage_metrics["archived_files_total"] += 1
+        storage_metrics["archived_bytes_total"] += file_info["file_size"]
+
+def ensure_hot(file_info: Dict[str, Any]):
+    """アーカイブ済みのファイルを元の場所へ復元し、アクセス日時を更新"""
+    touch_file(file_info)
+    # ホット層のファイルはロックを取らずに返す（アーカイブ処理中も待たない）
+    if not is_archived(file_info):
+        return
+    with storage_lock:
+        if not is_archived(file_info):
+            return
+
+        started = time.perf_counter()
+        for segment in file_segments(file_info):
+            archive_path = archive_path_for(segment["file_path"])
+            if not archive_path.exists():
+                continue
+            with gzip.open(archive_path, 'rb') as src, open(segment["file_path"], 'wb') as dst:
+                shutil.copyfileobj(src, dst)
+            archive_path.unlink()
+        elapsed = time.perf_counter() - started
+
+        file_info["tier"] = "hot"
+        file_info.pop("archived_size", None)
+        file_info.pop("archived_at", None)
+        storage_metrics["rehydrations_total"] += 1
+        storage_metrics["rehydrated_bytes_total"] += file_info["file_size"]
+        storage_metrics["rehydration_seconds_total"] += elapsed
+        storage_metrics["rehydration_seconds_max"] = max(storage_metrics["rehydration_seconds_max"], elapsed)
+
+        # 復元で容量を超えた場合は他のファイルを退避
+        enforce_quotas(exclude={file_info["id"]})
+        save_saved_files_registry()
+
+async def ensure_hot_async(file_info: Dict[str, Any]):
+    """ensure_hot() をイベントループ外で実行（復元・容量調整の間も他のリクエストを止めない）"""
+    if is_archived(file_info):
+        await asyncio.to_thread(ensure_hot, file_info)
+    else:
+        touch_file(file_info)
+
+def hot_usage(category: Optional[str] = None) -> int:
+    """ホット層の使用量（バイト）"""
+    return sum(
+        f["file_size"] for f in saved_files_registry
+        if not is_archived(f) and (category is None or f["category"] == category)
+    )
+
+def enforce_quotas(extra_bytes: int = 0, category: str = "data", exclude: Optional[set] = None) -> bool:
+    """容量制限を超えないよう、アクセスの古いファイルから順にアーカイブ
+
+    extra_bytes はこれから追加するファイルのサイズ。制限内に収まればTrueを返す。
+    """
+    exclude = exclude or set()
+    with storage_lock:
+        limits = []
+        if STORAGE_QUOTA_BYTES:
+            limits.append((None, STORAGE_QUOTA_BYTES))
+        for quota_category, quota in CATEGORY_QUOTAS.items():
+            limits.append((quota_category, quota))
+
+        # 他を全て退避しても収まらない場合は何もアーカイブしない
+        for quota_category, quota in limits:
+            extra = extra_bytes if quota_category in (None, category) else 0
+            pinned = sum(
+                f["file_size"] for f in saved_files_registry
+                if not is_archived(f) and f["id"] in exclude
+                and (quota_category is None or f["category"] == quota_category)
+            )
+            if pinned + extra > quota:
+                return False
+
+        for quota_category, quota in limits:
+            extra = extra_bytes if quota_category in (None, category) else 0
+            if hot_usage(quota_category) + extra <= quota:
+                continue
+            candidates = sorted(
+                (f for f in saved_files_registry
+                 if not is_archived(f) and f["id"] not in exclude
+                 and (quota_category is None or f["category"] == quota_category)),
+                key=last_access_time
+            )
+            for candidate in candidates:
+                if hot_usage(quota_category) + extra <= quota:
+                    break
+                archive_file(candidate)
+            if hot_usage(quota_category) + extra > quota:
+                return False
+        return True
+
+def run_tiering() -> Dict[str, Any]:
+    """コールドファイルをアーカイブし、容量制限を適用してレジストリを保存"""
+    threshold = datetime.now() - timedelta(days=COLD_AFTER_DAYS)
+    archived = []
+    with storage_lock:
+        for f in list(saved_files_registry):
+            if not is_archived(f) and last_access_time(f) < threshold and Path(f["file_path"]).exists():
+                archive_file(f)
+                archived.append(f["id"])
+        within_quota = enforce_quotas()
+        save_saved_files_registry()
+    return {"archived": archived, "within_quota": within_quota}
+
+async def tiering_loop():
+    """定期的にアーカイブ処理を実行"""
+    while True:
+        await asyncio.sleep(TIERING_INTERVAL_SECONDS)
+        try:
+            await asyncio.to_thread(run_tiering)
+        except Exception as e:
+            logger.exception("Tiering failed")
+            storage_metrics["tiering_errors_total"] += 1
+            storage_metrics["last_tiering_error"] = f"{datetime.now().isoformat()} {type(e).__name__}: {e}"
+
 @app.get("/")
 async def redirect_to_console():
     """ルートパスをdata-server-consoleにリダイレクト"""
@@ -100,6 +641,11 @@ async def upload_file(
         with open(file_path, "wb") as buffer:
             shutil.copyfileobj(file.file, buffer)
         
+        # 容量制限を確認（必要ならアクセスの古いファイルをアーカイブ）
+        if not await asyncio.to_thread(enforce_quotas, extra_bytes=file_path.stat().st_size):
+            file_path.unlink(missing_ok=True)
+            raise HTTPException(status_code=507, detail="Storage quota exceeded")
+        
         # ファイル情報をレジストリに追加
         file_info = {
             "id": file_id,
@@ -111,9 +657,29 @@ async def upload_file(
             "file_size": file_path.stat().st_size,
             "file_extension": file_extension,
             "save_time": datetime.now().isoformat(),
-            "content_type": file.content_type
+            "content_type": file.content_type,
+            "tier": "hot",
+            "last_access": None
         }
         
+        # Excelは保存時に一度だけシートごとに変換
+        if file_extension == ".xlsx":
+            try:
+                convert_workbook(file_info)
+            except Exception as e:
+                file_path.unlink(missing_ok=True)
+                shutil.rmtree(CONVERTED_DIR / file_id, ignore_errors=True)
+                raise HTTPException(status_code=400, detail=f"Failed to parse Excel workbook: {str(e)}")
+        
+        # プレビュー（先頭行・サンプル行）を保存時に生成
+        # 解析できないファイルも保存自体は受け付け、プレビューは初回要求時に再試行する
+        try:
+            build_preview(file_info)
+        except Exception:
+            logger.exception("Failed to build the preview of %s", file_id)
+            (PREVIEW_DIR / f"{file_id}.json").unlink(missing_ok=True)
+            invalidate_preview_cache(file_id)
+        
         saved_files_registry.append(file_info)
         save_saved_files_registry()
         
@@ -124,10 +690,115 @@ async def upload_file(
             "size": file_info["file_size"]
         }
         
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Save failed: {str(e)}")
 
-@app.get("/files/list")
+@app.post("/files/{file_id}/append")
+async def append_file(file_id: str, file: UploadFile = File(...)):
+    """既存データセットに行を追記（新しい不変セグメントとして保存し、バージョンを進める）"""
+    file_info = find_file_info(file_id)
+    if not file_info:
+        raise HTTPException(status_code=404, detail="File not found")
+    
+    file_extension = file_info["file_extension"]
+    if file_extension not in APPENDABLE_EXTENSIONS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Append is not supported for {file_extension}. Supported: {', '.join(APPENDABLE_EXTENSIONS)}"
+        )
+    if file.filename and Path(file.filename).suffix.lower() != file_extension:
+        raise HTTPException(status_code=400, detail=f"Appended file must be {file_extension}")
+    
+    # 既存セグメントはアーカイブされていても書き換えないが、行数計算のため復元する
+    await ensure_hot_async(file_info)
+    version = latest_version(file_info) + 1
+    segment_path = SAVE_DIR / f"{file_id}_v{version}{file_extension}"
+    
+    try:
+        with open(segment_path, "wb") as buffer:
+            shutil.copyfileobj(file.file, buffer)
+        segment_size = segment_path.stat().st_size
+        
+        # 形式と列構成を検証
+        rows = read_segment(segment_path, file_extension)
+        if file_extension == ".csv":
+            base_columns = list(pd.read_csv(file_info["file_path"], nrows=0).columns)
+            if list(rows.columns) != base_columns:
+                raise HTTPException(
+                    status_code=400,
+                    detail=f"CSV columns do not match the dataset: expected {base_columns}"
+                )
+        
+        if not await asyncio.to_thread(
+            enforce_quotas, extra_bytes=segment_size, category=file_info["category"], exclude={file_id}
+        ):
+            raise HTTPException(status_code=507, detail="Storage quota exceeded")
+        
+        # 初回の追記時に元ファイルをバージョン1のセグメントとして登録
+        if "segments" not in file_info:
+            file_info["segments"] = [{
+                "version": 1,
+                "file_path": file_info["file_path"],
+                "rows": segment_row_count(Path(file_info["file_path"]), file_extension),
+                "file_size": Path(file_info["file_path"]).stat().st_size,
+                "created": file_info["save_time"]
+            }]
+        file_info["segments"].append({
+            "version": version,
+            "file_path": str(segment_path),
+            "rows": len(rows),
+            "file_size": segment_size,
+            "created": datetime.now().isoformat()
+        })
+        file_info["version"] = version
+        file_info["file_size"] = sum(s["file_size"] for s in file_info["segments"])
+        file_info["updated_time"] = datetime.now().isoformat()
+        
+        # プレビューのサンプルを追記分で更新
+        # 保存済みプレビューがなければ追記後の全体から生成する（追記分を二重に数えない）
+        preview_path = PREVIEW_DIR / f"{file_id}.json"
+        try:
+            if preview_path.exists():
+                with open(preview_path, 'rb') as f:
+                    preview = orjson.loads(f.read())
+                # 追記分をプレビューと同じ形式（.txtは通し行番号つき）で読み込む
+                appended = load_file_rows(file_info, since=version - 1)
+                if len(preview["head"]) < PREVIEW_ROWS:
+                    preview["head"].extend(
+                        _select_records(appended, list(range(min(PREVIEW_ROWS - len(preview["head"]), len(appended)))))
+                    )
+                reservoir_update(preview, appended, PREVIEW_ROWS)
+                with open(preview_path, 'wb') as f:
+                    f.write(orjson.dumps(preview, default=_orjson_default))
+                invalidate_preview_cache(file_id)
+            else:
+                build_preview(file_info)
+        except Exception:
+            (PREVIEW_DIR / f"{file_id}.json").unlink(missing_ok=True)
+            invalidate_preview_cache(file_id)
+        
+        save_saved_files_registry()
+        
+        return {
+            "message": "Rows appended successfully",
+            "file_id": file_id,
+            "version": version,
+            "rows_added": len(rows),
+            "total_rows": sum(s["rows"] for s in file_info["segments"])
+        }
+        
+    except HTTPException:
+        if latest_version(file_info) != version:
+            segment_path.unlink(missing_ok=True)
+        raise
+    except Exception as e:
+        if latest_version(file_info) != version:
+            segment_path.unlink(missing_ok=True)
+        raise HTTPException(status_code=500, detail=f"Append failed: {str(e)}")
+
+@app.get("/files/list", response_class=FastJSONResponse)
 async def list_files(
     limit: int = Query(default=20, ge=1, le=100),
     offset: int = Query(default=0, ge=0)
@@ -144,9 +815,13 @@ async def list_files(
     for f in files:
         clean_file = f.copy()
         clean_file.pop("file_path", None)
+        if "segments" in clean_file:
+            clean_file["segments"] = [
+                {k: v for k, v in s.items() if k != "file_path"} for s in clean_file["segments"]
+            ]
         clean_files.append(clean_file)
     
-    return {
+    return FastJSONResponse({
         "data": clean_files,
         "pagination": {
             "total": total,
@@ -154,164 +829,132 @@ async def list_files(
             "offset": offset,
             "has_more": offset + limit < total
         }
-    }
+    })
 
-@app.get("/files/{file_id}/data")
+@app.get("/files/{file_id}/data", response_class=FastJSONResponse)
 async def get_file_data(
     file_id: str,
     limit: int = Query(default=100, ge=1, le=1000),
-    offset: int = Query(default=0, ge=0)
+    offset: int = Query(default=0, ge=0),
+    sheet: Optional[str] = Query(default=None, description="Excelのシート名またはインデックス"),
+    version: Optional[int] = Query(default=None, ge=1, description="このバージョン時点のデータを取得"),
+    since: Optional[int] = Query(default=None, ge=0, description="このバージョンより後に追記された行のみ取得")
 ):
     """ファイルの内容を構造化データとして取得"""
     # ファイル情報を検索
-    file_info = None
-    for f in uploaded_files_registry:
-        if f["id"] == file_id:
-            file_info = f
-            break
-    
+    file_info = find_file_info(file_id)
     if not file_info:
         raise HTTPException(status_code=404, detail="File not found")
     
+    # アーカイブ済みなら透過的に復元
+    await ensure_hot_async(file_info)
     file_path = Path(file_info["file_path"])
     if not file_path.exists():
         raise HTTPException(status_code=404, detail="File data not found")
     
     try:
-        file_extension = file_info["file_extension"]
+        total_rows, page = load_file_page(file_info, offset, limit, sheet, version, since)
         
-        if file_extension == ".csv":
-            # CSVファイルの処理
-            df = pd.read_csv(file_path)
-            total_rows = len(df)
-            data = df.iloc[offset:offset + limit].to_dict('records')
-            
-        elif file_extension == ".json":
-            # JSONファイルの処理
-            with open(file_path, 'r', encoding='utf-8') as f:
-                json_data = json.load(f)
-            
-            if isinstance(json_data, list):
-                total_rows = len(json_data)
-                data = json_data[offset:offset + limit]
-            else:
-                total_rows = 1
-                data = [json_data] if offset == 0 else []
-                
-        elif file_extension == ".xlsx":
-            # Excelファイルの処理
-            df = pd.read_excel(file_path)
-            total_rows = len(df)
-            data = df.iloc[offset:offset + limit].to_dict('records')
-            
-        elif file_extension == ".txt":
-            # テキストファイルの処理
-            with open(file_path, 'r', encoding='utf-8') as f:
-                lines = f.readlines()
-            total_rows = len(lines)
-            data = [{"line_number": i + offset + 1, "content": line.strip()} 
-                   for i, line in enumerate(lines[offset:offset + limit])]
-        else:
-            raise HTTPException(status_code=400, detail="Unsupported file format for data extraction")
-        
-        return {
+        return FastJSONResponse({
             "file_info": {
                 "id": file_info["id"],
                 "title": file_info["title"],
                 "filename": file_info["filename"],
                 "category": file_info["category"]
             },
-            "data": data,
+            "data": page_payload(page),
             "pagination": {
                 "total": total_rows,
                 "limit": limit,
                 "offset": offset,
                 "has_more": offset + limit < total_rows
+            },
+            "versioning": {
+                "version": version or latest_version(file_info),
+                "since": since,
+                "latest": latest_version(file_info)
             }
-        }
+        })
         
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to read file data: {str(e)}")
 
-@app.get("/files/{file_id}/view")
+@app.get("/files/{file_id}/view", response_class=FastJSONResponse)
 async def view_file_content(
     file_id: str,
     format: str = Query(default="json", pattern="^(json|csv|html|raw)$"),
     limit: int = Query(default=100, ge=1, le=1000),
-    offset: int = Query(default=0, ge=0)
+    offset: int = Query(default=0, ge=0),
+    sheet: Optional[str] = Query(default=None, description="Excelのシート名またはインデックス"),
+    version: Optional[int] = Query(default=None, ge=1, description="このバージョン時点のデータを取得"),
+    since: Optional[int] = Query(default=None, ge=0, description="このバージョンより後に追記された行のみ取得")
 ):
     """ファイルの内容を指定された形式で表示"""
     # ファイル情報を検索
-    file_info = None
-    for f in uploaded_files_registry:
-        if f["id"] == file_id:
-            file_info = f
-            break
-    
+    file_info = find_file_info(file_id)
     if not file_info:
         raise HTTPException(status_code=404, detail="File not found")
     
+    # アーカイブ済みなら透過的に復元
+    await ensure_hot_async(file_info)
     file_path = Path(file_info["file_path"])
     if not file_path.exists():
         raise HTTPException(status_code=404, detail="File data not found")
     
     try:
-        file_extension = file_info["file_extension"]
+        # 生データ表示ではパースしない
+        if format == "raw":
+            segments = select_segments(file_info, version, since)
+            content = b"".join(iter_segment_bytes(file_info, segments)).decode('utf-8')
+            
+            return FastJSONResponse(
+                content={
+                    "file_info": {
+                        "id": file_info["id"],
+                        "title": file_info["title"],
+                        "filename": file_info["filename"]
+                    },
+                    "raw_content": content,
+                    "view_format": "raw",
+                    "file_size": len(content)
+                }
+            )
         
         # データを読み込み
-        if file_extension == ".csv":
-            df = pd.read_csv(file_path)
-            total_rows = len(df)
-            data = df.iloc[offset:offset + limit].to_dict('records')
-            
-        elif file_extension == ".json":
-            with open(file_path, 'r', encoding='utf-8') as f:
-                json_data = json.load(f)
-            
-            if isinstance(json_data, list):
-                total_rows = len(json_data)
-                data = json_data[offset:offset + limit]
-            else:
-                total_rows = 1
-                data = [json_data] if offset == 0 else []
-                
-        elif file_extension == ".xlsx":
-            df = pd.read_excel(file_path)
-            total_rows = len(df)
-            data = df.iloc[offset:offset + limit].to_dict('records')
-            
-        elif file_extension == ".txt":
-            with open(file_path, 'r', encoding='utf-8') as f:
-                lines = f.readlines()
-            total_rows = len(lines)
-            data = [{"line_number": i + offset + 1, "content": line.strip()} 
-                   for i, line in enumerate(lines[offset:offset + limit])]
-        else:
-            raise HTTPException(status_code=400, detail="Unsupported file format for viewing")
+        total_rows, page = load_file_page(file_info, offset, limit, sheet, version, since)
         
         # 形式に応じてレスポンスを生成
         if format == "json":
-            return {
+            return FastJSONResponse({
                 "file_info": {
                     "id": file_info["id"],
                     "title": file_info["title"],
                     "filename": file_info["filename"],
                     "category": file_info["category"]
                 },
-                "data": data,
+                "data": page_payload(page),
                 "pagination": {
                     "total": total_rows,
                     "limit": limit,
                     "offset": offset,
                     "has_more": offset + limit < total_rows
                 },
+                "versioning": {
+                    "version": version or latest_version(file_info),
+                    "since": since,
+                    "latest": latest_version(file_info)
+                },
                 "view_format": "json"
-            }
-            
-        elif format == "csv":
+            })
+        
+        data = page_rows(page)
+        
+        if format == "csv":
             # CSVとして出力
             if not data:
-                return JSONResponse(
+                return FastJSONResponse(
                     content={"error": "No data available"},
                     status_code=404
                 )
@@ -325,7 +968,7 @@ async def view_file_content(
                     values = [str(row.get(key, '')) for key in keys]
                     output.write(','.join(values) + '\n')
             
-            return JSONResponse(
+            return FastJSONResponse(
                 content={
                     "file_info": {
                         "id": file_info["id"],
@@ -335,8 +978,7 @@ async def view_file_content(
                     "csv_content": output.getvalue(),
                     "view_format": "csv",
                     "total_rows": total_rows
-                },
-                headers={"Content-Type": "application/json"}
+                }
             )
             
         elif format == "html":
@@ -365,7 +1007,7 @@ async def view_file_content(
             else:
                 html_content += "<p>データがありません</p>"
             
-            return JSONResponse(
+            return FastJSONResponse(
                 content={
                     "file_info": {
                         "id": file_info["id"],
@@ -377,45 +1019,56 @@ async def view_file_content(
                     "total_rows": total_rows
                 }
             )
-            
-        elif format == "raw":
-            # 生データとして出力
-            with open(file_path, 'r', encoding='utf-8') as f:
-                content = f.read()
-            
-            return JSONResponse(
-                content={
-                    "file_info": {
-                        "id": file_info["id"],
-                        "title": file_info["title"],
-                        "filename": file_info["filename"]
-                    },
-                    "raw_content": content,
-                    "view_format": "raw",
-                    "file_size": len(content)
-                }
-            )
         
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to view file: {str(e)}")
 
+@app.get("/files/{file_id}/preview", response_class=FastJSONResponse)
+async def preview_file(
+    file_id: str,
+    mode: str = Query(default="head", pattern="^(head|sample)$")
+):
+    """保存時に生成した先頭行またはランダムサンプルを返す"""
+    file_info = find_file_info(file_id)
+    if not file_info:
+        raise HTTPException(status_code=404, detail="File not found")
+    
+    try:
+        # 保存済みプレビューがなくアーカイブ済みなら、生成前にループ外で復元する
+        if is_archived(file_info) and not (PREVIEW_DIR / f"{file_id}.json").exists():
+            await ensure_hot_async(file_info)
+        body = preview_response_body(file_info, mode)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to build preview: {str(e)}")
+    
+    return Response(content=body, media_type="application/json")
+
 @app.get("/files/{file_id}/download")
 async def download_file(file_id: str):
     """ファイルをダウンロード"""
     # ファイル情報を検索
-    file_info = None
-    for f in uploaded_files_registry:
-        if f["id"] == file_id:
-            file_info = f
-            break
-    
+    file_info = find_file_info(file_id)
     if not file_info:
         raise HTTPException(status_code=404, detail="File not found")
     
+    # アーカイブ済みなら透過的に復元
+    await ensure_hot_async(file_info)
     file_path = Path(file_info["file_path"])
     if not file_path.exists():
         raise HTTPException(status_code=404, detail="File not found on disk")
     
+    # 追記されたデータセットは全セグメントを連結して返す
+    if len(file_segments(file_info)) > 1:
+        return StreamingResponse(
+            iter_segment_bytes(file_info, file_segments(file_info)),
+            media_type=file_info.get("content_type") or "application/octet-stream",
+            headers={"Content-Disposition": f'attachment; filename="{file_info["filename"]}"'}
+        )
+    
     return FileResponse(
         path=str(file_path),
         filename=file_info["filename"],
@@ -441,9 +1094,14 @@ async def delete_file(file_id: str):
     
     try:
         # ファイルを削除
-        file_path = Path(file_info["file_path"])
-        if file_path.exists():
-            file_path.unlink()
+        for segment in file_segments(file_info):
+            file_path = Path(segment["file_path"])
+            if file_path.exists():
+                file_path.unlink()
+            archive_path_for(file_path).unlink(missing_ok=True)
+        shutil.rmtree(CONVERTED_DIR / file_id, ignore_errors=True)
+        (PREVIEW_DIR / f"{file_id}.json").unlink(missing_ok=True)
+        invalidate_preview_cache(file_id)
         
         # レジストリから削除
         saved_files_registry.pop(file_index)
@@ -456,6 +1114,129 @@ async def delete_file(file_id: str):
 
 
 
+@app.get("/storage/status")
+async def storage_status():
+    """容量制限・階層ごとの使用量・アーカイブ/復元の統計を返す"""
+    categories = sorted({f["category"] for f in saved_files_registry} | set(CATEGORY_QUOTAS))
+    archived = [f for f in saved_files_registry if is_archived(f)]
+    return {
+        "quota": {
+            "total_bytes": STORAGE_QUOTA_BYTES or None,
+            "categories": CATEGORY_QUOTAS,
+            "cold_after_days": COLD_AFTER_DAYS
+        },
+        "usage": {
+            "hot_bytes": hot_usage(),
+            "archive_bytes": sum(f.get("archived_size", 0) for f in archived),
+            "hot_files": len(saved_files_registry) - len(archived),
+            "archived_files": len(archived),
+            "categories": {c: hot_usage(c) for c in categories}
+        },
+        "metrics": storage_metrics
+    }
+
+@app.post("/storage/tiering")
+async def trigger_tiering():
+    """アーカイブ処理を即時実行"""
+    return await asyncio.to_thread(run_tiering)
+
+# EDCコールバック受信（契約交渉・データ転送の状態変化）
+# 種別 -> (ペイロード中のIDキー, イベント名の接頭辞, ロングポーリングが応答を返す状態)
+CALLBACK_KINDS = {
+    "negotiations": ("contractNegotiationId", "ContractNegotiation", {"FINALIZED", "TERMINATED"}),
+    "transfers": ("transferProcessId", "TransferProcess", {"STARTED", "COMPLETED", "TERMINATED", "SUSPENDED"}),
+}
+callback_events: Dict[Tuple[str, str], Dict[str, Any]] = {}
+callback_waiters: Dict[Tuple[str, str], asyncio.Event] = {}
+# 待機中のロングポーリング数（タイムアウトした最後の待機者が待機イベントを片付ける）
+callback_waiter_counts: Dict[Tuple[str, str], int] = {}
+
+def _callback_record(event: Dict[str, Any]) -> Optional[Tuple[Tuple[str, str], Dict[str, Any]]]:
+    """EDCのイベント（{"type", "at", "payload"}）を(種別, ID)と記録に変換"""
+    event_type = event.get("type", "")
+    payload = event.get("payload") or {}
+    for kind, (id_key, prefix, _) in CALLBACK_KINDS.items():
+        if event_type.startswith(prefix) and payload.get(id_key):
+            agreement = payload.get("contractAgreement") or {}
+            return (kind, payload[id_key]), {
+                "id": payload[id_key],
+                "state": event_type[len(prefix):].upper(),
+                "event": event_type,
+                "agreement_id": agreement.get("@id") or agreement.get("id") or payload.get("contractId"),
+                "event_at": event.get("at"),
+                "received_at": time.time(),
+                "payload": payload
+            }
+    return None
+
+def _prune_callback_events():
+    """保持期間を過ぎたイベントを削除"""
+    expire_before = time.time() - CALLBACK_RETENTION_SECONDS
+    for key in [k for k, r in callback_events.items() if r["received_at"] < expire_before]:
+        del callback_events[key]
+        callback_waiters.pop(key, None)
+
+@app.post("/callbacks/edc")
+async def receive_edc_callback(request: Request):
+    """EDCのcallbackAddressesに登録するエンドポイント（単一イベントまたは配列）"""
+    try:
+        body = await request.json()
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid JSON")
+    
+    _prune_callback_events()
+    accepted = 0
+    for event in body if isinstance(body, list) else [body]:
+        if not isinstance(event, dict):
+            continue
+        parsed = _callback_record(event)
+        if parsed is None:
+            continue
+        key, record = parsed
+        callback_events[key] = record
+        accepted += 1
+        if record["state"] in CALLBACK_KINDS[key[0]][2]:
+            waiter = callback_waiters.pop(key, None)
+            if waiter is not None:
+                waiter.set()
+    return {"accepted": accepted}
+
+@app.get("/callbacks/{kind}/{process_id}", response_class=FastJSONResponse)
+async def wait_for_callback(
+    kind: str,
+    process_id: str,
+    timeout: float = Query(25, ge=0, description="完了イベントを待つ最大秒数（0で即時応答）")
+):
+    """完了イベント（交渉: FINALIZED/TERMINATED、転送: STARTED以降）を受信するまで待機
+
+    受信済みなら即座に記録を返し、timeout内に届かなければ204を返す。
+    """
+    if kind not in CALLBACK_KINDS:
+        raise HTTPException(status_code=404, detail=f"Unknown callback kind: {kind}")
+    
+    key = (kind, process_id)
+    done_states = CALLBACK_KINDS[kind][2]
+    record = callback_events.get(key)
+    if record is None or record["state"] not in done_states:
+        waiter = callback_waiters.setdefault(key, asyncio.Event())
+        callback_waiter_counts[key] = callback_waiter_counts.get(key, 0) + 1
+        try:
+            await asyncio.wait_for(waiter.wait(), min(timeout, CALLBACK_LONG_POLL_MAX))
+        except asyncio.TimeoutError:
+            # 届かなかったIDの待機イベントを残さない
+            if (callback_waiter_counts[key] == 1 and callback_waiters.get(key) is waiter
+                    and key not in callback_events):
+                del callback_waiters[key]
+            return Response(status_code=204)
+        finally:
+            callback_waiter_counts[key] -= 1
+            if not callback_waiter_counts[key]:
+                del callback_waiter_counts[key]
+        record = callback_events.get(key)
+        if record is None:
+            return Response(status_code=204)
+    return FastJSONResponse(record)
+
 @app.get("/config")
 async def get_config():
     """API設定情報を返す"""
@@ -472,9 +1253,12 @@ async def get_config():
         "endpoints": {
             "data": "/files/{file_id}/data",
             "view": "/files/{file_id}/view",
+            "preview": "/files/{file_id}/preview",
             "download": "/files/{file_id}/download",
             "save": "/files/upload",
-            "list": "/files/list"
+            "append": "/files/{file_id}/append",
+            "list": "/files/list",
+            "edc_callback": "/callbacks/edc"
         }
     }
 
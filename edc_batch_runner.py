@@ -0,0 +1,325 @@
+#!/usr/bin/env python3
+"""
+Headless batch runner
+=====================
+
+Drives the whole provider/consumer flow without the UI, for N items at once:
+
+    policy (once) -> asset -> contract definition -> catalog -> negotiation -> transfer
+
+Payloads start from the JSON templates in resources/ and are filled from a
+manifest; negotiation, EDR and transfer handling reuse the same helpers as
+the UI (edc_client / edc_jobs). At the end a table of per-stage timings
+(mean / min / p50 / p90 / p95 / p99 / max) and the overall throughput is printed.
+
+    python edc_batch_runner.py resources/batch-manifest.sample.json
+    python edc_batch_runner.py manifest.json --count 100 --concurrency 16 --report report.json
+
+Manifest keys (all optional except provider_dsp):
+
+    management_url / api_key       Management API (default EDC_MANAGEMENT_URL / EDC_API_KEY)
+    provider_dsp                   DSP endpoint the catalog and negotiations are sent to
+    provider_participant_id        assigner of the negotiated offers (default PARTICIPANT_ID)
+    policy_id                      policy created once and used by every contract definition
+    callback_url                   EDC callback receiver (default EDC_CALLBACK_URL, empty = polling)
+    count / concurrency            number of generated items / items in flight
+    transfer                       false stops after the negotiation
+    defaults                       item parameters; "{i}" is replaced by the item number
+    items                          explicit items (override defaults) instead of count
+
+Item parameters: asset_id, name, description, base_url. Strings in the
+templates may also contain {{parameter}} placeholders.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import re
+import sys
+import time
+from typing import Any, Dict, List, Optional
+
+from edc_client import (
+    AsyncEdcClient, EDC_API_KEY, EDC_MANAGEMENT, as_list, contract_request, wait_for_edr, wait_for_negotiation,
+)
+from edc_jobs import DATA_FETCH_TIMEOUT, EDR_TIMEOUT, TRANSFER_CHUNK_SIZE, resolve_edr_endpoint, transfer_request
+from resilience import breaker_states
+
+RESOURCES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "resources")
+TEMPLATES = ("create-asset", "create-policy", "create-contract-definition", "fetch-catalog", "negotiate-contract")
+
+PARTICIPANT_ID = os.getenv("PARTICIPANT_ID", "sample-participant-1.handson.dataspace.internal")
+EDC_CALLBACK_URL = os.getenv("EDC_CALLBACK_URL", "")
+NEGOTIATION_TIMEOUT = float(os.getenv("NEGOTIATION_TIMEOUT", "60"))
+
+STAGES = ("policy", "asset", "contract", "catalog", "negotiation", "transfer")
+
+_PLACEHOLDER = re.compile(r"\{\{([\w-]+)\}\}")
+
+
+class StageError(Exception):
+    """A stage finished with an unexpected result"""
+
+
+def load_templates(directory: str = RESOURCES_DIR) -> Dict[str, Dict[str, Any]]:
+    templates = {}
+    for name in TEMPLATES:
+        with open(os.path.join(directory, f"{name}.json"), encoding="utf-8") as f:
+            templates[name] = json.load(f)
+    return templates
+
+
+def fill(template: Any, params: Dict[str, Any]) -> Any:
+    """Deep copy of a template with {{name}} placeholders replaced from params"""
+    if isinstance(template, dict):
+        return {key: fill(value, params) for key, value in template.items()}
+    if isinstance(template, list):
+        return [fill(value, params) for value in template]
+    if isinstance(template, str):
+        return _PLACEHOLDER.sub(lambda m: str(params.get(m.group(1), m.group(0))), template)
+    return template
+
+
+def manifest_items(manifest: Dict[str, Any], count: Optional[int] = None) -> List[Dict[str, Any]]:
+    """Item parameters: explicit items, or `count` copies of the defaults numbered from 1"""
+    defaults = {
+        "asset_id": "batch-asset-{i}",
+        "name": "Batch Dataset {i}",
+        "description": "Created by edc_batch_runner",
+        "base_url": "http://data-api:8000/files/list",
+        **manifest.get("defaults", {}),
+    }
+    items = manifest.get("items") or [{} for _ in range(count or manifest.get("count", 1))]
+    if count is not None:
+        items = (items * (count // len(items) + 1))[:count]
+    return [
+        {key: value.replace("{i}", str(i)) if isinstance(value, str) else value
+         for key, value in {**defaults, **item}.items()}
+        for i, item in enumerate(items, start=1)
+    ]
+
+
+def _check(response, accepted=(200, 201), exists_ok: bool = False) -> Dict[str, Any]:
+    if exists_ok and response.status_code == 409:
+        return {}
+    if response.status_code not in accepted:
+        raise StageError(f"HTTP {response.status_code} {response.text[:200]}")
+    return response.json() if response.content else {}
+
+
+class BatchRunner:
+    """Runs items through the flow concurrently and records per-stage timings"""
+
+    def __init__(self, client: AsyncEdcClient, manifest: Dict[str, Any], templates: Dict[str, Dict[str, Any]]):
+        self.client = client
+        self.templates = templates
+        self.provider_dsp = manifest["provider_dsp"]
+        self.provider_participant_id = manifest.get("provider_participant_id", PARTICIPANT_ID)
+        self.policy_id = manifest.get("policy_id", templates["create-policy"]["@id"])
+        self.callback_url = manifest.get("callback_url", EDC_CALLBACK_URL) or None
+        self.transfer = manifest.get("transfer", True)
+        self.results: List[Dict[str, Any]] = []
+
+    async def _stage(self, result: Dict[str, Any], stage: str, coro):
+        started = time.perf_counter()
+        try:
+            return await coro
+        finally:
+            result["timings"][stage] = time.perf_counter() - started
+
+    async def run(self, items: List[Dict[str, Any]], concurrency: int) -> Dict[str, Any]:
+        started = time.perf_counter()
+        setup = {"item": None, "ok": True, "error": None, "timings": {}}
+        try:
+            await self._stage(setup, "policy", self.create_policy())
+        except Exception as e:
+            setup.update(ok=False, error=f"policy: {e}")
+        self.results = [setup]
+        if setup["ok"]:
+            semaphore = asyncio.Semaphore(max(1, concurrency))
+            self.results += await asyncio.gather(*(self.run_item(item, semaphore) for item in items))
+        return build_report(self.results, len(items), time.perf_counter() - started)
+
+    async def run_item(self, params: Dict[str, Any], semaphore: asyncio.Semaphore) -> Dict[str, Any]:
+        result = {"item": params["asset_id"], "ok": False, "error": None, "timings": {},
+                  "agreement_id": None, "bytes": None}
+        async with semaphore:
+            stage = "asset"
+            try:
+                await self._stage(result, stage, self.create_asset(params))
+                stage = "contract"
+                await self._stage(result, stage, self.create_contract_definition(params))
+                stage = "catalog"
+                offer = await self._stage(result, stage, self.find_offer(params))
+                stage = "negotiation"
+                result["agreement_id"] = await self._stage(result, stage, self.negotiate(params, offer))
+                if self.transfer:
+                    stage = "transfer"
+                    result["bytes"] = await self._stage(result, stage, self.transfer_data(params, result["agreement_id"]))
+                result["ok"] = True
+            except Exception as e:
+                result["error"] = f"{stage}: {str(e) or type(e).__name__}"
+        return result
+
+    # ---- Stages ----
+    async def create_policy(self):
+        payload = fill(self.templates["create-policy"], {"policy_id": self.policy_id})
+        payload["@id"] = self.policy_id
+        _check(await self.client.create_policy(payload), exists_ok=True)
+
+    async def create_asset(self, params: Dict[str, Any]):
+        payload = fill(self.templates["create-asset"], params)
+        payload["@id"] = params["asset_id"]
+        payload.setdefault("properties", {}).update(name=params["name"], description=params["description"])
+        payload.setdefault("dataAddress", {})["baseUrl"] = params["base_url"]
+        _check(await self.client.create_asset(payload), exists_ok=True)
+
+    async def create_contract_definition(self, params: Dict[str, Any]):
+        payload = fill(self.templates["create-contract-definition"], params)
+        payload["@id"] = f"{params['asset_id']}-contract"
+        payload["accessPolicyId"] = payload["contractPolicyId"] = self.policy_id
+        payload["assetsSelector"] = [{
+            "@type": "CriterionDto",
+            "operandLeft": "https://w3id.org/edc/v0.0.1/ns/id",
+            "operator": "=",
+            "operandRight": params["asset_id"],
+        }]
+        _check(await self.client.create_contract_definition(payload), exists_ok=True)
+
+    async def find_offer(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        """First offer for the item's asset in the provider's catalog"""
+        payload = fill(self.templates["fetch-catalog"], params)
+        payload["counterPartyAddress"] = self.provider_dsp
+        payload["querySpec"] = {"@type": "QuerySpec", "filterExpression": [{
+            "operandLeft": "https://w3id.org/edc/v0.0.1/ns/id", "operator": "=", "operandRight": params["asset_id"],
+        }]}
+        catalog = _check(await self.client.request_catalog(payload))
+        for dataset in as_list(catalog.get("dcat:dataset")):
+            if dataset.get("@id") == params["asset_id"]:
+                offers = as_list(dataset.get("odrl:hasPolicy"))
+                if offers:
+                    return offers[0]
+        raise StageError(f"no offer for {params['asset_id']} in the catalog")
+
+    async def negotiate(self, params: Dict[str, Any], offer: Dict[str, Any]) -> str:
+        request = contract_request(offer["@id"], self.provider_dsp, params["asset_id"],
+                                   self.provider_participant_id, offer, self.callback_url)
+        payload = fill(self.templates["negotiate-contract"], {**params, "contract-offer-id": offer["@id"]})
+        # テンプレートの@contextに、offerが使うodrl:/dcat:等の接頭辞を加える
+        context = payload.get("@context")
+        payload.update(request)
+        if isinstance(context, dict):
+            payload["@context"] = {**context, **request["@context"]}
+        negotiation_id = _check(await self.client.start_negotiation(payload)).get("@id")
+        outcome = await wait_for_negotiation(self.client, negotiation_id, NEGOTIATION_TIMEOUT, self.callback_url)
+        if outcome["state"] != "FINALIZED" or not outcome["agreement_id"]:
+            raise StageError(outcome["error_detail"] or f"negotiation {outcome['state'] or 'timed out'}")
+        return outcome["agreement_id"]
+
+    async def transfer_data(self, params: Dict[str, Any], agreement_id: str) -> int:
+        """Start a transfer, wait for the EDR and stream the data (returns bytes received)"""
+        payload = transfer_request(agreement_id, params["asset_id"], self.provider_dsp, self.callback_url)
+        transfer_id = _check(await self.client.start_transfer(payload)).get("@id")
+        outcome = await wait_for_edr(self.client, transfer_id, timeout=EDR_TIMEOUT, callback_url=self.callback_url)
+        edr = outcome["edr"]
+        if not edr or not edr.get("endpoint") or not edr.get("authorization"):
+            raise StageError(f"no EDR (transfer {outcome['state'] or 'timed out'})")
+        received = 0
+        async with self.client.stream_data(resolve_edr_endpoint(edr["endpoint"]), edr["authorization"],
+                                           timeout=DATA_FETCH_TIMEOUT) as response:
+            if response.status_code != 200:
+                raise StageError(f"data fetch HTTP {response.status_code}")
+            async for chunk in response.aiter_bytes(TRANSFER_CHUNK_SIZE):
+                received += len(chunk)
+        return received
+
+
+def _percentile(values: List[float], q: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(q * (len(ordered) - 1))))]
+
+
+def build_report(results: List[Dict[str, Any]], items: int, wall_time: float) -> Dict[str, Any]:
+    stages = {}
+    for stage in STAGES:
+        timings = [r["timings"][stage] for r in results if stage in r["timings"]]
+        if not timings:
+            continue
+        stages[stage] = {
+            "count": len(timings),
+            "mean": sum(timings) / len(timings),
+            "min": min(timings),
+            "p50": _percentile(timings, 0.5),
+            "p90": _percentile(timings, 0.9),
+            "p95": _percentile(timings, 0.95),
+            "p99": _percentile(timings, 0.99),
+            "max": max(timings),
+        }
+    item_results = [r for r in results if r["item"] is not None]
+    succeeded = sum(1 for r in item_results if r["ok"])
+    return {
+        "items": items,
+        "succeeded": succeeded,
+        "failed": items - succeeded,
+        "wall_time": wall_time,
+        "throughput": succeeded / wall_time if wall_time > 0 else 0.0,
+        "bytes": sum(r.get("bytes") or 0 for r in item_results),
+        "stages": stages,
+        "errors": [{"item": r["item"], "error": r["error"]} for r in results if r["error"]],
+        "endpoints": breaker_states(),
+    }
+
+
+def print_report(report: Dict[str, Any]):
+    columns = ("mean", "min", "p50", "p90", "p95", "p99", "max")
+    print(f"{'stage':<12}{'count':>7}" + "".join(f"{c:>9}" for c in columns) + "  (seconds)")
+    for stage, s in report["stages"].items():
+        print(f"{stage:<12}{s['count']:>7}" + "".join(f"{s[c]:>9.3f}" for c in columns))
+    print(f"\n{report['succeeded']}/{report['items']} items completed in {report['wall_time']:.2f}s "
+          f"({report['throughput']:.2f} items/s, {report['bytes']} bytes transferred)")
+    troubled = [e for e in report.get("endpoints", []) if e["retries"] or e["failures"] or e["rejected"]]
+    if troubled:
+        print("\nEndpoints with retries or failures:")
+        for e in troubled:
+            print(f"  {e['endpoint']}: {e['state']}, {e['calls']} calls, {e['retries']} retries, "
+                  f"{e['failures']} failures, {e['rejected']} rejected (circuit opened {e['opened']}x)")
+    for error in report["errors"][:20]:
+        print(f"  ✗ {error['item'] or '(setup)'}: {error['error']}")
+    if len(report["errors"]) > 20:
+        print(f"  ... {len(report['errors']) - 20} more errors")
+
+
+async def run_manifest(manifest: Dict[str, Any], count: Optional[int] = None,
+                       concurrency: Optional[int] = None) -> Dict[str, Any]:
+    client = AsyncEdcClient(manifest.get("management_url", EDC_MANAGEMENT), manifest.get("api_key", EDC_API_KEY))
+    try:
+        runner = BatchRunner(client, manifest, load_templates(manifest.get("templates_dir", RESOURCES_DIR)))
+        return await runner.run(manifest_items(manifest, count), concurrency or manifest.get("concurrency", 4))
+    finally:
+        await client.aclose()
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Run the provider/consumer flow for many items without the UI")
+    parser.add_argument("manifest", help="manifest JSON file")
+    parser.add_argument("--count", type=int, help="number of items (overrides the manifest)")
+    parser.add_argument("--concurrency", type=int, help="items in flight (overrides the manifest)")
+    parser.add_argument("--no-transfer", action="store_true", help="stop after the negotiation")
+    parser.add_argument("--report", help="also write the report as JSON to this file")
+    args = parser.parse_args(argv)
+
+    with open(args.manifest, encoding="utf-8") as f:
+        manifest = json.load(f)
+    if args.no_transfer:
+        manifest["transfer"] = False
+    report = asyncio.run(run_manifest(manifest, args.count, args.concurrency))
+    print_report(report)
+    if args.report:
+        with open(args.report, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+    return 0 if not report["errors"] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,686 @@
+#!/usr/bin/env python3
+"""
+EDC Management API client
+=========================
+
+Connection-pooled HTTP clients for the EDC Management API (v3) and the
+provider data plane. One instance is meant to be shared per process so
+that repeated calls reuse keep-alive connections instead of opening a
+new TCP connection per request.
+
+- EdcClient: synchronous client (requests)
+- AsyncEdcClient: asyncio client (httpx) for issuing independent calls concurrently
+- AsyncRunner: background event loop that lets synchronous code run coroutines
+
+Every call goes through resilience.Attempts (classified retries with
+jittered backoff, per-endpoint circuit breakers, the caller's deadline).
+"""
+
+import asyncio
+import concurrent.futures
+import os
+import threading
+import time
+from contextlib import asynccontextmanager
+from typing import Dict, Any, List, Optional, Awaitable
+from urllib.parse import urlsplit
+
+import httpx
+import requests
+from requests.adapters import HTTPAdapter
+
+from resilience import Attempts, CircuitOpenError, DeadlineExceeded, carry_deadline
+from tracing import as_job, bind, span
+
+# EDC endpoints (Single connector for both provider and consumer operations)
+EDC_MANAGEMENT = os.getenv("EDC_MANAGEMENT_URL", "http://edc-connector:19193")
+EDC_API_KEY = os.getenv("EDC_API_KEY", "password")
+
+# Connection pool / timeout tuning
+EDC_POOL_CONNECTIONS = int(os.getenv("EDC_POOL_CONNECTIONS", "4"))
+EDC_POOL_MAXSIZE = int(os.getenv("EDC_POOL_MAXSIZE", "16"))
+EDC_CONNECT_TIMEOUT = float(os.getenv("EDC_CONNECT_TIMEOUT", "3.05"))
+
+MANAGEMENT_V3 = "/management/v3"
+DSP_PROTOCOL = "dataspace-protocol-http"
+# Datasets requested per provider catalog (EDC returns only 50 when no limit is given)
+CATALOG_QUERY_LIMIT = int(os.getenv("CATALOG_QUERY_LIMIT", "5000"))
+
+# Adaptive polling of process state: first check after POLL_INITIAL_DELAY,
+# then the interval grows by POLL_BACKOFF up to POLL_MAX_DELAY
+POLL_INITIAL_DELAY = float(os.getenv("EDC_POLL_INITIAL_DELAY", "0.1"))
+POLL_MAX_DELAY = float(os.getenv("EDC_POLL_MAX_DELAY", "2"))
+POLL_BACKOFF = 1.5
+# Longest single long-poll request to the callback receiver
+CALLBACK_LONG_POLL = 25
+
+NEGOTIATION_DONE_STATES = ("FINALIZED", "TERMINATED")
+
+# Empty QuerySpec (returns everything the connector holds)
+QUERY_SPEC = {
+    "@context": {"@vocab": "https://w3id.org/edc/v0.0.1/ns/"},
+    "@type": "QuerySpec"
+}
+
+
+def query_spec(
+    offset: int = 0,
+    limit: Optional[int] = None,
+    filter_expression: Optional[List[Dict[str, Any]]] = None,
+    sort_field: Optional[str] = None,
+    sort_order: str = "ASC",
+) -> Dict[str, Any]:
+    """QuerySpec for paginated / filtered / sorted Management API listings"""
+    spec = dict(QUERY_SPEC, offset=offset, sortOrder=sort_order)
+    if limit is not None:
+        spec["limit"] = limit
+    if filter_expression:
+        spec["filterExpression"] = filter_expression
+    if sort_field:
+        spec["sortField"] = sort_field
+    return spec
+
+
+def id_contains(term: str) -> List[Dict[str, Any]]:
+    """filterExpression matching entities whose id contains term"""
+    return [{"operandLeft": "id", "operator": "like", "operandRight": f"%{term}%"}]
+
+
+def id_starts_with(prefix: str) -> List[Dict[str, Any]]:
+    """filterExpression matching entities whose id starts with prefix"""
+    return [{"operandLeft": "id", "operator": "like", "operandRight": f"{prefix}%"}]
+
+
+def callback_addresses(callback_url: Optional[str], events: List[str]) -> List[Dict[str, Any]]:
+    """callbackAddresses entry pointing EDC at the callback receiver (empty when disabled)"""
+    if not callback_url:
+        return []
+    return [{
+        "@type": "CallbackAddress",
+        "uri": f"{callback_url.rstrip('/')}/edc",
+        "events": events,
+        "transactional": False
+    }]
+
+
+def dsp_endpoint(provider_fqdn: str) -> str:
+    """DSP protocol endpoint of a participant's connector"""
+    return f"http://{provider_fqdn}:19194/protocol"
+
+
+def catalog_request(counter_party_address: str) -> Dict[str, Any]:
+    """CatalogRequest payload for one provider"""
+    return {
+        "@context": {
+            "@vocab": "https://w3id.org/edc/v0.0.1/ns/"
+        },
+        "@type": "CatalogRequest",
+        "counterPartyAddress": counter_party_address,
+        "protocol": DSP_PROTOCOL,
+        "querySpec": {
+            "@type": "QuerySpec",
+            "limit": CATALOG_QUERY_LIMIT
+        }
+    }
+
+
+def as_list(value):
+    """JSON-LD values may be a single object or an array; always return a list"""
+    if isinstance(value, dict):
+        return [value]
+    if isinstance(value, list):
+        return value
+    return []
+
+
+def contract_request(offer_id: str, provider_endpoint: str, dataset_id: str, provider_participant_id: str,
+                     offer_policy: Optional[Dict[str, Any]] = None, callback_url: Optional[str] = None) -> Dict[str, Any]:
+    """ContractRequest payload for an offer (default USE offer when the catalog policy is unknown)"""
+    if offer_policy:
+        # カタログから取得したオファーに不足フィールドを補完
+        policy = offer_policy.copy()
+        
+        # 必須フィールドを追加（不足している場合）
+        if "odrl:assigner" not in policy:
+            policy["odrl:assigner"] = {"@id": provider_participant_id}
+        if "odrl:target" not in policy:
+            policy["odrl:target"] = {"@id": dataset_id}
+    else:
+        # フォールバック用のデフォルトオファー
+        policy = {
+            "@id": offer_id,
+            "@type": "odrl:Offer",
+            "odrl:assigner": {"@id": provider_participant_id},
+            "odrl:target": {"@id": dataset_id},
+            "odrl:permission": [{"odrl:action": {"@id": "USE"}}],
+            "odrl:prohibition": [],
+            "odrl:obligation": []
+        }
+    
+    return {
+        "@context": {
+            "@vocab": "https://w3id.org/edc/v0.0.1/ns/",
+            "edc": "https://w3id.org/edc/v0.0.1/ns/",
+            "odrl": "http://www.w3.org/ns/odrl/2/",
+            "dcat": "http://www.w3.org/ns/dcat#",
+            "dct": "http://purl.org/dc/terms/",
+            "dspace": "https://w3id.org/dspace/v0.8/"
+        },
+        "@type": "ContractRequest",
+        "counterPartyAddress": provider_endpoint,
+        "protocol": DSP_PROTOCOL,
+        "policy": policy,
+        "callbackAddresses": callback_addresses(callback_url, ["contract.negotiation"])
+    }
+
+
+def _call_kind(path: str) -> str:
+    """Span kind of a Management API call (catalog requests are answered by the remote provider)"""
+    return "provider" if path.endswith("/catalog/request") else "connector"
+
+
+def _management_endpoint(base_url: str, path: str, payload: Optional[Dict[str, Any]]) -> str:
+    """Circuit breaker key of a Management API call: the remote provider for catalog requests, else the connector"""
+    if path.endswith("/catalog/request") and payload and payload.get("counterPartyAddress"):
+        return payload["counterPartyAddress"]
+    return base_url
+
+
+def _origin(url: str) -> str:
+    """Circuit breaker key of a data plane / other HTTP call (scheme://host:port)"""
+    parts = urlsplit(url)
+    return f"{parts.scheme}://{parts.netloc}"
+
+
+def _pooled_session(pool_connections: int, pool_maxsize: int, headers: Optional[Dict[str, str]] = None):
+    """Create a requests session with a keep-alive connection pool"""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    if headers:
+        session.headers.update(headers)
+    return session
+
+
+class _ManagementApi:
+    """Management API v3 endpoints used by the UI
+
+    Subclasses implement post()/get()/put()/delete(). For AsyncEdcClient these return
+    coroutines, so every method here is awaitable on the async client.
+    """
+
+    # ---- Listings ----
+    def query_assets(self, query_spec: Optional[Dict[str, Any]] = None, timeout: float = 10):
+        return self.post(f"{MANAGEMENT_V3}/assets/request", query_spec or QUERY_SPEC, timeout)
+
+    def query_policies(self, query_spec: Optional[Dict[str, Any]] = None, timeout: float = 10):
+        return self.post(f"{MANAGEMENT_V3}/policydefinitions/request", query_spec or QUERY_SPEC, timeout)
+
+    def query_contract_definitions(self, query_spec: Optional[Dict[str, Any]] = None, timeout: float = 10):
+        return self.post(f"{MANAGEMENT_V3}/contractdefinitions/request", query_spec or QUERY_SPEC, timeout)
+
+    # ---- Provider operations ----
+    def create_asset(self, payload: Dict[str, Any], timeout: float = 10):
+        return self.post(f"{MANAGEMENT_V3}/assets", payload, timeout)
+
+    def create_policy(self, payload: Dict[str, Any], timeout: float = 10):
+        return self.post(f"{MANAGEMENT_V3}/policydefinitions", payload, timeout)
+
+    def create_contract_definition(self, payload: Dict[str, Any], timeout: float = 10):
+        return self.post(f"{MANAGEMENT_V3}/contractdefinitions", payload, timeout)
+
+    def get_asset(self, asset_id: str, timeout: float = 10):
+        return self.get(f"{MANAGEMENT_V3}/assets/{asset_id}", timeout)
+
+    def get_contract_definition(self, contract_definition_id: str, timeout: float = 10):
+        return self.get(f"{MANAGEMENT_V3}/contractdefinitions/{contract_definition_id}", timeout)
+
+    def update_asset(self, payload: Dict[str, Any], timeout: float = 10):
+        return self.put(f"{MANAGEMENT_V3}/assets", payload, timeout)
+
+    def update_contract_definition(self, payload: Dict[str, Any], timeout: float = 10):
+        return self.put(f"{MANAGEMENT_V3}/contractdefinitions", payload, timeout)
+
+    def delete_asset(self, asset_id: str, timeout: float = 10):
+        return self.delete(f"{MANAGEMENT_V3}/assets/{asset_id}", timeout)
+
+    def delete_contract_definition(self, contract_definition_id: str, timeout: float = 10):
+        return self.delete(f"{MANAGEMENT_V3}/contractdefinitions/{contract_definition_id}", timeout)
+
+    # ---- Consumer operations ----
+    def request_catalog(self, payload: Dict[str, Any], timeout: float = 30):
+        return self.post(f"{MANAGEMENT_V3}/catalog/request", payload, timeout)
+
+    def start_negotiation(self, payload: Dict[str, Any], timeout: float = 30):
+        return self.post(f"{MANAGEMENT_V3}/contractnegotiations", payload, timeout)
+
+    def get_negotiation(self, negotiation_id: str, timeout: float = 20):
+        return self.get(f"{MANAGEMENT_V3}/contractnegotiations/{negotiation_id}", timeout)
+
+    def start_transfer(self, payload: Dict[str, Any], timeout: float = 30):
+        return self.post(f"{MANAGEMENT_V3}/transferprocesses", payload, timeout)
+
+    def get_edr_data_address(self, transfer_id: str, timeout: float = 20, auto_refresh: bool = False):
+        query = "?auto_refresh=true" if auto_refresh else ""
+        return self.get(f"{MANAGEMENT_V3}/edrs/{transfer_id}/dataaddress{query}", timeout)
+
+
+class EdcClient(_ManagementApi):
+    """Pooled, keep-alive client for the EDC Management API and data plane
+
+    Management API calls carry the JSON and API key headers by default.
+    Data plane calls use a separate pool so the management API key is never
+    sent to a provider's public endpoint.
+    """
+
+    def __init__(
+        self,
+        base_url: str = EDC_MANAGEMENT,
+        api_key: str = EDC_API_KEY,
+        pool_connections: int = EDC_POOL_CONNECTIONS,
+        pool_maxsize: int = EDC_POOL_MAXSIZE,
+        connect_timeout: float = EDC_CONNECT_TIMEOUT,
+    ):
+        self.base_url = base_url.rstrip("/")
+        self.connect_timeout = connect_timeout
+        self.session = _pooled_session(pool_connections, pool_maxsize, {
+            "Content-Type": "application/json",
+            "X-API-Key": api_key
+        })
+        self.data_session = _pooled_session(pool_connections, pool_maxsize)
+
+    def _timeout(self, read_timeout: float):
+        return (min(self.connect_timeout, read_timeout), read_timeout)
+
+    def _send(self, endpoint: str, method: str, path: str, timeout: float, send) -> requests.Response:
+        """send(timeout) with retries, the endpoint's circuit breaker and the caller's deadline"""
+        attempts = Attempts(endpoint, method, path, timeout)
+        while True:
+            read_timeout = attempts.start()
+            try:
+                response = send(self._timeout(read_timeout))
+            except Exception as e:
+                delay = attempts.failed(e)
+                if delay is None:
+                    raise
+            else:
+                delay = attempts.completed(response)
+                if delay is None:
+                    return response
+                response.close()
+            time.sleep(delay)
+
+    def _request(self, method: str, path: str, timeout: float, **kwargs) -> requests.Response:
+        endpoint = _management_endpoint(self.base_url, path, kwargs.get("json"))
+        with span(f"{method} {path}", _call_kind(path), method=method, endpoint=path, retries=0) as s:
+            response = self._send(endpoint, method, path, timeout, lambda t: self.session.request(
+                method, f"{self.base_url}{path}", timeout=t, **kwargs
+            ))
+            s.set(status=response.status_code, bytes=len(response.content))
+            return response
+
+    def post(self, path: str, payload: Dict[str, Any], timeout: float = 10) -> requests.Response:
+        """POST a JSON payload to a Management API path"""
+        return self._request("POST", path, timeout, json=payload)
+
+    def get(self, path: str, timeout: float = 10) -> requests.Response:
+        """GET a Management API path"""
+        return self._request("GET", path, timeout)
+
+    def put(self, path: str, payload: Dict[str, Any], timeout: float = 10) -> requests.Response:
+        """PUT a JSON payload to a Management API path"""
+        return self._request("PUT", path, timeout, json=payload)
+
+    def delete(self, path: str, timeout: float = 10) -> requests.Response:
+        """DELETE a Management API path"""
+        return self._request("DELETE", path, timeout)
+
+    # ---- Data plane ----
+    def fetch_data(self, endpoint: str, authorization: str, timeout: float = 15, stream: bool = False) -> requests.Response:
+        """GET data from a provider data plane using an EDR authorization token"""
+        with span("GET data", "data-plane", method="GET", endpoint=endpoint, retries=0) as s:
+            response = self._send(_origin(endpoint), "GET", endpoint, timeout, lambda t: self.data_session.get(
+                endpoint,
+                headers={"Authorization": authorization},
+                timeout=t,
+                stream=stream
+            ))
+            # ストリーミング時は本文を読まずにContent-Lengthを記録
+            size = response.headers.get("content-length") if stream else len(response.content)
+            s.set(status=response.status_code, bytes=int(size) if size is not None else None)
+            return response
+
+    def probe(self, url: str, timeout: float = 5) -> requests.Response:
+        """GET an arbitrary URL (health checks, data server API) through the data plane pool"""
+        with span(f"GET {url}", "http", method="GET", endpoint=url, retries=0) as s:
+            response = self._send(_origin(url), "GET", url, timeout, lambda t: self.data_session.get(url, timeout=t))
+            s.set(status=response.status_code, bytes=len(response.content))
+            return response
+
+    def close(self):
+        self.session.close()
+        self.data_session.close()
+
+
+class AsyncEdcClient(_ManagementApi):
+    """asyncio counterpart of EdcClient built on httpx
+
+    Every Management API method returns a coroutine, so independent calls
+    can be awaited together with asyncio.gather(). The connection pool is
+    bound to the event loop that first uses it; share an instance only
+    within one loop (see AsyncRunner).
+    """
+
+    def __init__(
+        self,
+        base_url: str = EDC_MANAGEMENT,
+        api_key: str = EDC_API_KEY,
+        max_connections: int = EDC_POOL_MAXSIZE,
+        connect_timeout: float = EDC_CONNECT_TIMEOUT,
+    ):
+        self.base_url = base_url.rstrip("/")
+        self.connect_timeout = connect_timeout
+        limits = httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections)
+        self.client = httpx.AsyncClient(
+            base_url=self.base_url,
+            headers={"Content-Type": "application/json", "X-API-Key": api_key},
+            limits=limits
+        )
+        self.data_client = httpx.AsyncClient(limits=limits)
+
+    def _timeout(self, read_timeout: float) -> httpx.Timeout:
+        return httpx.Timeout(read_timeout, connect=min(self.connect_timeout, read_timeout))
+
+    async def _send(self, endpoint: str, method: str, path: str, timeout: float, send) -> httpx.Response:
+        """await send(timeout) with retries, the endpoint's circuit breaker and the caller's deadline"""
+        attempts = Attempts(endpoint, method, path, timeout)
+        while True:
+            read_timeout = attempts.start()
+            try:
+                response = await send(self._timeout(read_timeout))
+            except Exception as e:
+                delay = attempts.failed(e)
+                if delay is None:
+                    raise
+            else:
+                delay = attempts.completed(response)
+                if delay is None:
+                    return response
+                await response.aclose()
+            await asyncio.sleep(delay)
+
+    async def _request(self, method: str, path: str, timeout: float, **kwargs) -> httpx.Response:
+        endpoint = _management_endpoint(self.base_url, path, kwargs.get("json"))
+        with span(f"{method} {path}", _call_kind(path), method=method, endpoint=path, retries=0) as s:
+            response = await self._send(endpoint, method, path, timeout, lambda t: self.client.request(
+                method, path, timeout=t, **kwargs
+            ))
+            s.set(status=response.status_code, bytes=len(response.content))
+            return response
+
+    async def post(self, path: str, payload: Dict[str, Any], timeout: float = 10) -> httpx.Response:
+        """POST a JSON payload to a Management API path"""
+        return await self._request("POST", path, timeout, json=payload)
+
+    async def get(self, path: str, timeout: float = 10) -> httpx.Response:
+        """GET a Management API path"""
+        return await self._request("GET", path, timeout)
+
+    async def put(self, path: str, payload: Dict[str, Any], timeout: float = 10) -> httpx.Response:
+        """PUT a JSON payload to a Management API path"""
+        return await self._request("PUT", path, timeout, json=payload)
+
+    async def delete(self, path: str, timeout: float = 10) -> httpx.Response:
+        """DELETE a Management API path"""
+        return await self._request("DELETE", path, timeout)
+
+    async def fetch_data(self, endpoint: str, authorization: str, timeout: float = 15) -> httpx.Response:
+        """GET data from a provider data plane using an EDR authorization token"""
+        with span("GET data", "data-plane", method="GET", endpoint=endpoint, retries=0) as s:
+            response = await self._send(_origin(endpoint), "GET", endpoint, timeout, lambda t: self.data_client.get(
+                endpoint,
+                headers={"Authorization": authorization},
+                timeout=t
+            ))
+            s.set(status=response.status_code, bytes=len(response.content))
+            return response
+
+    @asynccontextmanager
+    async def stream_data(self, endpoint: str, authorization: str, timeout: float = 15):
+        """Streaming GET from a provider data plane (use with "async with"; read via aiter_bytes())"""
+        with span("GET data (stream)", "data-plane", method="GET", endpoint=endpoint, retries=0) as s:
+            # 再試行するのは本文を読み始める前（応答ヘッダーまで）だけ
+            response = await self._send(_origin(endpoint), "GET", endpoint, timeout, lambda t: self.data_client.send(
+                self.data_client.build_request("GET", endpoint, headers={"Authorization": authorization}, timeout=t),
+                stream=True
+            ))
+            s.set(status=response.status_code)
+            try:
+                yield response
+            finally:
+                await response.aclose()
+                s.set(bytes=response.num_bytes_downloaded)
+
+    async def probe(self, url: str, timeout: float = 5) -> httpx.Response:
+        """GET an arbitrary URL (health checks, data server API) through the data plane pool"""
+        with span(f"GET {url}", "http", method="GET", endpoint=url, retries=0) as s:
+            response = await self._send(_origin(url), "GET", url, timeout, lambda t: self.data_client.get(url, timeout=t))
+            s.set(status=response.status_code, bytes=len(response.content))
+            return response
+
+    async def aclose(self):
+        await self.client.aclose()
+        await self.data_client.aclose()
+
+
+class AsyncRunner:
+    """Event loop running in a daemon thread
+
+    Lets synchronous code (Streamlit script runs, worker threads) submit
+    coroutines to one long-lived loop, so an AsyncEdcClient and its
+    keep-alive pool can be shared across reruns.
+    """
+
+    def __init__(self):
+        self.loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self.loop.run_forever, name="edc-async-loop", daemon=True)
+        self._thread.start()
+
+    def submit(self, coro: Awaitable, inherit_deadline: bool = False,
+               job: Optional[str] = None) -> concurrent.futures.Future:
+        """Schedule a coroutine on the loop and return a thread-safe future
+
+        The coroutine runs under the caller's current tracing span, or as a
+        trace of its own named `job` (for background jobs, whose calls would
+        otherwise pile up in the caller's trace). Background work outlives
+        the caller, so it gets the caller's deadline only when asked to
+        (run() and gather() always pass it on).
+        """
+        if inherit_deadline:
+            coro = carry_deadline(coro)
+        coro = as_job(coro, job) if job else bind(coro)
+        return asyncio.run_coroutine_threadsafe(coro, self.loop)
+
+    def run(self, coro: Awaitable, timeout: Optional[float] = None):
+        """Run a coroutine on the loop and block until it finishes"""
+        return self.submit(coro, inherit_deadline=True).result(timeout)
+
+    def gather(self, *coros: Awaitable, return_exceptions: bool = False):
+        """Run coroutines concurrently and block until all have finished"""
+        async def _gather():
+            return await asyncio.gather(*coros, return_exceptions=return_exceptions)
+        return self.run(_gather())
+
+
+async def fetch_catalog_bounded(
+    client: AsyncEdcClient,
+    counter_party_address: str,
+    semaphore: asyncio.Semaphore,
+    timeout: float = 30,
+) -> Dict[str, Any]:
+    """Request one provider's catalog once a concurrency slot is free
+
+    Never raises; returns {"ok", "status", "catalog" | "error", "elapsed"}
+    where elapsed excludes the time spent waiting for the semaphore.
+    """
+    async with semaphore:
+        started = time.perf_counter()
+        try:
+            response = await asyncio.wait_for(
+                client.request_catalog(catalog_request(counter_party_address), timeout=timeout), timeout
+            )
+        except asyncio.TimeoutError:
+            return {"ok": False, "status": None, "error": f"timed out after {timeout:g}s",
+                    "elapsed": time.perf_counter() - started}
+        except Exception as e:
+            return {"ok": False, "status": None, "error": str(e) or type(e).__name__,
+                    "elapsed": time.perf_counter() - started}
+
+        elapsed = time.perf_counter() - started
+        if response.status_code == 200:
+            return {"ok": True, "status": 200, "catalog": response.json(), "elapsed": elapsed}
+        return {"ok": False, "status": response.status_code, "error": response.text, "elapsed": elapsed}
+
+
+async def _poll_with_backoff(poll) -> Optional[Dict[str, Any]]:
+    """Call poll() with growing intervals until it returns a body (None means not done yet)
+
+    Gives up (None) once the caller's deadline is used up.
+    """
+    delay = POLL_INITIAL_DELAY
+    polls = 0
+    while True:
+        await asyncio.sleep(delay)
+        polls += 1
+        try:
+            body = await poll()
+        except (httpx.HTTPError, ValueError, CircuitOpenError):
+            body = None
+        except DeadlineExceeded:
+            return None
+        if body is not None:
+            return {"body": body, "source": "poll", "polls": polls}
+        delay = min(delay * POLL_BACKOFF, POLL_MAX_DELAY)
+
+
+async def _long_poll_callback(client: "AsyncEdcClient", url: str) -> Optional[Dict[str, Any]]:
+    """Long-poll the callback receiver; None if it is unreachable or misbehaves"""
+    while True:
+        try:
+            response = await client.probe(f"{url}?timeout={CALLBACK_LONG_POLL}", timeout=CALLBACK_LONG_POLL + 5)
+            if response.status_code == 200:
+                return {"body": response.json(), "source": "callback", "polls": 0}
+        except (httpx.HTTPError, ValueError, CircuitOpenError, DeadlineExceeded):
+            return None
+        if response.status_code != 204:
+            return None
+
+
+async def _first_result(coros, timeout: float) -> Optional[Dict[str, Any]]:
+    """Run coroutines concurrently; return the first non-None result, or None on timeout"""
+    tasks = {asyncio.ensure_future(coro) for coro in coros}
+    deadline = time.perf_counter() + timeout
+    try:
+        while tasks:
+            done, tasks = await asyncio.wait(
+                tasks, timeout=max(0.0, deadline - time.perf_counter()), return_when=asyncio.FIRST_COMPLETED
+            )
+            if not done:
+                return None
+            for task in done:
+                if task.result() is not None:
+                    return task.result()
+        return None
+    finally:
+        for task in tasks:
+            task.cancel()
+
+
+async def wait_for_negotiation(
+    client: "AsyncEdcClient",
+    negotiation_id: str,
+    timeout: float = 60,
+    callback_url: Optional[str] = None,
+) -> Dict[str, Any]:
+    """Wait until a contract negotiation is FINALIZED or TERMINATED
+
+    Long-polls the callback receiver (when callback_url is set) while polling
+    the Management API with adaptive backoff as a fallback; whichever sees
+    the final state first wins. Never raises; returns {"state",
+    "agreement_id", "source", "polls", "elapsed"} with state None on timeout.
+    """
+    started = time.perf_counter()
+
+    async def poll():
+        response = await client.get_negotiation(negotiation_id)
+        body = response.json() if response.status_code == 200 else {}
+        return body if body.get("state") in NEGOTIATION_DONE_STATES else None
+
+    with span("Wait for negotiation", "wait", negotiation_id=negotiation_id) as s:
+        waiters = [_poll_with_backoff(poll)]
+        if callback_url:
+            waiters.append(_long_poll_callback(client, f"{callback_url.rstrip('/')}/negotiations/{negotiation_id}"))
+        result = await _first_result(waiters, timeout)
+        if result is not None:
+            s.set(state=result["body"].get("state"), source=result["source"], polls=result["polls"])
+
+    elapsed = time.perf_counter() - started
+    if result is None:
+        return {"state": None, "agreement_id": None, "source": None, "polls": None, "elapsed": elapsed}
+    body = result["body"]
+    return {
+        "state": body.get("state"),
+        "agreement_id": body.get("contractAgreementId") or body.get("agreement_id"),
+        "error_detail": body.get("errorDetail"),
+        "source": result["source"],
+        "polls": result["polls"],
+        "elapsed": elapsed,
+    }
+
+
+async def wait_for_edr(
+    client: "AsyncEdcClient",
+    transfer_id: str,
+    timeout: float = 30,
+    callback_url: Optional[str] = None,
+) -> Dict[str, Any]:
+    """Wait until the EDR (endpoint + authorization) of a transfer is available
+
+    Polls the EDR data address with adaptive backoff and, when callback_url
+    is set, long-polls the receiver for the transfer's STARTED/TERMINATED
+    event. Never raises; returns {"edr", "state", "source", "elapsed"} with
+    edr None on timeout or termination.
+    """
+    started = time.perf_counter()
+
+    async def poll():
+        response = await client.get_edr_data_address(transfer_id)
+        return {"state": "STARTED", "edr": response.json()} if response.status_code == 200 else None
+
+    async def callback():
+        result = await _long_poll_callback(client, f"{callback_url.rstrip('/')}/transfers/{transfer_id}")
+        if result is None:
+            return None
+        if result["body"].get("state") != "STARTED":
+            return {"body": {"state": result["body"].get("state"), "edr": None}, "source": "callback"}
+        try:
+            response = await client.get_edr_data_address(transfer_id)
+            if response.status_code == 200:
+                return {"body": {"state": "STARTED", "edr": response.json()}, "source": "callback"}
+        except (httpx.HTTPError, ValueError, CircuitOpenError, DeadlineExceeded):
+            pass
+        return None
+
+    with span("Wait for EDR", "wait", transfer_id=transfer_id) as s:
+        waiters = [_poll_with_backoff(poll)]
+        if callback_url:
+            waiters.append(callback())
+        result = await _first_result(waiters, timeout)
+        if result is not None:
+            s.set(state=result["body"].get("state"), source=result["source"], polls=result.get("polls"))
+
+    elapsed = time.perf_counter() - started
+    if result is None:
+        return {"edr": None, "state": None, "source": None, "elapsed": elapsed}
+    return {**result["body"], "source": result["source"], "elapsed": elapsed}
@@ -0,0 +1,533 @@
+#!/usr/bin/env python3
+"""
+EDC background jobs
+===================
+
+Runs data transfers (start transfer -> wait for EDR -> fetch data) and
+batches of contract negotiations as tasks on the shared event loop so
+that the Streamlit script never blocks on them and many can run at once.
+
+Each transfer is a small state machine:
+
+    QUEUED -> STARTING -> WAITING_EDR -> FETCHING -> COMPLETED
+                 \\             \\             \\--> FAILED
+                  \\-------------\\------------------^
+
+A negotiation batch runs every selected offer through start -> wait for
+FINALIZED/TERMINATED with at most `concurrency` negotiations in flight.
+
+Pages only read job snapshots; the orchestrators are shared by every
+session of the Streamlit server process.
+"""
+
+import asyncio
+import base64
+import json
+import os
+import re
+import threading
+import time
+import uuid
+from typing import Any, Dict, List, Optional
+
+from edc_client import AsyncEdcClient, AsyncRunner, callback_addresses, wait_for_edr, wait_for_negotiation
+
+# Transfers running at the same time (others wait in QUEUED)
+TRANSFER_CONCURRENCY = int(os.getenv("TRANSFER_CONCURRENCY", "8"))
+# Time allowed for the EDR to become available / for the data fetch
+EDR_TIMEOUT = float(os.getenv("EDR_TIMEOUT", "30"))
+DATA_FETCH_TIMEOUT = float(os.getenv("DATA_FETCH_TIMEOUT", "15"))
+# Finished jobs (and their downloaded files) are forgotten after this many seconds
+TRANSFER_JOB_RETENTION = float(os.getenv("TRANSFER_JOB_RETENTION", "3600"))
+
+# EDR reuse: tokens are refreshed in the background when they expire within
+# EDR_REFRESH_MARGIN seconds; EDR_CACHE_TTL applies to tokens without "exp"
+EDR_CACHE_TTL = float(os.getenv("EDR_CACHE_TTL", "300"))
+EDR_REFRESH_MARGIN = float(os.getenv("EDR_REFRESH_MARGIN", "30"))
+
+# Transferred payloads are streamed to files under static/ so that Streamlit's
+# static file serving can offer them as downloads without loading them in memory
+STATIC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "static")
+TRANSFER_DIR = os.path.join(STATIC_DIR, "transfers")
+TRANSFER_CHUNK_SIZE = 64 * 1024
+# Preview: at most this many records, parsed from at most this many leading bytes
+TRANSFER_PREVIEW_RECORDS = int(os.getenv("TRANSFER_PREVIEW_RECORDS", "20"))
+TRANSFER_PREVIEW_BYTES = int(os.getenv("TRANSFER_PREVIEW_BYTES", str(1024 * 1024)))
+
+QUEUED = "QUEUED"
+STARTING = "STARTING"
+WAITING_EDR = "WAITING_EDR"
+FETCHING = "FETCHING"
+COMPLETED = "COMPLETED"
+FAILED = "FAILED"
+
+TRANSFER_STEPS = [QUEUED, STARTING, WAITING_EDR, FETCHING, COMPLETED]
+FINISHED_STATES = (COMPLETED, FAILED)
+
+# Negotiation states within a batch (FINALIZED / TERMINATED come from EDC)
+REQUESTING = "REQUESTING"
+NEGOTIATING = "NEGOTIATING"
+FINALIZED = "FINALIZED"
+TERMINATED = "TERMINATED"
+TIMED_OUT = "TIMED_OUT"
+NEGOTIATION_FINISHED_STATES = (FINALIZED, TERMINATED, TIMED_OUT, FAILED)
+
+_DATAPLANE_PLACEHOLDER = re.compile(r'\$\{EDC_DATAPLANE_PUBLIC_URL:(.*?)\}')
+
+
+def resolve_edr_endpoint(endpoint: str) -> str:
+    """Replace a ${EDC_DATAPLANE_PUBLIC_URL:default} placeholder with its default"""
+    match = _DATAPLANE_PLACEHOLDER.search(endpoint or "")
+    return match.group(1) if match else endpoint
+
+
+def preview_records(head: bytes, complete: bool, limit: int = TRANSFER_PREVIEW_RECORDS) -> Dict[str, Any]:
+    """Parse up to `limit` records from the first bytes of a payload
+
+    JSON arrays are decoded element by element, so a preview never needs
+    the whole document. Other payloads fall back to the first lines.
+    Returns {"kind": "json" | "lines", "records", "truncated"}.
+    """
+    text = head.decode("utf-8", errors="ignore")
+    stripped = text.lstrip()
+    decoder = json.JSONDecoder()
+
+    if stripped.startswith("["):
+        records = []
+        pos = 1
+        while len(records) < limit:
+            while pos < len(stripped) and stripped[pos] in " \t\r\n,":
+                pos += 1
+            if pos >= len(stripped) or stripped[pos] == "]":
+                break
+            try:
+                record, pos = decoder.raw_decode(stripped, pos)
+            except ValueError:
+                break  # 先頭バイトの末尾で要素が切れている
+            records.append(record)
+        rest = stripped[pos:].lstrip(" \t\r\n,")
+        return {"kind": "json", "records": records, "truncated": not (complete and rest.startswith("]"))}
+
+    if stripped.startswith("{") and complete:
+        try:
+            return {"kind": "json", "records": [decoder.decode(stripped)], "truncated": False}
+        except ValueError:
+            pass
+
+    lines = text.splitlines()
+    if not complete and lines:
+        lines = lines[:-1]  # 最終行は途中で切れている可能性がある
+    return {"kind": "lines", "records": lines[:limit], "truncated": not complete or len(lines) > limit}
+
+
+def _transfer_filename(job_id: str, asset_id: str, content_type: str) -> str:
+    safe_asset = re.sub(r"[^A-Za-z0-9._-]", "_", asset_id)[:64]
+    if "json" in content_type:
+        extension = "json"
+    elif "csv" in content_type:
+        extension = "csv"
+    else:
+        extension = "txt"
+    return f"{job_id}-{safe_asset}.{extension}"
+
+
+def token_expiry(authorization: str) -> Optional[float]:
+    """"exp" claim of a JWT authorization token (not verified), or None"""
+    token = (authorization or "").split(" ")[-1]
+    parts = token.split(".")
+    if len(parts) != 3:
+        return None
+    try:
+        claims = json.loads(base64.urlsafe_b64decode(parts[1] + "=" * (-len(parts[1]) % 4)))
+        return float(claims["exp"])
+    except (ValueError, KeyError, TypeError):
+        return None
+
+
+class EdrCache:
+    """EDRs (endpoint + token) of started transfers, keyed by agreement and asset
+
+    Lets repeated pulls of the same agreement go straight to the data plane.
+    Entries whose token is about to expire are refreshed in the background
+    (re-reading the transfer's data address with auto_refresh); an entry
+    whose token could not be renewed is dropped once it expires.
+    """
+
+    def __init__(self, runner: AsyncRunner, client: AsyncEdcClient,
+                 ttl: float = EDR_CACHE_TTL, refresh_margin: float = EDR_REFRESH_MARGIN):
+        self.runner = runner
+        self.client = client
+        self.ttl = ttl
+        self.refresh_margin = refresh_margin
+        self._entries: Dict[tuple, Dict[str, Any]] = {}
+        self._refreshing = set()
+        self._lock = threading.Lock()
+
+    def get(self, agreement_id: str, asset_id: str) -> Optional[Dict[str, Any]]:
+        """A usable EDR ({"endpoint", "authorization", "transfer_id", "expires_at"}) or None"""
+        key = (agreement_id, asset_id)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            remaining = entry["expires_at"] - time.time()
+            if remaining <= 0:
+                del self._entries[key]
+                return None
+            entry = dict(entry)
+        if remaining <= self.refresh_margin:
+            self.refresh_in_background(key)
+        return entry
+
+    def put(self, agreement_id: str, asset_id: str, transfer_id: str, edr: Dict[str, Any]):
+        now = time.time()
+        with self._lock:
+            self._entries[(agreement_id, asset_id)] = {
+                "endpoint": edr["endpoint"],
+                "authorization": edr["authorization"],
+                "transfer_id": transfer_id,
+                "obtained_at": now,
+                "expires_at": token_expiry(edr["authorization"]) or now + self.ttl,
+            }
+
+    def invalidate(self, agreement_id: str, asset_id: str):
+        with self._lock:
+            self._entries.pop((agreement_id, asset_id), None)
+
+    def refresh_in_background(self, key: tuple):
+        with self._lock:
+            if key in self._refreshing:
+                return
+            self._refreshing.add(key)
+        self.runner.submit(self._refresh(key), job="Refresh EDR")
+
+    async def _refresh(self, key: tuple):
+        try:
+            with self._lock:
+                entry = self._entries.get(key)
+            if entry is None:
+                return
+            response = await self.client.get_edr_data_address(entry["transfer_id"], auto_refresh=True)
+            if response.status_code == 200:
+                edr = response.json()
+                if edr.get("endpoint") and edr.get("authorization"):
+                    self.put(key[0], key[1], entry["transfer_id"], edr)
+        except Exception:
+            pass
+        finally:
+            with self._lock:
+                self._refreshing.discard(key)
+
+
+def transfer_request(agreement_id: str, asset_id: str, provider_endpoint: str,
+                     callback_url: Optional[str] = None) -> Dict[str, Any]:
+    """TransferRequest payload for an HttpData-PULL transfer"""
+    payload = {
+        "@context": {"@vocab": "https://w3id.org/edc/v0.0.1/ns/"},
+        "@type": "TransferRequest",
+        "counterPartyAddress": provider_endpoint,
+        "protocol": "dataspace-protocol-http",
+        "contractId": agreement_id,
+        "assetId": asset_id,
+        "transferType": "HttpData-PULL",
+        "dataDestination": {
+            "@type": "DataAddress",
+            "type": "HttpProxy"
+        }
+    }
+    callbacks = callback_addresses(callback_url, ["transfer.process"])
+    if callbacks:
+        payload["callbackAddresses"] = callbacks
+    return payload
+
+
+class TransferJob:
+    """State of one background transfer"""
+
+    def __init__(self, agreement_id: str, asset_id: str, provider_endpoint: str, reuse_edr: bool = True):
+        self.job_id = uuid.uuid4().hex[:12]
+        self.agreement_id = agreement_id
+        self.asset_id = asset_id
+        self.provider_endpoint = provider_endpoint
+        self.reuse_edr = reuse_edr
+        self.state = QUEUED
+        self.transfer_id: Optional[str] = None
+        self.edr_source: Optional[str] = None
+        self.endpoint: Optional[str] = None
+        self.error: Optional[str] = None
+        self.status_code: Optional[int] = None
+        self.result: Optional[Dict[str, Any]] = None
+        self.bytes_received = 0
+        self.bytes_total: Optional[int] = None
+        self.file_path: Optional[str] = None
+        self.created_at = time.time()
+        self.updated_at = self.created_at
+        self.history: List[Dict[str, Any]] = [{"state": QUEUED, "at": self.created_at}]
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "job_id": self.job_id,
+            "agreement_id": self.agreement_id,
+            "asset_id": self.asset_id,
+            "provider_endpoint": self.provider_endpoint,
+            "state": self.state,
+            "transfer_id": self.transfer_id,
+            "edr_source": self.edr_source,
+            "endpoint": self.endpoint,
+            "error": self.error,
+            "status_code": self.status_code,
+            "result": self.result,
+            "bytes_received": self.bytes_received,
+            "bytes_total": self.bytes_total,
+            "file_path": self.file_path,
+            "created_at": self.created_at,
+            "updated_at": self.updated_at,
+            "history": list(self.history),
+        }
+
+
+class TransferOrchestrator:
+    """Runs transfers concurrently on an AsyncRunner and tracks their state"""
+
+    def __init__(self, runner: AsyncRunner, client: AsyncEdcClient, callback_url: Optional[str] = None,
+                 concurrency: int = TRANSFER_CONCURRENCY):
+        self.runner = runner
+        self.client = client
+        self.callback_url = callback_url
+        self.edr_cache = EdrCache(runner, client)
+        self._semaphore = asyncio.Semaphore(concurrency)
+        self._jobs: Dict[str, TransferJob] = {}
+        self._lock = threading.Lock()
+
+    def submit(self, agreement_id: str, asset_id: str, provider_endpoint: str, reuse_edr: bool = True) -> str:
+        """Queue a transfer and return its job id immediately
+
+        With reuse_edr, a cached EDR for the same agreement and asset skips
+        starting a new transfer process.
+        """
+        job = TransferJob(agreement_id, asset_id, provider_endpoint, reuse_edr)
+        with self._lock:
+            self._prune()
+            self._jobs[job.job_id] = job
+        self.runner.submit(self._run(job), job="Transfer data")
+        return job.job_id
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return job.snapshot() if job else None
+
+    def jobs(self, job_ids: List[str]) -> List[Dict[str, Any]]:
+        """Snapshots of the given jobs (unknown or expired ids are skipped)"""
+        with self._lock:
+            return [self._jobs[i].snapshot() for i in job_ids if i in self._jobs]
+
+    def _prune(self):
+        expire_before = time.time() - TRANSFER_JOB_RETENTION
+        for job_id in [i for i, j in self._jobs.items() if j.state in FINISHED_STATES and j.updated_at < expire_before]:
+            job = self._jobs.pop(job_id)
+            if job.file_path and os.path.exists(job.file_path):
+                os.remove(job.file_path)
+
+    def _transition(self, job: TransferJob, state: str, **fields):
+        with self._lock:
+            for name, value in fields.items():
+                setattr(job, name, value)
+            job.state = state
+            job.updated_at = time.time()
+            job.history.append({"state": state, "at": job.updated_at})
+
+    def _progress(self, job: TransferJob, **fields):
+        with self._lock:
+            for name, value in fields.items():
+                setattr(job, name, value)
+            job.updated_at = time.time()
+
+    async def _run(self, job: TransferJob):
+        async with self._semaphore:
+            try:
+                await self._execute(job)
+            except Exception as e:
+                self._transition(job, FAILED, error=str(e) or type(e).__name__)
+
+    async def _execute(self, job: TransferJob):
+        # ---- キャッシュ済みEDRの再利用 ----
+        cached = self.edr_cache.get(job.agreement_id, job.asset_id) if job.reuse_edr else None
+        if cached is not None:
+            self._transition(job, FETCHING, transfer_id=cached["transfer_id"], edr_source="cache")
+            if await self._fetch(job, cached, final=False):
+                return
+            # トークンが拒否された場合は破棄して新しい転送を開始
+            self.edr_cache.invalidate(job.agreement_id, job.asset_id)
+
+        edr = await self._obtain_edr(job)
+        if edr is not None:
+            await self._fetch(job, edr, final=True)
+
+    async def _obtain_edr(self, job: TransferJob) -> Optional[Dict[str, Any]]:
+        """Start a transfer process and wait for its EDR (None and FAILED on error)"""
+        # ---- 転送開始 ----
+        self._transition(job, STARTING, edr_source="new")
+        payload = transfer_request(job.agreement_id, job.asset_id, job.provider_endpoint, self.callback_url)
+        response = await self.client.start_transfer(payload)
+        if response.status_code not in [200, 201]:
+            self._transition(job, FAILED, status_code=response.status_code,
+                             error=f"Failed to start transfer: HTTP {response.status_code} {response.text}")
+            return None
+
+        # ---- EDR 取得 ----
+        self._transition(job, WAITING_EDR, transfer_id=response.json().get("@id"))
+        outcome = await wait_for_edr(self.client, job.transfer_id, timeout=EDR_TIMEOUT, callback_url=self.callback_url)
+        edr = outcome["edr"]
+        if not edr or not edr.get("endpoint") or not edr.get("authorization"):
+            reason = f"transfer {outcome['state']}" if outcome["state"] else f"timed out after {EDR_TIMEOUT:g}s"
+            self._transition(job, FAILED, error=f"EDRを取得できませんでした（{reason}）")
+            return None
+        self.edr_cache.put(job.agreement_id, job.asset_id, job.transfer_id, edr)
+        return edr
+
+    async def _fetch(self, job: TransferJob, edr: Dict[str, Any], final: bool) -> bool:
+        """Stream the data to a file; False (without failing the job) when a reused token is rejected"""
+        # ---- データフェッチ ----
+        endpoint = resolve_edr_endpoint(edr["endpoint"])
+        if job.state != FETCHING:
+            self._transition(job, FETCHING, endpoint=endpoint)
+        else:
+            self._progress(job, endpoint=endpoint)
+        # 全体をメモリに載せず、チャンク単位でファイルへ書き出す（プレビュー用に先頭だけ保持）
+        async with self.client.stream_data(endpoint, edr["authorization"], timeout=DATA_FETCH_TIMEOUT) as data_response:
+            if data_response.status_code in (401, 403) and not final:
+                return False
+            if data_response.status_code != 200:
+                self._transition(job, FAILED, status_code=data_response.status_code,
+                                 error=f"Failed to fetch data: HTTP {data_response.status_code}")
+                return True
+            
+            content_length = data_response.headers.get("content-length")
+            content_type = data_response.headers.get("content-type", "")
+            file_path = os.path.join(TRANSFER_DIR, _transfer_filename(job.job_id, job.asset_id, content_type))
+            self._progress(job, file_path=file_path, bytes_total=int(content_length) if content_length else None)
+            
+            head = bytearray()
+            received = 0
+            # ディスクへの書き込みはスレッドで行い、共有のイベントループ（他のジョブ・ポーリング）を止めない
+            await asyncio.to_thread(os.makedirs, TRANSFER_DIR, exist_ok=True)
+            f = await asyncio.to_thread(open, file_path, "wb")
+            try:
+                async for chunk in data_response.aiter_bytes(TRANSFER_CHUNK_SIZE):
+                    await asyncio.to_thread(f.write, chunk)
+                    received += len(chunk)
+                    if len(head) < TRANSFER_PREVIEW_BYTES:
+                        head.extend(chunk[:TRANSFER_PREVIEW_BYTES - len(head)])
+                    self._progress(job, bytes_received=received)
+            finally:
+                await asyncio.to_thread(f.close)
+        
+        result = preview_records(bytes(head), complete=received <= TRANSFER_PREVIEW_BYTES)
+        result["content_type"] = content_type
+        self._transition(job, COMPLETED, status_code=200, result=result)
+        return True
+
+
+class NegotiationBatch:
+    """State of one batch of negotiations"""
+
+    def __init__(self, requests: List[Dict[str, Any]], concurrency: int):
+        self.batch_id = uuid.uuid4().hex[:12]
+        self.concurrency = concurrency
+        self.entries = [{
+            "offer_id": request["offer_id"],
+            "dataset_id": request.get("dataset_id"),
+            "provider": request.get("provider"),
+            "dsp_endpoint": request["payload"].get("counterPartyAddress"),
+            "state": QUEUED,
+            "negotiation_id": None,
+            "agreement_id": None,
+            "detected_via": None,
+            "error": None,
+            "elapsed": None,
+        } for request in requests]
+        self.payloads = [request["payload"] for request in requests]
+        self.started_at = time.time()
+        self.finished_at: Optional[float] = None
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "batch_id": self.batch_id,
+            "concurrency": self.concurrency,
+            "entries": [dict(entry) for entry in self.entries],
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "wall_time": (self.finished_at or time.time()) - self.started_at,
+        }
+
+
+class BatchNegotiator:
+    """Negotiates many offers concurrently with a cap on in-flight negotiations"""
+
+    def __init__(self, runner: AsyncRunner, client: AsyncEdcClient, callback_url: Optional[str] = None,
+                 timeout: float = 60):
+        self.runner = runner
+        self.client = client
+        self.callback_url = callback_url
+        self.timeout = timeout
+        self._batches: Dict[str, NegotiationBatch] = {}
+        self._lock = threading.Lock()
+
+    def submit(self, requests: List[Dict[str, Any]], concurrency: int) -> str:
+        """Start a batch; each request is {"offer_id", "dataset_id", "provider", "payload"}"""
+        batch = NegotiationBatch(requests, max(1, concurrency))
+        with self._lock:
+            self._prune()
+            self._batches[batch.batch_id] = batch
+        self.runner.submit(self._run(batch), job="Negotiation batch")
+        return batch.batch_id
+
+    def get(self, batch_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            batch = self._batches.get(batch_id)
+            return batch.snapshot() if batch else None
+
+    def _prune(self):
+        expire_before = time.time() - TRANSFER_JOB_RETENTION
+        for batch_id in [i for i, b in self._batches.items() if b.finished_at and b.finished_at < expire_before]:
+            del self._batches[batch_id]
+
+    def _update(self, entry: Dict[str, Any], **fields):
+        with self._lock:
+            entry.update(fields)
+
+    async def _run(self, batch: NegotiationBatch):
+        semaphore = asyncio.Semaphore(batch.concurrency)
+        await asyncio.gather(*(
+            self._negotiate(entry, payload, semaphore) for entry, payload in zip(batch.entries, batch.payloads)
+        ))
+        with self._lock:
+            batch.finished_at = time.time()
+
+    async def _negotiate(self, entry: Dict[str, Any], payload: Dict[str, Any], semaphore: asyncio.Semaphore):
+        async with semaphore:
+            started = time.perf_counter()
+            try:
+                self._update(entry, state=REQUESTING)
+                response = await self.client.start_negotiation(payload)
+                if response.status_code not in [200, 201]:
+                    self._update(entry, state=FAILED, error=f"HTTP {response.status_code} {response.text}",
+                                 elapsed=time.perf_counter() - started)
+                    return
+                
+                self._update(entry, state=NEGOTIATING, negotiation_id=response.json().get("@id"))
+                outcome = await wait_for_negotiation(
+                    self.client, entry["negotiation_id"], timeout=self.timeout, callback_url=self.callback_url
+                )
+                self._update(
+                    entry,
+                    state=outcome["state"] or TIMED_OUT,
+                    agreement_id=outcome["agreement_id"],
+                    detected_via=outcome["source"],
+                    error=outcome.get("error_detail"),
+                    elapsed=time.perf_counter() - started,
+                )
+            except Exception as e:
+                self._update(entry, state=FAILED, error=str(e) or type(e).__name__,
+                             elapsed=time.perf_counter() - started)
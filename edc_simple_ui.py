@@ -7,25 +7,94 @@ This application provides a simple interface for EDC operations:
 - Create Asset
 - Create Policy  
 - Create Contract Offer
+- Sync Data Server Files
 - Fetch Catalog
 - Data Transfer
 """
 
 import streamlit as st
-import requests
 import json
 import time
 import os
-from typing import Dict, Any, Optional
+import asyncio
+import concurrent.futures
+import hashlib
+import threading
+from array import array
+from collections import ChainMap, deque
+from typing import Dict, Any, List, Optional, Hashable
+
+import orjson
+
+from edc_client import (
+    EdcClient, AsyncEdcClient, AsyncRunner, EDC_MANAGEMENT,
+    as_list, catalog_request, contract_request, dsp_endpoint, fetch_catalog_bounded, id_contains, query_spec,
+    wait_for_negotiation,
+)
+from edc_jobs import (
+    BatchNegotiator, TransferOrchestrator, TRANSFER_STEPS, FINISHED_STATES, NEGOTIATION_FINISHED_STATES,
+    QUEUED, STARTING, WAITING_EDR, FETCHING, COMPLETED, FAILED, FINALIZED, STATIC_DIR,
+)
+from policy_engine import PARTICIPANT_ID_OPERAND, evaluate_policy
+from tracing import current_span, detached, export_traces, span, summarize
+from resilience import CLOSED, OPEN, breaker_states, deadline
+from asset_sync import AssetSyncer, SYNC_CONCURRENCY, APPLYING, ASSET, CONTRACT_DEFINITION, CREATE, UPDATE, DELETE
 
 # EDC endpoints (Single connector for both provider and consumer operations)
-EDC_MANAGEMENT = "http://edc-connector:19193"
 EDC_PROTOCOL = "http://edc-connector:19194/protocol"
 
 # Environment variables
 PARTICIPANT_ID = os.getenv("PARTICIPANT_ID", "sample-participant-1.handson.dataspace.internal")
 PARTICIPANT_FQDN = os.getenv("PARTICIPANT_FQDN", "sample-participant-1.handson.dataspace.internal")
 
+# Seconds an asset/policy/contract definition listing is reused across reruns
+LISTING_CACHE_TTL = float(os.getenv("LISTING_CACHE_TTL", "30"))
+LISTING_PAGE_SIZE = int(os.getenv("LISTING_PAGE_SIZE", "50"))
+
+# Data server API (its file registry is published by the asset sync)
+DATA_API_URL = os.getenv("DATA_API_URL", "http://data-api:8000")
+
+# Background service health probes
+DATA_API_HEALTH_URL = os.getenv("DATA_API_HEALTH_URL", "http://data-api:8000/health")
+HEALTH_REFRESH_INTERVAL = float(os.getenv("HEALTH_REFRESH_INTERVAL", "5"))
+HEALTH_PROBE_TIMEOUT = float(os.getenv("HEALTH_PROBE_TIMEOUT", "2"))
+
+# Multi-provider catalog fetching: max concurrent requests and per-provider timeout (seconds)
+CATALOG_CONCURRENCY = int(os.getenv("CATALOG_CONCURRENCY", "8"))
+CATALOG_TIMEOUT = float(os.getenv("CATALOG_TIMEOUT", "30"))
+
+# Callback receiver on the data server that EDC notifies about negotiation/transfer
+# state changes (empty disables callbacks; polling is then the only completion signal)
+EDC_CALLBACK_URL = os.getenv("EDC_CALLBACK_URL", "http://data-api:8000/callbacks")
+NEGOTIATION_TIMEOUT = float(os.getenv("NEGOTIATION_TIMEOUT", "60"))
+# Refresh interval (seconds) of the transfer / batch progress views while jobs are running
+TRANSFER_REFRESH_INTERVAL = float(os.getenv("TRANSFER_REFRESH_INTERVAL", "1"))
+# Default number of negotiations in flight for batch negotiation
+BATCH_NEGOTIATION_CONCURRENCY = int(os.getenv("BATCH_NEGOTIATION_CONCURRENCY", "8"))
+
+# Time budget (seconds) for the connector calls of one user action (script run);
+# calls get at most what is left of it and are not retried past it
+ACTION_DEADLINE = float(os.getenv("ACTION_DEADLINE", "90"))
+
+# Traces (one per script run / user action) kept per session for the debug sidebar
+TRACE_HISTORY = int(os.getenv("TRACE_HISTORY", "20"))
+
+# Persistent per-provider catalog cache: fresh for CATALOG_CACHE_TTL seconds, then served
+# while a background refresh runs, up to CATALOG_CACHE_MAX_STALE seconds old
+CATALOG_CACHE_DIR = os.getenv("CATALOG_CACHE_DIR", os.path.expanduser("~/.cache/edc-simple-ui/catalogs"))
+CATALOG_CACHE_TTL = float(os.getenv("CATALOG_CACHE_TTL", "300"))
+CATALOG_CACHE_MAX_STALE = float(os.getenv("CATALOG_CACHE_MAX_STALE", "86400"))
+
+# Rows per page of the fetched catalog table, and its sortable columns
+CATALOG_PAGE_SIZE = int(os.getenv("CATALOG_PAGE_SIZE", "50"))
+CATALOG_SORT_COLUMNS = {"Dataset": "dataset_id", "Provider": "provider_fqdn", "Offer ID": "offer_id", "Keywords": "keywords"}
+
+# Evaluated catalogs shared by all sessions: entries no session has read for
+# OFFER_STORE_IDLE_TTL seconds are evicted, and a session keeps references to
+# at most CATALOG_SESSION_PROVIDERS providers (least recently fetched dropped first)
+OFFER_STORE_IDLE_TTL = float(os.getenv("OFFER_STORE_IDLE_TTL", "3600"))
+CATALOG_SESSION_PROVIDERS = int(os.getenv("CATALOG_SESSION_PROVIDERS", "20"))
+
 def init_page():
     """Initialize Streamlit page configuration"""
     st.set_page_config(
@@ -52,68 +121,322 @@ def init_page():
     
     st.markdown("---")
 
-def get_assets():
-    """Get list of assets"""
-    try:
-        response = requests.post(
-            f"{EDC_MANAGEMENT}/management/v3/assets/request",
-            headers={
-                "Content-Type": "application/json",
-                "X-API-Key": "password"
-            },
-            json={
-                "@context": {"@vocab": "https://w3id.org/edc/v0.0.1/ns/"},
-                "@type": "QuerySpec"
-            },
-            timeout=10
-        )
-        if response.status_code == 200:
-            return response.json()
-        return []
-    except Exception:
-        return []
-
-def get_policies():
-    """Get list of policies"""
-    try:
-        response = requests.post(
-            f"{EDC_MANAGEMENT}/management/v3/policydefinitions/request",
-            headers={
-                "Content-Type": "application/json",
-                "X-API-Key": "password"
-            },
-            json={
-                "@context": {"@vocab": "https://w3id.org/edc/v0.0.1/ns/"},
-                "@type": "QuerySpec"
-            },
-            timeout=10
+def trace_action(name: str):
+    """Name the current script run's trace after the user action that triggered it"""
+    current = current_span()
+    if current is not None:
+        current.root.name = name
+        current.root.set(action=True)
+
+def render_traces():
+    """Recent traces of this session (debug sidebar) with a JSON export"""
+    # 実行中で通信のまだない今回の描画は表示しない
+    traces = [root for root in st.session_state.get("traces", []) if root.children or root.duration is not None]
+    with st.sidebar:
+        st.subheader("🧭 Traces")
+        st.caption("操作ごとの通信時間の内訳（connector: 管理API、provider: リモートコネクター、data-plane: データ取得、UI: 描画・処理）")
+        for root in reversed(traces):
+            summary = summarize(root)
+            running = " (running)" if root.duration is None else ""
+            with st.expander(f"{root.name} — {summary['duration'] * 1000:.0f} ms, {summary['calls']} call(s){running}"):
+                parts = [f"{kind}: {elapsed * 1000:.0f} ms" for kind, elapsed in summary["by_kind"].items()]
+                parts.append(f"UI: {summary['self_time'] * 1000:.0f} ms")
+                if summary["dropped_spans"]:
+                    parts.append(f"{summary['dropped_spans']} more span(s) not recorded")
+                st.caption(" · ".join(parts))
+                rows = [{
+                    "Span": "  " * (depth - 1) + s.name,
+                    "Kind": s.kind,
+                    "Status": s.attributes.get("status"),
+                    "Bytes": s.attributes.get("bytes"),
+                    "Retries": s.attributes.get("retries"),
+                    "Start (ms)": round((s.start - root.start) * 1000, 1),
+                    "Duration (ms)": round(s.elapsed() * 1000, 1),
+                    "Error": s.error,
+                } for depth, s in root.walk() if s is not root]
+                if rows:
+                    st.dataframe(rows, width="stretch", hide_index=True)
+        st.download_button(
+            "⬇️ Export traces (JSON)",
+            data=lambda: json.dumps(export_traces(traces), ensure_ascii=False, indent=2),
+            file_name="edc-traces.json",
+            mime="application/json",
+            key="export_traces"
         )
-        if response.status_code == 200:
-            return response.json()
-        return []
-    except Exception:
-        return []
-
-def get_contract_definitions():
-    """Get list of contract definitions"""
-    try:
-        response = requests.post(
-            f"{EDC_MANAGEMENT}/management/v3/contractdefinitions/request",
-            headers={
-                "Content-Type": "application/json",
-                "X-API-Key": "password"
-            },
-            json={
-                "@context": {"@vocab": "https://w3id.org/edc/v0.0.1/ns/"},
-                "@type": "QuerySpec"
-            },
-            timeout=10
+
+def render_breakers():
+    """Circuit breaker states and retry counters per endpoint (debug sidebar)"""
+    states = breaker_states()
+    with st.sidebar:
+        st.subheader("🛡️ Circuit Breakers")
+        if not states:
+            st.caption("No calls yet")
+            return
+        st.dataframe([{
+            "Endpoint": b["endpoint"],
+            "State": b["state"],
+            "Failures in a row": b["consecutive_failures"],
+            "Calls": b["calls"],
+            "Retries": b["retries"],
+            "Failures": b["failures"],
+            "Rejected": b["rejected"],
+            "Opened": b["opened"],
+            "Retry in (s)": round(b["retry_in"], 1) if b["retry_in"] is not None else None,
+        } for b in states], width="stretch", hide_index=True)
+
+def render_open_breakers():
+    """Warn about endpoints whose calls currently fail fast"""
+    for b in breaker_states():
+        if b["state"] == OPEN:
+            st.warning(f"⚡ `{b['endpoint']}` failed {b['consecutive_failures']} time(s) in a row; "
+                       f"requests to it fail immediately for the next {b['retry_in']:.0f}s")
+        elif b["state"] != CLOSED:
+            st.info(f"⚡ `{b['endpoint']}` is recovering; testing it with a single request")
+
+@st.cache_resource
+def get_edc_client() -> EdcClient:
+    """Shared connection-pooled EDC client (one per Streamlit server process)"""
+    return EdcClient()
+
+@st.cache_resource
+def get_async_runner() -> AsyncRunner:
+    """Background event loop shared by all sessions"""
+    return AsyncRunner()
+
+@st.cache_resource
+def get_async_edc_client() -> AsyncEdcClient:
+    """Async EDC client; only used from coroutines running on get_async_runner()"""
+    return AsyncEdcClient()
+
+class ListingCache:
+    """Thread-safe TTL cache for connector listings, shared by all sessions
+
+    Keys are tuples whose first element is the listing kind ("assets",
+    "policies", "contract_definitions") so a successful create can drop
+    every cached page of that kind at once.
+    """
+
+    def __init__(self, ttl: float):
+        self.ttl = ttl
+        self._entries: Dict[tuple, tuple] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: tuple):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            stored_at, value = entry
+            if time.monotonic() - stored_at > self.ttl:
+                del self._entries[key]
+                return None
+            return value
+
+    def put(self, key: tuple, value):
+        with self._lock:
+            self._entries[key] = (time.monotonic(), value)
+
+    def invalidate(self, kind: Hashable):
+        with self._lock:
+            for key in [k for k in self._entries if k[0] == kind]:
+                del self._entries[key]
+
+@st.cache_resource
+def get_listing_cache() -> ListingCache:
+    """Listing cache shared across sessions of this Streamlit server process"""
+    return ListingCache(LISTING_CACHE_TTL)
+
+def invalidate_listings(kind: str):
+    """Drop cached listings after the UI changed them on the connector"""
+    get_listing_cache().invalidate(kind)
+
+class HealthMonitor:
+    """Probes the connector and data API concurrently in the background
+
+    A coroutine on the shared event loop refreshes the status every
+    HEALTH_REFRESH_INTERVAL seconds; page renders only read the latest
+    snapshot and never wait for a probe.
+    """
+
+    def __init__(self, runner: AsyncRunner, client: AsyncEdcClient,
+                 interval: float = HEALTH_REFRESH_INTERVAL, timeout: float = HEALTH_PROBE_TIMEOUT):
+        self.client = client
+        self.interval = interval
+        self.timeout = timeout
+        self._status: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+        # 最初に表示したページのトレースにプローブが溜まり続けないよう切り離して起動
+        with detached():
+            runner.submit(self._refresh_forever())
+
+    async def _probe_edc(self) -> bool:
+        response = await self.client.get("/management/v3/assets", timeout=self.timeout)
+        return response.status_code in [200, 405]  # 405は正常（GETメソッドが許可されていない）
+
+    async def _probe_data_api(self) -> bool:
+        response = await self.client.probe(DATA_API_HEALTH_URL, timeout=self.timeout)
+        return response.status_code == 200
+
+    async def refresh(self):
+        names = ["edc", "data_api"]
+        results = await asyncio.gather(self._probe_edc(), self._probe_data_api(), return_exceptions=True)
+        checked_at = time.time()
+        with self._lock:
+            for name, result in zip(names, results):
+                self._status[name] = {"online": result is True, "checked_at": checked_at}
+
+    async def _refresh_forever(self):
+        while True:
+            try:
+                await self.refresh()
+            except Exception:
+                pass
+            await asyncio.sleep(self.interval)
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        """Latest status per service ({} until the first probe has finished)"""
+        with self._lock:
+            return {name: dict(status) for name, status in self._status.items()}
+
+@st.cache_resource
+def get_transfer_orchestrator() -> TransferOrchestrator:
+    """Background transfer jobs shared by all sessions"""
+    return TransferOrchestrator(get_async_runner(), get_async_edc_client(), EDC_CALLBACK_URL)
+
+@st.cache_resource
+def get_batch_negotiator() -> BatchNegotiator:
+    """Background negotiation batches shared by all sessions"""
+    return BatchNegotiator(get_async_runner(), get_async_edc_client(), EDC_CALLBACK_URL, NEGOTIATION_TIMEOUT)
+
+@st.cache_resource
+def get_asset_syncer() -> AssetSyncer:
+    """Data server -> connector syncs shared by all sessions"""
+    return AssetSyncer(get_async_runner(), get_async_edc_client(), DATA_API_URL, f"http://{PARTICIPANT_FQDN}:8000")
+
+@st.cache_resource
+def get_health_monitor() -> HealthMonitor:
+    """Health monitor shared by all sessions"""
+    return HealthMonitor(get_async_runner(), get_async_edc_client())
+
+def render_service_status(label: str, status: Optional[Dict[str, Any]]):
+    """Render one service status from the cached health snapshot"""
+    if status is None:
+        st.info(f"⏳ **{label}:** Checking...")
+        return
+    age = time.time() - status["checked_at"]
+    stale = f" (checked {age:.0f}s ago)" if age > 3 * HEALTH_REFRESH_INTERVAL else ""
+    if status["online"]:
+        st.success(f"🟢 **{label}:** Online{stale}")
+    else:
+        st.error(f"🔴 **{label}:** Offline{stale}")
+
+def _listing_key(kind: str, page: int, search: str) -> tuple:
+    return (kind, page, LISTING_PAGE_SIZE, search)
+
+def fetch_listing_pages(pages):
+    """Return listing pages for (kind, page, search) tuples, fetching uncached ones concurrently
+
+    Each page is a QuerySpec with offset/limit, sorted by id and filtered
+    server-side when search is set, so the connector never has to return
+    its whole inventory. Only successful responses are cached.
+    """
+    cache = get_listing_cache()
+    results = {}
+    missing = []
+    for page in pages:
+        cached = cache.get(_listing_key(*page))
+        if cached is not None:
+            results[page] = cached
+        else:
+            missing.append(page)
+    
+    if missing:
+        client = get_async_edc_client()
+        queries = {
+            "assets": client.query_assets,
+            "policies": client.query_policies,
+            "contract_definitions": client.query_contract_definitions,
+        }
+        specs = [
+            query_spec(
+                offset=page * LISTING_PAGE_SIZE,
+                limit=LISTING_PAGE_SIZE,
+                filter_expression=id_contains(search) if search else None,
+                sort_field="id",
+            )
+            for _, page, search in missing
+        ]
+        responses = get_async_runner().gather(
+            *(queries[kind](spec) for (kind, _, _), spec in zip(missing, specs)), return_exceptions=True
         )
-        if response.status_code == 200:
-            return response.json()
-        return []
-    except Exception:
-        return []
+        for page, response in zip(missing, responses):
+            if not isinstance(response, Exception) and response.status_code == 200:
+                results[page] = response.json()
+                cache.put(_listing_key(*page), results[page])
+            else:
+                results[page] = []
+    
+    return [results[page] for page in pages]
+
+def _listing_pages(kind: str):
+    """Pages of a listing currently loaded in this session, with its search term"""
+    search = st.session_state.get(f"{kind}_search", "").strip()
+    return [(kind, page, search) for page in range(st.session_state.get(f"{kind}_pages", 1))]
+
+def prefetch_listings(*kinds: str):
+    """Fetch uncached listing pages concurrently so a page waits only for the slowest one
+
+    The selectors' first page without a search term is included as well.
+    """
+    pages = [page for kind in kinds for page in _listing_pages(kind)]
+    pages += [(kind, 0, "") for kind in kinds if (kind, 0, "") not in pages]
+    fetch_listing_pages(pages)
+
+def load_listing(kind: str):
+    """Items of every loaded page of a listing, and whether more pages may exist"""
+    pages = fetch_listing_pages(_listing_pages(kind))
+    items = [item for page in pages for item in page]
+    return items, len(pages[-1]) >= LISTING_PAGE_SIZE
+
+def _reset_listing_pages(kind: str):
+    st.session_state[f"{kind}_pages"] = 1
+
+def _load_more(kind: str):
+    st.session_state[f"{kind}_pages"] = st.session_state.get(f"{kind}_pages", 1) + 1
+
+def listing_search(kind: str):
+    """Search box mapped to a server-side id filter; a new term restarts from the first page"""
+    st.text_input("🔍 Search by ID", key=f"{kind}_search", placeholder="IDの一部を入力",
+                  on_change=_reset_listing_pages, args=(kind,))
+
+def listing_load_more(kind: str, has_more: bool):
+    if has_more:
+        st.button("Load more", key=f"{kind}_load_more", on_click=_load_more, args=(kind,))
+
+def search_ids(kind: str, key: str, label: str, default: str):
+    """Ids for a selectbox, matched server-side by the term in its own search box
+
+    Any item can be picked however large the inventory is: the first page of
+    matches is offered, and a term without matches is used as the id itself.
+    """
+    term = st.text_input(f"🔍 Search {label} by ID", key=f"{key}_search", placeholder="IDの一部を入力").strip()
+    items = fetch_listing_pages([(kind, 0, term)])[0]
+    if len(items) >= LISTING_PAGE_SIZE:
+        st.caption(f"Showing the first {LISTING_PAGE_SIZE} matches; type part of an ID to narrow them down")
+    ids = [item.get('@id', '') for item in items]
+    return ids or [term or default]
+
+def get_assets(page: int = 0, search: str = ""):
+    """Get one page of assets"""
+    return fetch_listing_pages([("assets", page, search)])[0]
+
+def get_policies(page: int = 0, search: str = ""):
+    """Get one page of policies"""
+    return fetch_listing_pages([("policies", page, search)])[0]
+
+def get_contract_definitions(page: int = 0, search: str = ""):
+    """Get one page of contract definitions"""
+    return fetch_listing_pages([("contract_definitions", page, search)])[0]
 
 def create_asset():
     """Create Asset section"""
@@ -133,6 +456,7 @@ def create_asset():
     data_url = st.text_input("Data URL", value=f"http://{PARTICIPANT_FQDN}:8000/files/list", key="data_url")
     
     if st.button("Create Asset", type="primary"):
+            trace_action("Create asset")
             payload = {
                 "@context": {
                     "@vocab": "https://w3id.org/edc/v0.0.1/ns/"
@@ -151,17 +475,10 @@ def create_asset():
             }
             
             try:
-                response = requests.post(
-                    f"{EDC_MANAGEMENT}/management/v3/assets",
-                    headers={
-                        "Content-Type": "application/json",
-                        "X-API-Key": "password"
-                    },
-                    json=payload,
-                    timeout=10
-                )
+                response = get_edc_client().create_asset(payload)
                 
                 if response.status_code in [200, 201]:
+                    invalidate_listings("assets")
                     st.success("✅ Asset created successfully!")
                     if st.session_state.debug_mode:
                         st.info("🔧 Debug - Payload sent:")
@@ -190,11 +507,13 @@ def create_asset():
     # Current Assets section
     st.markdown("---")
     st.subheader("📋 Current Assets")
-    assets = get_assets()
+    listing_search("assets")
+    assets, has_more = load_listing("assets")
     if assets:
         for asset in assets:
             asset_info = asset.get('properties', {})
             st.write(f"**{asset.get('@id', 'N/A')}** - {asset_info.get('name', 'No name')}")
+        listing_load_more("assets", has_more)
     else:
         st.info("No assets found")
 
@@ -220,6 +539,7 @@ def create_policy():
                                          key="allowed_participant_id")
     
     if st.button("Create Policy", type="primary"):
+            trace_action("Create policy")
             # Build policy permissions based on constraints
             permissions = []
             
@@ -259,17 +579,10 @@ def create_policy():
             }
             
             try:
-                response = requests.post(
-                    f"{EDC_MANAGEMENT}/management/v3/policydefinitions",
-                    headers={
-                        "Content-Type": "application/json",
-                        "X-API-Key": "password"
-                    },
-                    json=payload,
-                    timeout=10
-                )
+                response = get_edc_client().create_policy(payload)
                 
                 if response.status_code in [200, 201]:
+                    invalidate_listings("policies")
                     st.success("✅ Policy created successfully!")
                     if st.session_state.debug_mode:
                         st.info("🔧 Debug - Policy payload:")
@@ -298,7 +611,8 @@ def create_policy():
     # Current Policies section
     st.markdown("---")
     st.subheader("📋 Current Policies")
-    policies = get_policies()
+    listing_search("policies")
+    policies, has_more = load_listing("policies")
     if policies:
         for policy in policies:
             policy_name = policy.get('@id', 'N/A')
@@ -311,6 +625,7 @@ def create_policy():
             )
             constraint_info = " 🔒 (Participant restricted)" if has_constraint else ""
             st.write(f"**{policy_name}**{constraint_info}")
+        listing_load_more("policies", has_more)
     else:
         st.info("No policies found")
     
@@ -319,6 +634,84 @@ def create_policy():
     st.write("- **Allow All**: No restrictions")  
     st.write("- **Participant Restricted** 🔒: Only specific participant can access")
 
+def render_asset_sync():
+    """Progress / outcome of this session's data server sync"""
+    run = get_asset_syncer().get(st.session_state.get("asset_sync_run"))
+    if run is None:
+        return
+    finished = run["finished_at"] is not None
+    
+    col1, col2, col3, col4 = st.columns(4)
+    col1.metric("Files", run["files"])
+    col2.metric("Changes", run["total"])
+    col3.metric("Failed", run["failed"])
+    col4.metric("Wall time", f"{run['wall_time']:.2f}s")
+    if run["state"] == APPLYING and run["total"]:
+        processed = run["done"] + run["failed"] + run["skipped"]
+        st.progress(processed / run["total"], text=f"{processed} / {run['total']}")
+    
+    if run["summary"]:
+        st.dataframe(
+            [{
+                "Kind": label,
+                "Create": run["summary"][kind][CREATE],
+                "Update": run["summary"][kind][UPDATE],
+                "Delete": run["summary"][kind][DELETE],
+            } for kind, label in ((ASSET, "Assets"), (CONTRACT_DEFINITION, "Contract definitions"))],
+            width="stretch",
+            hide_index=True
+        )
+    
+    if run["error"]:
+        st.error(f"❌ Sync failed: {run['error']}")
+    elif finished and not run["total"]:
+        st.success("✅ Everything is already in sync")
+    elif finished and run["dry_run"]:
+        st.info(f"🔍 Preview: {run['total']} change(s) would be applied (planned in {run['plan_time']:.2f}s)")
+    elif finished and not run["failed"]:
+        rate = f", {run['throughput']:.0f} ops/s" if run["throughput"] else ""
+        st.success(f"✅ Sync completed: {run['done']} change(s) applied{rate}")
+    if run["errors"]:
+        skipped = f", {run['skipped']} skipped" if run["skipped"] else ""
+        st.warning(f"⚠️ {run['failed']} change(s) failed{skipped}")
+        st.dataframe(run["errors"], width="stretch", hide_index=True)
+    
+    # 完了時に一覧キャッシュを破棄し、アプリ全体を再実行して自動更新を止める
+    if finished and st.session_state.get("asset_sync_active"):
+        invalidate_listings("assets")
+        invalidate_listings("contract_definitions")
+        st.session_state["asset_sync_active"] = False
+        st.rerun()
+
+def sync_data_server_assets():
+    """Publish every data server file as an asset + contract definition"""
+    st.header("🔄 Sync Data Server Files")
+    st.markdown("""
+    この工程では、 データサーバーに保存されたすべてのファイルを、アセットとコントラクト定義としてまとめて公開します。
+    現在の登録内容との差分だけを作成・更新・削除するため、何度実行しても変更がなければ何も起きません。
+    """)
+    
+    policy_ids = search_ids("policies", "sync_policy", "policies", "allow-all-policy")
+    col1, col2, col3 = st.columns(3)
+    access_policy = col1.selectbox("Access Policy", policy_ids, key="sync_access_policy")
+    contract_policy = col2.selectbox("Contract Policy", policy_ids, key="sync_contract_policy")
+    concurrency = col3.number_input("Max parallel requests", min_value=1, max_value=64,
+                                    value=SYNC_CONCURRENCY, key="sync_concurrency")
+    
+    col1, col2 = st.columns(2)
+    preview = col1.button("Preview changes", key="sync_preview")
+    apply = col2.button("Sync now", type="primary", key="sync_apply")
+    if preview or apply:
+        trace_action("Preview sync" if preview else "Sync data server files")
+        st.session_state["asset_sync_run"] = get_asset_syncer().submit(
+            access_policy, contract_policy, int(concurrency), dry_run=preview
+        )
+        st.session_state["asset_sync_active"] = True
+    
+    if st.session_state.get("asset_sync_run"):
+        refresh = TRANSFER_REFRESH_INTERVAL if st.session_state.get("asset_sync_active") else None
+        st.fragment(render_asset_sync, run_every=refresh)()
+
 def create_contract_offer():
     """Create Contract Offer section"""
     st.header("📄 Create Contract Offer")
@@ -331,18 +724,15 @@ def create_contract_offer():
     st.subheader("Create New Contract Definition")
     contract_id = st.text_input("Contract Definition ID", value="contract-def-1", key="contract_id")
     
-    # Get available assets and policies for dropdowns
-    assets = get_assets()
-    policies = get_policies()
-    
-    asset_ids = [asset.get('@id', '') for asset in assets] if assets else ['sample-asset-1']
-    policy_ids = [policy.get('@id', '') for policy in policies] if policies else ['allow-all-policy']
-    
+    # Assets and policies for dropdowns (searched server-side, independent of the listings above)
+    asset_ids = search_ids("assets", "selected_asset", "assets", "sample-asset-1")
     selected_asset = st.selectbox("Select Asset", asset_ids, key="selected_asset")
+    policy_ids = search_ids("policies", "contract_offer_policy", "policies", "allow-all-policy")
     access_policy = st.selectbox("Access Policy", policy_ids, key="access_policy")
     contract_policy = st.selectbox("Contract Policy", policy_ids, key="contract_policy")
     
     if st.button("Create Contract Definition", type="primary"):
+            trace_action("Create contract definition")
             payload = {
                 "@context": {
                     "@vocab": "https://w3id.org/edc/v0.0.1/ns/"
@@ -362,17 +752,10 @@ def create_contract_offer():
             }
             
             try:
-                response = requests.post(
-                    f"{EDC_MANAGEMENT}/management/v3/contractdefinitions",
-                    headers={
-                        "Content-Type": "application/json",
-                        "X-API-Key": "password"
-                    },
-                    json=payload,
-                    timeout=10
-                )
+                response = get_edc_client().create_contract_definition(payload)
                 
                 if response.status_code in [200, 201]:
+                    invalidate_listings("contract_definitions")
                     st.success("✅ Contract definition created successfully!")
                     if st.session_state.debug_mode:
                         st.info("🔧 Debug - Contract Definition payload:")
@@ -402,9 +785,11 @@ def create_contract_offer():
     st.markdown("---")
     st.subheader("📋 Current Contract Definitions (Offers)")
     
-    contract_definitions = get_contract_definitions()
+    listing_search("contract_definitions")
+    contract_definitions, has_more = load_listing("contract_definitions")
     if contract_definitions:
-        st.info(f"✅ Found {len(contract_definitions)} contract definition(s)")
+        more_note = " (more available)" if has_more else ""
+        st.info(f"✅ Showing {len(contract_definitions)} contract definition(s){more_note}")
         
         for idx, contract_def in enumerate(contract_definitions):
             contract_id = contract_def.get('@id', 'N/A')
@@ -434,6 +819,7 @@ def create_contract_offer():
                 
                 if st.session_state.debug_mode:
                     st.json(contract_def)
+        listing_load_more("contract_definitions", has_more)
     else:
         st.info("No contract definitions found")
     
@@ -456,77 +842,147 @@ def create_contract_offer():
             st.write(f"- {policy_id}")
 
 def evaluate_policy_for_participant(policy_obj, participant_id):
-    """Evaluate if a policy allows access for the given participant ID"""
+    """Evaluate if a policy allows access for the given participant ID
+
+    Policies are compiled once and memoized by policy_engine, so offers
+    that share a policy are not re-parsed on every render.
+    """
     if not policy_obj or not participant_id:
         return True, "No policy constraints"
+    return evaluate_policy(policy_obj, {PARTICIPANT_ID_OPERAND: participant_id})
+
+def parse_provider_list(text: str):
+    """Parse "FQDN" or "FQDN,Participant ID" lines (Participant ID defaults to the FQDN)"""
+    providers = []
+    seen = set()
+    for line in (text or "").splitlines():
+        line = line.strip()
+        if not line or line.startswith("#"):
+            continue
+        fqdn, _, participant_id = (part.strip() for part in line.partition(","))
+        if fqdn and fqdn not in seen:
+            seen.add(fqdn)
+            providers.append({"fqdn": fqdn, "participant_id": participant_id or fqdn})
+    return providers
+
+class CatalogCache:
+    """Per-provider catalog cache shared by all sessions and persisted to disk
+
+    Entries younger than the TTL are served as-is. Older entries (up to
+    max_stale) are still served, and a single background refresh per provider
+    is scheduled on the shared event loop. Only successful catalogs are stored.
+    """
+
+    def __init__(self, runner: AsyncRunner, client: AsyncEdcClient, cache_dir: str,
+                 ttl: float = CATALOG_CACHE_TTL, max_stale: float = CATALOG_CACHE_MAX_STALE):
+        self.runner = runner
+        self.client = client
+        self.cache_dir = cache_dir
+        self.ttl = ttl
+        self.max_stale = max_stale
+        self._entries: Dict[str, Dict[str, Any]] = {}
+        self._refreshing = set()
+        self._lock = threading.Lock()
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def _path(self, fqdn: str) -> str:
+        return os.path.join(self.cache_dir, hashlib.sha1(fqdn.encode()).hexdigest() + ".json")
+
+    def _load(self, fqdn: str) -> Optional[Dict[str, Any]]:
+        entry = self._entries.get(fqdn)
+        if entry is None:
+            try:
+                with open(self._path(fqdn), "r", encoding="utf-8") as f:
+                    entry = json.load(f)
+                self._entries[fqdn] = entry
+            except (OSError, ValueError):
+                return None
+        return entry
+
+    def get(self, fqdn: str) -> Optional[Dict[str, Any]]:
+        """Return {"catalog", "fetched_at", "age", "stale"} or None if nothing usable is cached"""
+        with self._lock:
+            entry = self._load(fqdn)
+        if entry is None:
+            return None
+        age = time.time() - entry["fetched_at"]
+        if age > self.max_stale:
+            return None
+        stale = age > self.ttl
+        if stale:
+            self.refresh_in_background(fqdn)
+        return {"catalog": entry["catalog"], "fetched_at": entry["fetched_at"], "age": age, "stale": stale}
+
+    def put(self, fqdn: str, catalog: Dict[str, Any]):
+        entry = {"provider": fqdn, "fetched_at": time.time(), "catalog": catalog}
+        with self._lock:
+            self._entries[fqdn] = entry
+        tmp_path = self._path(fqdn) + ".tmp"
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(entry, f, ensure_ascii=False)
+            os.replace(tmp_path, self._path(fqdn))
+        except OSError:
+            pass
+
+    def refresh_in_background(self, fqdn: str):
+        """Schedule one refresh per provider; later calls are no-ops until it finishes"""
+        with self._lock:
+            if fqdn in self._refreshing:
+                return
+            self._refreshing.add(fqdn)
+        self.runner.submit(self._refresh(fqdn), job="Refresh catalog")
+
+    async def _refresh(self, fqdn: str):
+        try:
+            result = await fetch_catalog_bounded(
+                self.client, dsp_endpoint(fqdn), asyncio.Semaphore(1), CATALOG_TIMEOUT
+            )
+            if result["ok"]:
+                self.put(fqdn, result["catalog"])
+        finally:
+            with self._lock:
+                self._refreshing.discard(fqdn)
+
+@st.cache_resource
+def get_catalog_cache() -> CatalogCache:
+    """Catalog cache shared across sessions of this Streamlit server process"""
+    return CatalogCache(get_async_runner(), get_async_edc_client(), CATALOG_CACHE_DIR)
+
+def fetch_catalogs_streaming(providers, on_result, force_refresh: bool = False):
+    """Fetch all providers' catalogs concurrently and call on_result as each one answers
+
+    Cached catalogs are reported immediately unless force_refresh is set.
+    Concurrency is capped at CATALOG_CONCURRENCY and every provider gets its own
+    CATALOG_TIMEOUT. Returns {fqdn: result} once all providers have answered.
+    """
+    client = get_async_edc_client()
+    runner = get_async_runner()
+    cache = get_catalog_cache()
+    semaphore = asyncio.Semaphore(CATALOG_CONCURRENCY)
+    results = {}
     
-    # permissionは単一オブジェクトの場合もあるし、配列の場合もある
-    permissions_raw = policy_obj.get("odrl:permission", [])
-    if isinstance(permissions_raw, dict):
-        # 単一オブジェクトの場合は配列にラップ
-        permissions = [permissions_raw]
-    elif isinstance(permissions_raw, list):
-        permissions = permissions_raw
-    else:
-        return True, "No permissions defined"
-    
-    if not permissions:
-        return True, "No permissions defined"
-    
-    def check_constraint(constraint):
-        """制約をチェックするヘルパー関数"""
-        left_operand = constraint.get("odrl:leftOperand")
-        operator = constraint.get("odrl:operator", {})
-        right_operand = constraint.get("odrl:rightOperand")
-        
-        # left_operandがオブジェクト形式の場合、@idを取得
-        if isinstance(left_operand, dict):
-            left_operand_value = left_operand.get("@id", "")
-        else:
-            left_operand_value = left_operand
-        
-        # operatorがオブジェクト形式の場合、@idを取得
-        if isinstance(operator, dict):
-            operator_value = operator.get("@id", "")
+    futures = {}
+    for p in providers:
+        cached = None if force_refresh else cache.get(p["fqdn"])
+        if cached is not None:
+            result = {"ok": True, "status": 200, "catalog": cached["catalog"], "elapsed": 0.0,
+                      "cached": True, "age": cached["age"], "stale": cached["stale"]}
+            results[p["fqdn"]] = result
+            on_result(p, result)
         else:
-            operator_value = operator
-        
-        # participantId制約をチェック（複数の形式に対応）
-        participant_id_patterns = [
-            "https://w3id.org/edc/v0.0.1/ns/participantId",
-            "edc:participantId", 
-            "participantId"
-        ]
-        
-        if left_operand_value in participant_id_patterns:
-            if operator_value in ["odrl:eq", "EQ", "eq"]:
-                if right_operand == participant_id:
-                    return True, f"✅ Participant ID matches: {right_operand}"
-                else:
-                    return False, f"❌ Participant ID mismatch. Required: {right_operand}, Your ID: {participant_id}"
-        
-        return None, None
-    
-    for permission in permissions:
-        if isinstance(permission, dict):
-            # 単一制約の場合
-            constraint = permission.get("odrl:constraint", {})
-            if constraint:
-                result, message = check_constraint(constraint)
-                if result is not None:
-                    return result, message
-            
-            # 複数制約の場合（constraintsが配列）
-            constraints = permission.get("odrl:constraints", [])
-            if not constraints:
-                constraints = permission.get("constraints", [])
-            
-            for constraint in constraints:
-                result, message = check_constraint(constraint)
-                if result is not None:
-                    return result, message
+            future = runner.submit(fetch_catalog_bounded(client, dsp_endpoint(p["fqdn"]), semaphore, CATALOG_TIMEOUT),
+                                   inherit_deadline=True)
+            futures[future] = p
     
-    return True, "No participant constraints found"
+    for future in concurrent.futures.as_completed(futures):
+        provider = futures[future]
+        result = future.result()
+        if result["ok"]:
+            cache.put(provider["fqdn"], result["catalog"])
+        results[provider["fqdn"]] = result
+        on_result(provider, result)
+    return results
 
 def fetch_catalog():
     """Fetch Catalog section"""
@@ -534,6 +990,7 @@ def fetch_catalog():
     st.markdown("""
     この工程では、 他の参加者（プロバイダー）が公開しているデータカタログから利用可能なコントラクトオファーを取得し、利用可能なアセットとその契約条件を確認します。
     ポリシー評価により、あなたの参加者IDでアクセス可能なオファーのみが表示されます。
+    複数のプロバイダーを指定すると、並列に取得して1つのカタログとして表示します。
     """)
     
     # Use environment variable for participant ID
@@ -541,230 +998,426 @@ def fetch_catalog():
     if st.session_state.debug_mode:
         st.info(f"🔍 **Evaluating policies for:** `{consumer_participant_id}`")
     
-    provider_fqdn = st.text_input("Provider FQDN", 
-                                  placeholder="e.g., sample-participant-2.handson.dataspace.internal", 
-                                  key="provider_fqdn")
+    # 1行に1プロバイダー（Participant IDは通常FQDNと同じ値）
+    providers_text = st.text_area("Provider FQDNs",
+                                  placeholder="e.g., sample-participant-2.handson.dataspace.internal\n"
+                                              "sample-participant-3.handson.dataspace.internal,Participant-3",
+                                  help="1行に1つ。Participant IDがFQDNと異なる場合は `FQDN,Participant ID` と記載します",
+                                  key="provider_fqdns")
     
-    # Provider Participant ID (通常はFQDNと同じ値)
-    provider_participant_id = st.text_input("Provider Participant ID",
-                                           value=provider_fqdn,
-                                           placeholder="e.g., sample-participant-2.handson.dataspace.internal",
-                                           help="通常はFQDNと同じ値を使用します",
-                                           key="provider_participant_id")
+    force_refresh = st.checkbox("Force refresh (bypass catalog cache)", key="catalog_force_refresh",
+                                help=f"カタログはプロバイダーごとに{CATALOG_CACHE_TTL:.0f}秒間キャッシュされ、期限切れ後はバックグラウンドで更新されます")
     
     if st.button("Fetch Catalog", type="primary"):
-        # Trim whitespace from input
-        provider_fqdn = provider_fqdn.strip() if provider_fqdn else ""
+        trace_action("Fetch catalog")
+        providers = parse_provider_list(providers_text)
         
-        if not provider_fqdn:
-            st.warning("Please enter a provider FQDN")
+        if not providers:
+            st.warning("Please enter at least one provider FQDN")
         else:
-            # Construct DSP endpoint
-            dsp_endpoint = f"http://{provider_fqdn}:19194/protocol"
-            
-            payload = {
-                "@context": {
-                    "@vocab": "https://w3id.org/edc/v0.0.1/ns/"
-                },
-                "@type": "CatalogRequest",
-                "counterPartyAddress": dsp_endpoint,
-                "protocol": "dataspace-protocol-http",
-                "querySpec": {
-                    "@type": "QuerySpec"
-                }
-            }
-            
             # Debug information
             if st.session_state.debug_mode:
                 st.info(f"🔍 **Debug Info:**")
-                st.json({
-                    "provider_fqdn": provider_fqdn,
-                    "dsp_endpoint": dsp_endpoint,
-                    "consumer_id": consumer_participant_id,
-                    "payload": payload
-                })
+                for provider in providers:
+                    payload = catalog_request(dsp_endpoint(provider["fqdn"]))
+                    st.json({
+                        "provider_fqdn": provider["fqdn"],
+                        "provider_participant_id": provider["participant_id"],
+                        "dsp_endpoint": dsp_endpoint(provider["fqdn"]),
+                        "consumer_id": consumer_participant_id,
+                        "payload": payload
+                    })
+                    
+                    # Test with curl equivalent
+                    st.write("**🔧 Curl Equivalent:**")
+                    curl_cmd = f"""curl -X POST -H "Content-Type: application/json" -H "X-API-Key: password" -d '{json.dumps(payload)}' {EDC_MANAGEMENT}/management/v3/catalog/request"""
+                    st.code(curl_cmd, language="bash")
+                st.write(f"**📤 Sending requests to:** `{EDC_MANAGEMENT}/management/v3/catalog/request`")
+            
+            # 各プロバイダーの応答を到着順に表示
+            started = time.perf_counter()
+            with st.status(f"Fetching catalogs from {len(providers)} provider(s)...", expanded=True) as status:
+                def on_result(provider, result):
+                    datasets_count = len(as_list(result.get("catalog", {}).get("dcat:dataset")))
+                    if result.get("cached"):
+                        refresh_note = ", refreshing in background" if result["stale"] else ""
+                        st.write(f"⚡ `{provider['fqdn']}`: {datasets_count} dataset(s) (cached {result['age']:.0f}s ago{refresh_note})")
+                    elif result["ok"]:
+                        st.write(f"✅ `{provider['fqdn']}`: {datasets_count} dataset(s) ({result['elapsed']:.2f}s)")
+                    else:
+                        st.write(f"❌ `{provider['fqdn']}`: {result['status'] or 'error'} - {result['error'][:200]} ({result['elapsed']:.2f}s)")
                 
-                # Test with curl equivalent
-                st.write("**🔧 Curl Equivalent:**")
-                curl_cmd = f"""curl -X POST -H "Content-Type: application/json" -H "X-API-Key: password" -d '{json.dumps(payload)}' {EDC_MANAGEMENT}/management/v3/catalog/request"""
-                st.code(curl_cmd, language="bash")
+                results = fetch_catalogs_streaming(providers, on_result, force_refresh=force_refresh)
+                succeeded = [p for p in providers if results[p["fqdn"]]["ok"]]
+                status.update(
+                    label=f"Fetched {len(succeeded)}/{len(providers)} catalog(s) in {time.perf_counter() - started:.2f}s",
+                    state="complete" if succeeded else "error"
+                )
             
-            try:
-                if st.session_state.debug_mode:
-                    st.write(f"**📤 Sending request to:** `{EDC_MANAGEMENT}/management/v3/catalog/request`")
-                with st.spinner(f"Fetching catalog from {provider_fqdn}..."):
-                    response = requests.post(
-                        f"{EDC_MANAGEMENT}/management/v3/catalog/request",
-                        headers={
-                            "Content-Type": "application/json",
-                            "X-API-Key": "password"
-                        },
-                        json=payload,
-                        timeout=30
-                    )
+            if st.session_state.debug_mode:
+                for provider in providers:
+                    result = results[provider["fqdn"]]
+                    if not result["ok"]:
+                        st.error(f"❌ Failed to fetch catalog from {provider['fqdn']}: {result['status']}")
+                        st.text(f"**Response Body:** {result['error']}")
+            
+            if succeeded:
+                # セッション状態にProvider情報を保存（ウィジェットキーと異なる名前を使用）
+                st.session_state['cached_provider_fqdn'] = succeeded[0]["fqdn"]
+                st.session_state['cached_provider_participant_id'] = succeeded[0]["participant_id"]
                 
-                if st.session_state.debug_mode:    
-                    st.write(f"**📥 Response Status:** `{response.status_code}`")
-                    st.write(f"**📥 Response Headers:** `{dict(response.headers)}`")
-                    
-                if response.status_code == 200:
-                    catalog = response.json()
-                    st.success(f"✅ Catalog fetched from {provider_fqdn}!")
-                    
-                    # セッション状態にProvider情報を保存（ウィジェットキーと異なる名前を使用）
-                    st.session_state['cached_provider_fqdn'] = provider_fqdn.strip()
-                    st.session_state['cached_provider_participant_id'] = provider_participant_id.strip()
-                    st.session_state['last_catalog_data'] = catalog
-                    
-                    # Display datasets with policy evaluation
-                    datasets_raw = catalog.get("dcat:dataset", [])
-                    # Handle both single dataset object and array of datasets
-                    if isinstance(datasets_raw, dict):
-                        datasets = [datasets_raw]
-                    elif isinstance(datasets_raw, list):
-                        datasets = datasets_raw
-                    else:
-                        datasets = []
-                    
-                    if datasets:
-                        # First pass: filter datasets and offers based on policy evaluation
-                        accessible_datasets = []
-                        blocked_datasets = []
-                        
-                        for dataset in datasets:
-                            dataset_id = dataset.get('@id', 'Unknown ID')
-                            dataset_name = dataset.get('dcat:keyword', [])
-                            
-                            # Check contract offers for this dataset
-                            offers_raw = dataset.get('odrl:hasPolicy', [])
-                            # Handle both single offer object and array of offers
-                            if isinstance(offers_raw, dict):
-                                offers = [offers_raw]
-                            elif isinstance(offers_raw, list):
-                                offers = offers_raw
-                            else:
-                                offers = []
-                            
-                            accessible_offers_for_dataset = []
-                            blocked_offers_for_dataset = []
-                            
-                            for offer in offers:
-                                can_access, evaluation_msg = evaluate_policy_for_participant(
-                                    offer, consumer_participant_id
-                                )
-                                
-                                if can_access:
-                                    accessible_offers_for_dataset.append({
-                                        'offer': offer,
-                                        'evaluation_msg': evaluation_msg
-                                    })
-                                else:
-                                    blocked_offers_for_dataset.append({
-                                        'offer': offer,
-                                        'evaluation_msg': evaluation_msg
-                                    })
-                            
-                            # Only include dataset if it has at least one accessible offer
-                            if accessible_offers_for_dataset:
-                                accessible_datasets.append({
-                                    'dataset': dataset,
-                                    'accessible_offers': accessible_offers_for_dataset,
-                                    'blocked_offers': blocked_offers_for_dataset
-                                })
-                            else:
-                                blocked_datasets.append({
-                                    'dataset': dataset,
-                                    'blocked_offers': blocked_offers_for_dataset
-                                })
-                        
-                        # Display accessible datasets
-                        if accessible_datasets:
-                            st.subheader(f"✅ Accessible Datasets ({len(accessible_datasets)})")
-                            
-                            for idx, dataset_info in enumerate(accessible_datasets):
-                                dataset = dataset_info['dataset']
-                                dataset_id = dataset.get('@id', 'Unknown ID')
-                                dataset_name = dataset.get('dcat:keyword', [])
-                                accessible_offers = dataset_info['accessible_offers']
-                                blocked_offers = dataset_info['blocked_offers']
-                                
-                                with st.expander(f"📦 Dataset {idx + 1}: {dataset_id}"):
-                                    if dataset_name:
-                                        st.write(f"**Keywords:** {', '.join(dataset_name)}")
-                                    
-                                    # Show accessible offers
-                                    st.write(f"**✅ Accessible Contract Offers:** {len(accessible_offers)}")
-                                    for offer_idx, offer_info in enumerate(accessible_offers):
-                                        offer = offer_info['offer']
-                                        evaluation_msg = offer_info['evaluation_msg']
-                                        offer_id = offer.get('@id', f'offer-{offer_idx}')
-                                        
-                                        st.write(f"🔗 **Offer ID:** `{offer_id}`")
-                                        st.success(f"**Policy Evaluation:** {evaluation_msg}")
-                                        
-                                        # Evaluate policy for consumer in debug mode
-                                        if st.session_state.get("debug_mode"):
-                                            st.write("**🔍 Policy Debug - Offer Structure:**")
-                                            st.json(offer)
-                                        
-                                        # Store offer info in session state for data transfer
-                                        if 'accessible_offers' not in st.session_state:
-                                            st.session_state['accessible_offers'] = {}
-                                        st.session_state['accessible_offers'][offer_id] = {
-                                            'dataset_id': dataset_id,
-                                            'provider_fqdn': provider_fqdn,
-                                            'dsp_endpoint': dsp_endpoint,
-                                            'offer_policy': offer  # カタログから取得したoffer全体を保存
-                                        }
-                                    
-                                    # Show blocked offers if any (only in debug mode)
-                                    if blocked_offers and st.session_state.get("debug_mode"):
-                                        st.write(f"**❌ Blocked Contract Offers:** {len(blocked_offers)} (Debug)")
-                                        for offer_idx, offer_info in enumerate(blocked_offers):
-                                            offer = offer_info['offer']
-                                            evaluation_msg = offer_info['evaluation_msg']
-                                            offer_id = offer.get('@id', f'blocked-offer-{offer_idx}')
-                                            
-                                            st.write(f"🚫 **Blocked Offer ID:** `{offer_id}`")
-                                            st.error(f"**Policy Evaluation:** {evaluation_msg}")
-                        
-                        # Show blocked datasets summary (only if user has debug mode enabled)
-                        if blocked_datasets and st.session_state.get("debug_mode"):
-                            st.subheader(f"🚫 Blocked Datasets ({len(blocked_datasets)}) - Debug Mode")
-                            st.info("以下のデータセットは、あなたの参加者IDでアクセス許可されていないため非表示になっています。")
-                            
-                            for idx, dataset_info in enumerate(blocked_datasets):
-                                dataset = dataset_info['dataset']
-                                dataset_id = dataset.get('@id', 'Unknown ID')
-                                blocked_offers = dataset_info['blocked_offers']
-                                
-                                with st.expander(f"🚫 Blocked Dataset {idx + 1}: {dataset_id}"):
-                                    st.write(f"**❌ All Offers Blocked:** {len(blocked_offers)}")
-                                    for offer_idx, offer_info in enumerate(blocked_offers):
-                                        offer = offer_info['offer']
-                                        evaluation_msg = offer_info['evaluation_msg']
-                                        offer_id = offer.get('@id', f'blocked-offer-{offer_idx}')
-                                        
-                                        st.write(f"🚫 **Blocked Offer ID:** `{offer_id}`")
-                                        st.error(f"**Policy Evaluation:** {evaluation_msg}")
-                        
-                        elif blocked_datasets:
-                            st.info(f"ℹ️ {len(blocked_datasets)} dataset(s) are not accessible with your participant ID.")
-                        
-                        # If no accessible datasets at all
-                        if not accessible_datasets:
-                            st.warning("❌ No datasets are accessible with your current participant ID.")
-                            st.info("💡 Contact the data provider to get proper access permissions or check if your participant ID is correctly configured.")
-                    else:
-                        st.warning("No datasets found in catalog")
-                else:
-                    st.error(f"❌ Failed to fetch catalog: {response.status_code}")
-                    st.write(f"**Response Headers:** {dict(response.headers)}")
-                    st.text(f"**Response Body:** {response.text}")
-                    st.write(f"**Request URL:** {EDC_MANAGEMENT}/management/v3/catalog/request")
-            except Exception as e:
-                st.error(f"❌ Error: {e}")
+                # ポリシー評価は共有オファーストアで取得時に1回だけ行い、セッションにはキーだけを保存
+                store = get_offer_store()
+                remember_catalogs([store.put(provider, results[provider["fqdn"]]["catalog"]) for provider in succeeded])
+                st.session_state['catalog_page'] = 1
+            else:
+                st.error("❌ Failed to fetch catalog from every provider")
+                st.write(f"**Request URL:** {EDC_MANAGEMENT}/management/v3/catalog/request")
+    
+    if st.session_state.get('catalog_providers') is not None:
+        entries = session_catalogs()
+        render_catalog_table(
+            [row for entry in entries for row in entry["rows"]],
+            tuple(entry["digest"] for entry in entries)
+        )
 
+def flatten_catalog(provider: Dict[str, str], catalog: Dict[str, Any], participant_id: str) -> List[Dict[str, Any]]:
+    """One table row per (dataset, offer) of a provider catalog, with its policy evaluation
+
+    Datasets without any offer get a single blocked row so they still show up
+    in the blocked counts. Rows keep references to the catalog's dataset and
+    offer objects instead of copying them; accessible rows double as the
+    offer info used by negotiation and transfer.
+    """
+    rows = []
+    endpoint = dsp_endpoint(provider["fqdn"])
+    for dataset in as_list(catalog.get("dcat:dataset")):
+        dataset_id = dataset.get('@id', 'Unknown ID')
+        keywords = ", ".join(str(keyword) for keyword in as_list(dataset.get('dcat:keyword')))
+        offers = as_list(dataset.get('odrl:hasPolicy'))
+        for offer_idx, offer in enumerate(offers or [None]):
+            if offer is None:
+                offer_id, can_access, evaluation_msg = "", False, "No contract offers"
+            else:
+                offer_id = offer.get('@id', f'offer-{offer_idx}')
+                can_access, evaluation_msg = evaluate_policy_for_participant(offer, participant_id)
+            rows.append({
+                'dataset_id': dataset_id,
+                'offer_id': offer_id,
+                'provider_fqdn': provider['fqdn'],
+                'provider_participant_id': provider['participant_id'],
+                'dsp_endpoint': endpoint,
+                'keywords': keywords,
+                'accessible': can_access,
+                'evaluation_msg': evaluation_msg,
+                'search_text': f"{dataset_id} {offer_id} {provider['fqdn']} {keywords}".lower(),
+                'dataset': dataset,
+                'offer_policy': offer,  # カタログから取得したoffer全体（交渉リクエストに使用）
+            })
+    return rows
+
+class OfferStore:
+    """Evaluated provider catalogs shared by all sessions, deduplicated by content
+
+    One entry per (provider FQDN, provider participant ID) holds the table
+    rows and the accessible offers by ID, however many sessions fetched that
+    provider; sessions keep only the keys. Re-fetching an unchanged catalog
+    keeps the existing entry, so its policies are not evaluated again.
+    Entries that no session has read for idle_ttl seconds are evicted.
+    """
+
+    def __init__(self, participant_id: str, idle_ttl: float = OFFER_STORE_IDLE_TTL):
+        self.participant_id = participant_id
+        self.idle_ttl = idle_ttl
+        self._entries: Dict[tuple, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+
+    def put(self, provider: Dict[str, str], catalog: Dict[str, Any]) -> tuple:
+        """Store a fetched catalog and return the key sessions refer to it by"""
+        key = (provider["fqdn"], provider["participant_id"])
+        digest = hashlib.sha256(orjson.dumps(catalog, option=orjson.OPT_SORT_KEYS)).hexdigest()[:32]
+        with self._lock:
+            self._evict_idle()
+            entry = self._entries.get(key)
+            if entry is not None and entry["digest"] == digest:
+                entry["used_at"] = time.monotonic()
+                return key
+        
+        rows = flatten_catalog(provider, catalog, self.participant_id)
+        entry = {
+            "digest": digest,
+            "rows": rows,
+            "offers": {row["offer_id"]: row for row in rows if row["accessible"]},
+            "used_at": time.monotonic(),
+        }
+        with self._lock:
+            self._entries[key] = entry
+        return key
+
+    def get(self, key: tuple) -> Optional[Dict[str, Any]]:
+        """Entry for a key, or None once it has been evicted"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                entry["used_at"] = time.monotonic()
+            return entry
+
+    def _evict_idle(self):
+        cutoff = time.monotonic() - self.idle_ttl
+        for key in [k for k, entry in self._entries.items() if entry["used_at"] < cutoff]:
+            del self._entries[key]
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "providers": len(self._entries),
+                "rows": sum(len(entry["rows"]) for entry in self._entries.values()),
+            }
+
+@st.cache_resource
+def get_offer_store() -> OfferStore:
+    """Offer store shared across sessions of this Streamlit server process"""
+    return OfferStore(PARTICIPANT_ID)
+
+def remember_catalogs(keys: List[tuple]):
+    """Refer this session to fetched catalogs, keeping the most recently fetched providers"""
+    keys = list(dict.fromkeys(keys))
+    earlier = [key for key in st.session_state.get('catalog_providers', []) if key not in keys]
+    st.session_state['catalog_providers'] = (earlier + keys)[-CATALOG_SESSION_PROVIDERS:]
+
+def session_catalogs() -> List[Dict[str, Any]]:
+    """Offer store entries of this session's providers; evicted ones are forgotten"""
+    store = get_offer_store()
+    keys = st.session_state.get('catalog_providers', [])
+    entries = {key: store.get(key) for key in keys}
+    live = [key for key in keys if entries[key] is not None]
+    if len(live) != len(keys):
+        st.session_state['catalog_providers'] = live
+    return [entries[key] for key in live]
+
+def get_accessible_offers() -> ChainMap:
+    """Accessible offers of this session's providers by offer ID (read-only view into the offer store)
+
+    The most recently fetched provider wins when two providers publish the
+    same offer ID.
+    """
+    return ChainMap(*(entry["offers"] for entry in reversed(session_catalogs())))
+
+def _reset_catalog_page():
+    st.session_state['catalog_page'] = 1
+
+def _catalog_view(rows, version: tuple, search: str, sort_by: str, descending: bool, show_blocked: bool):
+    """Indices of the rows matching the table's search, in its sort order
+
+    Memoized per catalog and view settings, so paging and opening details
+    do not re-filter or re-sort the whole catalog. The indices are kept as
+    a 4-byte array since every session holds its own view.
+    """
+    key = (version, search, sort_by, descending, show_blocked)
+    cached = st.session_state.get('catalog_view')
+    if cached is not None and cached[0] == key:
+        return cached[1]
+    
+    terms = search.lower().split()
+    indices = [
+        idx for idx, row in enumerate(rows)
+        if (show_blocked or row['accessible']) and all(term in row['search_text'] for term in terms)
+    ]
+    column = CATALOG_SORT_COLUMNS[sort_by]
+    indices.sort(key=lambda idx: rows[idx][column], reverse=descending)
+    indices = array('I', indices)
+    st.session_state['catalog_view'] = (key, indices)
+    return indices
+
+def _select_offer(offer_id: str):
+    st.session_state['selected_offer'] = offer_id
+
+def render_catalog_detail(row: Dict[str, Any]):
+    """Details of one catalog table row"""
+    st.markdown(f"**📦 {row['dataset_id']}** ({row['provider_fqdn']})")
+    if row['keywords']:
+        st.write(f"**Keywords:** {row['keywords']}")
+    if row['offer_policy'] is None:
+        st.warning(row['evaluation_msg'])
+        return
+    
+    st.write(f"🔗 **Offer ID:** `{row['offer_id']}`")
+    if row['accessible']:
+        st.success(f"**Policy Evaluation:** {row['evaluation_msg']}")
+        st.button("Use this offer for negotiation", key="catalog_use_offer",
+                  on_click=_select_offer, args=(row['offer_id'],))
+    else:
+        st.error(f"**Policy Evaluation:** {row['evaluation_msg']}")
+    
+    with st.expander("Offer policy (JSON)", expanded=st.session_state.get("debug_mode", False)):
+        st.json(row['offer_policy'])
+    with st.expander("Dataset (JSON)"):
+        st.json(row['dataset'])
+
+def render_catalog_table(rows, version: tuple):
+    """Fetched catalog as a searchable, sortable, paginated table of offers
+
+    Only the current page is sent to the browser and details are rendered
+    for the selected row only, so a rerun costs the same for ten datasets
+    as for thousands.
+    """
+    accessible = [row for row in rows if row['accessible']]
+    accessible_datasets = {(row['provider_fqdn'], row['dataset_id']) for row in accessible}
+    blocked_datasets = {(row['provider_fqdn'], row['dataset_id']) for row in rows} - accessible_datasets
+    
+    if not rows:
+        st.warning("No datasets found in catalog")
+        return
+    
+    st.subheader(f"✅ Accessible Datasets ({len(accessible_datasets)})")
+    st.caption(f"{len(accessible)} accessible offer(s) from {len({row['provider_fqdn'] for row in rows})} provider(s)")
+    if st.session_state.get("debug_mode"):
+        stats = get_offer_store().stats()
+        st.caption(f"🔍 Offer store (shared by all sessions): {stats['providers']} provider catalog(s), {stats['rows']} row(s)")
+    
+    debug_mode = st.session_state.get("debug_mode", False)
+    show_blocked = False
+    if blocked_datasets:
+        if debug_mode:
+            show_blocked = st.checkbox(f"🚫 Show blocked offers ({len(rows) - len(accessible)}) - Debug Mode",
+                                       key="catalog_show_blocked", on_change=_reset_catalog_page)
+        else:
+            st.info(f"ℹ️ {len(blocked_datasets)} dataset(s) are not accessible with your participant ID.")
+    
+    if not accessible and not show_blocked:
+        st.warning("❌ No datasets are accessible with your current participant ID.")
+        st.info("💡 Contact the data provider to get proper access permissions or check if your participant ID is correctly configured.")
+        return
+    
+    col1, col2, col3 = st.columns([3, 2, 1])
+    with col1:
+        search = st.text_input("🔍 Search datasets", key="catalog_search", on_change=_reset_catalog_page,
+                               placeholder="Dataset ID、Offer ID、プロバイダー、キーワードの一部を入力")
+    with col2:
+        sort_by = st.selectbox("Sort by", list(CATALOG_SORT_COLUMNS), key="catalog_sort", on_change=_reset_catalog_page)
+    with col3:
+        descending = st.toggle("Descending", key="catalog_descending", on_change=_reset_catalog_page)
+    
+    indices = _catalog_view(rows, version, search.strip(), sort_by, descending, show_blocked)
+    if not indices:
+        st.info("No datasets match your search")
+        return
+    
+    pages = (len(indices) + CATALOG_PAGE_SIZE - 1) // CATALOG_PAGE_SIZE
+    if st.session_state.get('catalog_page', 1) > pages:
+        st.session_state['catalog_page'] = 1
+    page = st.number_input(f"Page (of {pages})", min_value=1, max_value=pages, key="catalog_page") if pages > 1 else 1
+    page_rows = [rows[idx] for idx in indices[(page - 1) * CATALOG_PAGE_SIZE:page * CATALOG_PAGE_SIZE]]
+    
+    columns = ["Dataset", "Offer ID", "Provider", "Keywords"] + (["Access", "Policy Evaluation"] if show_blocked else [])
+    event = st.dataframe(
+        [{
+            "Dataset": row['dataset_id'],
+            "Offer ID": row['offer_id'],
+            "Provider": row['provider_fqdn'],
+            "Keywords": row['keywords'],
+            "Access": "✅" if row['accessible'] else "🚫",
+            "Policy Evaluation": row['evaluation_msg'],
+        } for row in page_rows],
+        column_order=columns,
+        width="stretch",
+        hide_index=True,
+        on_select="rerun",
+        selection_mode="single-row",
+        # 表示内容が変わったら選択をリセット
+        key=f"catalog_table_{abs(hash(st.session_state['catalog_view'][0]))}_{page}"
+    )
+    st.caption(f"Showing {(page - 1) * CATALOG_PAGE_SIZE + 1}-{(page - 1) * CATALOG_PAGE_SIZE + len(page_rows)} "
+               f"of {len(indices)} offer(s). 行を選択すると詳細を表示します。")
+    
+    selected_rows = event.selection.rows
+    if selected_rows:
+        render_catalog_detail(page_rows[selected_rows[0]])
+
+
+def record_agreement(offer_id: str, agreement_id: str, dataset_id: str, dsp_endpoint: str):
+    """Remember an agreement so Data Transfer can use it"""
+    st.session_state.setdefault("agreements", {})[offer_id] = {
+        "agreement_id": agreement_id, "dataset_id": dataset_id, "dsp_endpoint": dsp_endpoint
+    }
+    st.session_state["agreement_id"] = agreement_id
+    st.session_state["agreement_offer"] = {"dataset_id": dataset_id, "dsp_endpoint": dsp_endpoint}
+
+def render_negotiation_batch():
+    """Progress and results table of this session's negotiation batch"""
+    batch = get_batch_negotiator().get(st.session_state.get("negotiation_batch"))
+    if batch is None:
+        return
+    entries = batch["entries"]
+    finished = batch["finished_at"] is not None
+    agreements = [e for e in entries if e["state"] == FINALIZED]
+    failures = [e for e in entries if e["state"] in NEGOTIATION_FINISHED_STATES and e["state"] != FINALIZED]
+    
+    col1, col2, col3, col4 = st.columns(4)
+    col1.metric("Agreements", len(agreements))
+    col2.metric("Failures", len(failures))
+    col3.metric("In progress", len(entries) - len(agreements) - len(failures))
+    col4.metric("Wall time", f"{batch['wall_time']:.2f}s")
+    if not finished:
+        st.progress((len(agreements) + len(failures)) / len(entries))
+    
+    st.dataframe(
+        [{
+            "Offer ID": e["offer_id"],
+            "Dataset": e["dataset_id"],
+            "Provider": e["provider"],
+            "State": e["state"],
+            "Agreement ID": e["agreement_id"],
+            "Time (s)": round(e["elapsed"], 2) if e["elapsed"] is not None else None,
+            "Detected via": e["detected_via"],
+            "Error": e["error"],
+        } for e in entries],
+        width="stretch",
+        hide_index=True
+    )
+    
+    # 完了時に合意をセッションへ記録し、アプリ全体を再実行して自動更新を止める
+    if finished and st.session_state.get("negotiation_batch_active"):
+        for e in agreements:
+            record_agreement(e["offer_id"], e["agreement_id"], e["dataset_id"], e["dsp_endpoint"])
+        st.session_state["negotiation_batch_active"] = False
+        st.rerun()
+
+def batch_negotiation(accessible_offers: Dict[str, Any]):
+    """Negotiate many offers concurrently"""
+    st.subheader("📦 Batch Negotiation")
+    st.markdown("複数のオファーをまとめて交渉します。同時に実行する交渉数の上限を指定できます。")
+    
+    offer_ids = list(accessible_offers.keys())
+    select_all = st.checkbox(f"Select all ({len(offer_ids)})", key="batch_select_all")
+    selected = offer_ids if select_all else st.multiselect("Offers", offer_ids, key="batch_offers")
+    concurrency = st.number_input("Max concurrent negotiations", min_value=1, max_value=64,
+                                  value=BATCH_NEGOTIATION_CONCURRENCY, key="batch_concurrency")
+    
+    if st.button("Negotiate Selected Offers", key="negotiate_batch", disabled=not selected):
+        trace_action("Negotiate selected offers")
+        fallback_participant_id = st.session_state.get('cached_provider_participant_id', 'Sample-Participant-2')
+        requests_ = []
+        for offer_id in selected:
+            offer_info = accessible_offers[offer_id]
+            dsp_endpoint = offer_info.get('dsp_endpoint', EDC_PROTOCOL)
+            dataset_id = offer_info.get('dataset_id', 'sample-asset-1')
+            requests_.append({
+                "offer_id": offer_id,
+                "dataset_id": dataset_id,
+                "provider": offer_info.get('provider_fqdn'),
+                "payload": contract_request(
+                    offer_id, dsp_endpoint, dataset_id,
+                    offer_info.get('provider_participant_id', fallback_participant_id),
+                    offer_info.get('offer_policy'), EDC_CALLBACK_URL
+                )
+            })
+        st.session_state["negotiation_batch"] = get_batch_negotiator().submit(requests_, int(concurrency))
+        st.session_state["negotiation_batch_active"] = True
+    
+    if st.session_state.get("negotiation_batch"):
+        refresh = TRANSFER_REFRESH_INTERVAL if st.session_state.get("negotiation_batch_active") else None
+        st.fragment(render_negotiation_batch, run_every=refresh)()
 
 def negotiate_contract():
     """Contract Negotiation section"""
@@ -784,7 +1437,7 @@ def negotiate_contract():
         st.warning("⚠️ Provider情報が見つかりません。まずCatalogをフェッチしてください。")
 
     # Show accessible offers from catalog fetch
-    accessible_offers = st.session_state.get('accessible_offers', {})
+    accessible_offers = get_accessible_offers()
     if accessible_offers:
         st.info(f"✅ {len(accessible_offers)} accessible offer(s) found from catalog")
         st.write("**💡 Offer ID説明:** これはProvider側が作成したContract Definitionの中のPolicy IDです")
@@ -808,6 +1461,7 @@ def negotiate_contract():
         )
 
     if st.button("Start Contract Negotiation", key="negotiate"):
+        trace_action("Negotiate contract")
         if not offer_id:
             st.warning("Please provide an Offer ID")
             return
@@ -816,6 +1470,8 @@ def negotiate_contract():
         provider_endpoint = EDC_PROTOCOL  # fallback
         dataset_id = "sample-asset-1"     # fallback
         offer_policy = None
+        # セッション状態からProvider Participant IDを取得（オファーごとの値を優先）
+        provider_participant_id = st.session_state.get('cached_provider_participant_id', 'Sample-Participant-2')
 
         if st.session_state.get("debug_mode"):
             st.write("**🔍 Debug - Contract Negotiation Target:**")
@@ -825,6 +1481,7 @@ def negotiate_contract():
             provider_endpoint = offer_info.get('dsp_endpoint', EDC_PROTOCOL)
             dataset_id = offer_info.get('dataset_id', 'sample-asset-1')
             offer_policy = offer_info.get('offer_policy')  # カタログから取得したoffer全体
+            provider_participant_id = offer_info.get('provider_participant_id', provider_participant_id)
 
             st.write(f"- **Provider FQDN**: `{offer_info.get('provider_fqdn')}`")
             st.write(f"- **Provider DSP Endpoint**: `{provider_endpoint}`")
@@ -841,27 +1498,11 @@ def negotiate_contract():
 
             # カタログから適切な値を取得
             asset_name = None
-            # セッション状態からProvider Participant IDを取得
-            provider_participant_id = st.session_state.get('cached_provider_participant_id', 'Sample-Participant-2')
-
-            # セッション状態からカタログデータを取得
-            catalog_data = st.session_state.get('last_catalog_data')
-
-            # カタログレスポンスからアセット名を取得
-            if catalog_data and "dcat:dataset" in catalog_data:
-                datasets_raw = catalog_data["dcat:dataset"]
-                # Handle both single dataset object and array of datasets
-                if isinstance(datasets_raw, dict):
-                    datasets = [datasets_raw]
-                elif isinstance(datasets_raw, list):
-                    datasets = datasets_raw
-                else:
-                    datasets = []
-                
-                for dataset in datasets:
-                    if isinstance(dataset, dict) and dataset.get("@id") == dataset_id:
-                        asset_name = dataset.get("dct:title") or dataset.get("@id")
-                        break
+
+            # オファーストアに保持しているデータセットからアセット名を取得
+            dataset = accessible_offers[offer_id].get('dataset') if offer_id in accessible_offers else None
+            if isinstance(dataset, dict):
+                asset_name = dataset.get("dct:title") or dataset.get("@id")
 
             # ODRLのprefixを除去して正規化
             def clean_odrl_prefixes(policy_data):
@@ -880,53 +1521,8 @@ def negotiate_contract():
                 else:
                     return policy_data
 
-            # カタログから取得したオファーに不足フィールドを補完
-            enhanced_policy = offer_policy.copy()
-            
-            # 必須フィールドを追加（不足している場合）
-            if "odrl:assigner" not in enhanced_policy:
-                enhanced_policy["odrl:assigner"] = {"@id": provider_participant_id}
-            if "odrl:target" not in enhanced_policy:
-                enhanced_policy["odrl:target"] = {"@id": dataset_id}
-            
-            payload = {
-                "@context": {
-                    "@vocab": "https://w3id.org/edc/v0.0.1/ns/",
-                    "edc": "https://w3id.org/edc/v0.0.1/ns/",
-                    "odrl": "http://www.w3.org/ns/odrl/2/",
-                    "dcat": "http://www.w3.org/ns/dcat#",
-                    "dct": "http://purl.org/dc/terms/",
-                    "dspace": "https://w3id.org/dspace/v0.8/"
-                },
-                "@type": "ContractRequest",
-                "counterPartyAddress": provider_endpoint,
-                "protocol": "dataspace-protocol-http",
-                "policy": enhanced_policy
-            }
-        else:
-            # フォールバック用のデフォルトオファー
-            payload = {
-                "@context": {
-                    "@vocab": "https://w3id.org/edc/v0.0.1/ns/",
-                    "edc": "https://w3id.org/edc/v0.0.1/ns/",
-                    "odrl": "http://www.w3.org/ns/odrl/2/",
-                    "dcat": "http://www.w3.org/ns/dcat#",
-                    "dct": "http://purl.org/dc/terms/",
-                    "dspace": "https://w3id.org/dspace/v0.8/"
-                },
-                "@type": "ContractRequest",
-                "counterPartyAddress": provider_endpoint,
-                "protocol": "dataspace-protocol-http",
-                "policy": {
-                    "@id": offer_id,
-                    "@type": "odrl:Offer",
-                    "odrl:assigner": {"@id": provider_participant_id},
-                    "odrl:target": {"@id": dataset_id},
-                    "odrl:permission": [{"odrl:action": {"@id": "USE"}}],
-                    "odrl:prohibition": [],
-                    "odrl:obligation": []
-                }
-            }
+        payload = contract_request(offer_id, provider_endpoint, dataset_id, provider_participant_id, offer_policy,
+                                   EDC_CALLBACK_URL)
 
         # Debug contract negotiation payload
         if st.session_state.get("debug_mode"):
@@ -934,16 +1530,9 @@ def negotiate_contract():
             st.json(payload)
 
         try:
+            started = time.perf_counter()
             with st.spinner("Starting contract negotiation..."):
-                response = requests.post(
-                    f"{EDC_MANAGEMENT}/management/v3/contractnegotiations",
-                    headers={
-                        "Content-Type": "application/json",
-                        "X-API-Key": "password"
-                    },
-                    json=payload,
-                    timeout=30
-                )
+                response = get_edc_client().start_negotiation(payload)
 
             if st.session_state.get("debug_mode"):
                 st.write(f"**📥 Contract Negotiation Response Status:** `{response.status_code}`")
@@ -953,39 +1542,117 @@ def negotiate_contract():
                 st.success(f"✅ Contract negotiation started! ID: {negotiation_id}")
                 st.session_state["negotiation_id"] = negotiation_id
 
-                # Wait for negotiation to complete
+                # コールバック（ロングポーリング）と間隔を延ばすポーリングのうち早い方で完了を検知
                 with st.spinner("Waiting for negotiation to complete..."):
-                    for i in range(30):
-                        time.sleep(2)
-                        check_response = requests.get(
-                            f"{EDC_MANAGEMENT}/management/v3/contractnegotiations/{negotiation_id}",
-                            headers={
-                                "Content-Type": "application/json",
-                                "X-API-Key": "password"
-                            },
-                            timeout=20
-                        )
-
-                        if check_response.status_code == 200:
-                            body = check_response.json()
-                            state = body.get("state")
-                            st.info(f"Negotiation state: {state}")
-
-                            if state == "FINALIZED":
-                                agreement_id = body.get("contractAgreementId")
-                                st.success(f"✅ Contract finalized! Agreement ID: {agreement_id}")
-                                st.session_state["agreement_id"] = agreement_id
-                                break
-                        else:
-                            # 状態取得失敗時も少し待って再試行
-                            if st.session_state.get("debug_mode"):
-                                st.warning(f"State check failed (HTTP {check_response.status_code}) — retrying…")
+                    outcome = get_async_runner().run(wait_for_negotiation(
+                        get_async_edc_client(), negotiation_id,
+                        timeout=NEGOTIATION_TIMEOUT, callback_url=EDC_CALLBACK_URL
+                    ))
+                time_to_agreement = time.perf_counter() - started
+                
+                if outcome["state"] == "FINALIZED":
+                    agreement_id = outcome["agreement_id"]
+                    st.success(f"✅ Contract finalized! Agreement ID: {agreement_id}")
+                    record_agreement(offer_id, agreement_id, dataset_id, provider_endpoint)
+                    st.metric("Time to agreement", f"{time_to_agreement:.2f}s",
+                              help="交渉開始リクエストから合意（FINALIZED）を検知するまでの時間")
+                    st.caption(f"Detected via {outcome['source']}"
+                               + (f" after {outcome['polls']} poll(s)" if outcome["source"] == "poll" else ""))
+                elif outcome["state"] == "TERMINATED":
+                    st.error(f"❌ Negotiation terminated after {time_to_agreement:.2f}s")
+                    if outcome.get("error_detail"):
+                        st.text(outcome["error_detail"])
+                else:
+                    st.warning(f"⏱️ Negotiation did not finish within {NEGOTIATION_TIMEOUT:.0f}s. "
+                               f"ID `{negotiation_id}` で後から状態を確認できます。")
             else:
                 st.error(f"❌ Failed to start negotiation: {response.status_code}")
                 st.text(response.text)
         except Exception as e:      
             st.error(f"❌ Error starting negotiation: {e}")
 
+    if accessible_offers:
+        st.markdown("---")
+        batch_negotiation(accessible_offers)
+
+
+TRANSFER_STATE_LABELS = {
+    QUEUED: "⏳ Queued",
+    STARTING: "🚀 Starting transfer",
+    WAITING_EDR: "🔗 Waiting for EDR",
+    FETCHING: "📡 Fetching data",
+    COMPLETED: "🎉 Completed",
+    FAILED: "❌ Failed",
+}
+
+def format_bytes(size: float) -> str:
+    for unit in ["B", "KB", "MB", "GB"]:
+        if size < 1024 or unit == "GB":
+            return f"{size:.0f} {unit}" if unit == "B" else f"{size:.1f} {unit}"
+        size /= 1024
+
+def render_transfer_job(job: Dict[str, Any]):
+    """Render the progress / outcome of one background transfer"""
+    with st.container(border=True):
+        elapsed = job["updated_at"] - job["created_at"]
+        st.write(f"**{TRANSFER_STATE_LABELS[job['state']]}** — Asset `{job['asset_id']}` ({elapsed:.1f}s)")
+        if job["state"] != FAILED:
+            step = TRANSFER_STEPS.index(job["state"])
+            st.progress(step / (len(TRANSFER_STEPS) - 1))
+        if job["transfer_id"]:
+            reused = " (EDR reused from cache)" if job["edr_source"] == "cache" else ""
+            st.caption(f"Transfer ID: {job['transfer_id']}{reused}")
+        if job["endpoint"]:
+            st.caption(f"Endpoint: {job['endpoint']}")
+        if job["state"] == FETCHING:
+            received = format_bytes(job["bytes_received"])
+            if job["bytes_total"]:
+                st.progress(min(job["bytes_received"] / job["bytes_total"], 1.0),
+                            text=f"{received} / {format_bytes(job['bytes_total'])}")
+            else:
+                st.caption(f"Received {received}")
+        
+        if job["state"] == COMPLETED:
+            result = job["result"]
+            records = result["records"]
+            # 全体は static/transfers に保存済み。画面には先頭のレコードのみ表示する
+            download_path = os.path.relpath(job["file_path"], STATIC_DIR).replace(os.sep, "/")
+            st.markdown(f"[⬇️ Download full data ({format_bytes(job['bytes_received'])})](app/static/{download_path})")
+            with st.expander(f"📊 Preview (first {len(records)} records)", expanded=True):
+                if result["kind"] == "json" and records and all(isinstance(r, dict) for r in records):
+                    st.dataframe(records, width="stretch", hide_index=True)
+                elif result["kind"] == "json":
+                    st.json(records if len(records) != 1 or result["truncated"] else records[0])
+                else:
+                    st.code("\n".join(records), language=None)
+                if result["truncated"]:
+                    st.caption("プレビューは先頭部分のみです。全データはダウンロードしてください。")
+            st.info("🔄 **Flow Summary**: Asset → Policy → Contract Offer → Catalog → Negotiation → Agreement → Transfer → Data Access")
+        elif job["state"] == FAILED:
+            if job["status_code"] == 401:
+                st.error("🔐 Authorization failed - Token may have expired.")
+                st.info("💡 新しい契約を交渉してトークンを更新してください。")
+            elif job["status_code"] == 404:
+                st.error("🔍 Data not found - Asset may not exist.")
+            else:
+                st.error(job["error"])
+        
+        if st.session_state.get("debug_mode"):
+            st.json(job["history"])
+
+def render_transfer_jobs():
+    """Progress of this session's transfers; reruns on its own while any is running"""
+    jobs = get_transfer_orchestrator().jobs(st.session_state.get("transfer_jobs", []))
+    active = any(job["state"] not in FINISHED_STATES for job in jobs)
+    
+    for job in reversed(jobs):
+        render_transfer_job(job)
+    
+    # 全転送が終わったらアプリ全体を再実行し、自動更新を止める
+    if st.session_state.get("transfer_jobs_active") and not active:
+        st.session_state["transfer_jobs_active"] = False
+        st.rerun()
+    st.session_state["transfer_jobs_active"] = active
 
 def data_transfer():
     """Data Transfer section"""
@@ -993,212 +1660,75 @@ def data_transfer():
     
     st.markdown("""
     この工程では、 確定した契約合意を基にして実際のデータ転送プロセスを開始します。
+    転送はバックグラウンドで実行されるため、完了を待たずに他の操作や複数の転送を続けて開始できます。
     """)
 
     if "agreement_id" not in st.session_state:
         st.info("まず契約交渉（ネゴシエーション）を完了してください。")
         return
 
-    st.info(f"Agreement ID: {st.session_state['agreement_id']}")
+    agreements = st.session_state.get("agreements", {})
+    if len(agreements) > 1:
+        # バッチ交渉などで複数の合意がある場合は転送対象を選択
+        offer_ids = list(agreements.keys())
+        current = next((i for i, a in agreements.items() if a["agreement_id"] == st.session_state["agreement_id"]), offer_ids[0])
+        selected_offer = st.selectbox("Agreement to transfer (by offer)", offer_ids, index=offer_ids.index(current),
+                                      key="transfer_offer")
+        st.session_state["agreement_id"] = agreements[selected_offer]["agreement_id"]
+        st.session_state["agreement_offer"] = agreements[selected_offer]
 
-    if st.button("Start Data Transfer", key="transfer"):
-        # ---- 事前準備 ----
-        accessible_offers = st.session_state.get('accessible_offers', {})
-        provider_endpoint = EDC_PROTOCOL  # fallback (例: "http://<provider-host>:19291")
-        asset_id = "sample-asset-1"       # fallback
-
-        # 利用可能なオファ情報から最初のものを使用
-        for _, offer_info in accessible_offers.items():
-            provider_endpoint = offer_info.get('dsp_endpoint', EDC_PROTOCOL)
-            asset_id = offer_info.get('dataset_id', 'sample-asset-1')
-            break  # 先頭のみ使用
-
-        payload = {
-            "@context": {"@vocab": "https://w3id.org/edc/v0.0.1/ns/"},
-            "@type": "TransferRequest",
-            "counterPartyAddress": provider_endpoint,
-            "protocol": "dataspace-protocol-http",
-            "contractId": st.session_state["agreement_id"],
-            "assetId": asset_id,
-            "transferType": "HttpData-PULL",
-            "dataDestination": {
-                "@type": "DataAddress",
-                "type": "HttpProxy"
-            }
-        }
-
-        transfer_id = None
-
-        # ---- 転送開始 ----
-        try:
-            with st.spinner("Starting data transfer..."):
-                response = requests.post(
-                    f"{EDC_MANAGEMENT}/management/v3/transferprocesses",
-                    headers={
-                        "Content-Type": "application/json",
-                        "X-API-Key": "password"
-                    },
-                    json=payload,
-                    timeout=30
-                )
-
-            if response.status_code in [200, 201]:
-                transfer_id = response.json().get("@id")
-                st.success(f"✅ Data transfer started! ID: {transfer_id}")
-            else:
-                st.error(f"❌ Failed to start transfer: HTTP {response.status_code}")
-                st.text(response.text)
-                return  # 転送開始に失敗した場合は以降を中止
-        except Exception as e:
-            st.error(f"❌ Error starting transfer: {e}")
-            return
-
-        # ---- 転送状態確認をシンプル化 ----
-        st.write("**⏳ Transfer started - waiting briefly before checking EDR...**")
-        # 状態確認の代わりに短い待機時間を設ける（EDRは通常すぐに利用可能）
-        time.sleep(3)
-        st.info("✅ Proceeding to EDR retrieval...")
-
-        # ---- EDR 取得（ポーリング）----
-        endpoint = None
-        auth_header = None
-
-
-
-        # サンプルに基づく正しいEDR取得方法
-        st.write("**🔗 Getting Endpoint Data Reference (EDR)...**")
-        
-        endpoint = None
-        auth_header = None
-        
-        with st.spinner("Getting EDR from transfer process..."):
-            for attempt in range(1, 16):  # 最大30秒（2秒 x 15）
-                try:
-                    time.sleep(2)
-                    # サンプルに記載されている正しい方法: GET /management/v3/edrs/<transfer process id>/dataaddress
-                    edr_response = requests.get(
-                        f"{EDC_MANAGEMENT}/management/v3/edrs/{transfer_id}/dataaddress",
-                        headers={
-                            "Content-Type": "application/json",
-                            "X-API-Key": "password"
-                        },
-                        timeout=20
-                    )
-                    
-                    if edr_response.status_code == 200:
-                        edr = edr_response.json()
-                        st.success("✅ EDR (Endpoint Data Reference) obtained!")
-                        if st.session_state.get("debug_mode"):
-                            st.json(edr)
-
-                        endpoint = edr.get("endpoint")
-                        # サンプルに記載: "authorization"フィールドを使用
-                        auth_header = edr.get("authorization")
-
-                        if endpoint and auth_header:
-                            # 環境変数プレースホルダーの処理
-                            if "${EDC_DATAPLANE_PUBLIC_URL:" in endpoint and "}" in endpoint:
-                                # ${EDC_DATAPLANE_PUBLIC_URL:default_value} からdefault_valueを抽出
-                                import re
-                                match = re.search(r'\$\{EDC_DATAPLANE_PUBLIC_URL:(.*?)\}', endpoint)
-                                if match:
-                                    endpoint = match.group(1)
-                                    st.info(f"🔧 **Extracted endpoint from placeholder**: {endpoint}")
-                            
-                            st.success(f"✅ **EDR Endpoint**: {endpoint}")
-                            st.info(f"🔑 **Authorization Token**: {auth_header[:20]}...")
-                            break
-                    else:
-                        # まだEDRが発行されていない場合
-                        if st.session_state.get("debug_mode"):
-                            st.info(f"EDR取得試行 {attempt}/15 (HTTP {edr_response.status_code})")
-                        
-                except Exception as e:
-                    if st.session_state.get("debug_mode"):
-                        st.warning(f"EDR取得試行 {attempt}/15 で例外: {e}")
-                    continue
-
-            if not endpoint or not auth_header:
-                st.error("❌ EDRを取得できませんでした（タイムアウト）。")
-                return
-
-        # ---- データフェッチ（サンプルに基づく正しい方法）----
-        st.write("**📡 Fetching data from provider...**")
-        st.write(f"- **Endpoint**: `{endpoint}`")
-        
-        try:
-            with st.spinner("Fetching data..."):
-                # サンプルに記載されている方法: エンドポイントにAuthorizationヘッダーでアクセス
-                data_response = requests.get(
-                    endpoint,
-                    headers={"Authorization": auth_header},
-                    timeout=15
-                )
-
-            st.write(f"**Response Status**: {data_response.status_code}")
-
-            if data_response.status_code == 200:
-                st.success("🎉 **Data transfer completed successfully!**")
-
-                # JSON とテキストの両対応
-                try:
-                    json_data = data_response.json()
-                    st.subheader("📊 Transferred Data (JSON)")
-                    st.json(json_data)
-                except Exception:
-                    st.subheader("📄 Transferred Data (Text)")
-                    st.text_area("Data Content:", data_response.text, height=200)
+    st.info(f"Agreement ID: {st.session_state['agreement_id']}")
 
-                st.success("✅ **End-to-End EDC Data Transfer Flow Completed!**")
-                st.info("🔄 **Flow Summary**: Asset → Policy → Contract Offer → Catalog → Negotiation → Agreement → Transfer → Data Access")
+    # ---- 事前準備 ----
+    provider_endpoint = EDC_PROTOCOL  # fallback (例: "http://<provider-host>:19291")
+    asset_id = "sample-asset-1"       # fallback
+
+    # 交渉したオファー、なければ利用可能なオファーの先頭を使用
+    offer_info = st.session_state.get("agreement_offer")
+    if not offer_info:
+        offer_info = next(iter(get_accessible_offers().values()), {})
+    provider_endpoint = offer_info.get('dsp_endpoint', provider_endpoint)
+    asset_id = offer_info.get('dataset_id', asset_id)
+
+    # 同じ合意・アセットのEDRが有効なら転送プロセスを開始せずにデータを再取得する
+    orchestrator = get_transfer_orchestrator()
+    cached_edr = orchestrator.edr_cache.get(st.session_state["agreement_id"], asset_id)
+    force_new = False
+    if cached_edr:
+        remaining = int(cached_edr["expires_at"] - time.time())
+        st.caption(f"♻️ Cached EDR available (transfer {cached_edr['transfer_id']}, expires in {remaining}s) — "
+                   "the next pull reuses it without starting a new transfer process")
+        force_new = st.checkbox("Force new transfer", key="transfer_force_new")
 
-            elif data_response.status_code == 401:
-                st.error("🔐 Authorization failed - Token may have expired.")
-                st.info("💡 新しい契約を交渉してトークンを更新してください。")
-            elif data_response.status_code == 404:
-                st.error("🔍 Data not found - Asset may not exist.")
-            else:
-                st.error(f"❌ Failed to fetch data: HTTP {data_response.status_code}")
-                st.text(f"Response: {data_response.text}")
+    if st.button("Start Data Transfer", key="transfer"):
+        trace_action("Start data transfer")
+        job_id = orchestrator.submit(st.session_state["agreement_id"], asset_id, provider_endpoint,
+                                     reuse_edr=not force_new)
+        st.session_state.setdefault("transfer_jobs", []).append(job_id)
+        st.session_state["transfer_jobs_active"] = True
+        st.toast(f"Data transfer queued ({job_id})")
 
-        except Exception as e:
-            st.error(f"❌ Error fetching data: {e}")
+    if st.session_state.get("transfer_jobs"):
+        st.subheader("📋 Transfers")
+        refresh = TRANSFER_REFRESH_INTERVAL if st.session_state.get("transfer_jobs_active") else None
+        st.fragment(render_transfer_jobs, run_every=refresh)()
 
 
-def main():
-    """Main application"""
+def render_page():
+    """Page for the selected role"""
     init_page()
     
-    # Service status indicators
+    # Service status indicators（バックグラウンドで更新された結果を表示するだけでブロックしない）
+    health = get_health_monitor().snapshot()
     col1, col2 = st.columns(2)
     
     with col1:
-        try:
-            edc_response = requests.get(f"{EDC_MANAGEMENT}/management/v3/assets", timeout=5)
-            if edc_response.status_code in [200, 405]:  # 405は正常（GETメソッドが許可されていない）
-                st.success("🟢 **EDC Connector:** Online")
-            else:
-                st.error("🔴 **EDC Connector:** Offline")
-        except:
-            st.error("🔴 **EDC Connector:** Offline")
+        render_service_status("EDC Connector", health.get("edc"))
     
     with col2:
-        try:
-            data_response = requests.get("http://data-api:8000/health", timeout=5)
-            if data_response.status_code == 200:
-                try:
-                    response_data = data_response.json()
-                    if isinstance(response_data, dict) and response_data.get("status") == "healthy":
-                        st.success("🟢 **Data API:** Online")
-                    else:
-                        st.success("🟢 **Data API:** Online")
-                except:
-                    # JSONパースエラーの場合でも200ステータスなら成功とする
-                    st.success("🟢 **Data API:** Online")
-            else:
-                st.error("🔴 **Data API:** Offline")
-        except:
-            st.error("🔴 **Data API:** Offline")
+        render_service_status("Data API", health.get("data_api"))
+    
+    render_open_breakers()
     
     st.markdown("---")
     
@@ -1218,6 +1748,9 @@ def main():
         st.markdown("*Create and manage your data assets, policies, and contract offers*")
         st.markdown("")
         
+        # 各セクションが使う一覧を並列に取得してキャッシュに載せる
+        prefetch_listings("assets", "policies", "contract_definitions")
+        
         create_asset()
         st.markdown("---")
         
@@ -1225,6 +1758,9 @@ def main():
         st.markdown("---")
         
         create_contract_offer()
+        st.markdown("---")
+        
+        sync_data_server_assets()
     
     elif role == "🛒 Data Consumer":
         st.markdown("## 🛒 Data Consumer Operations")
@@ -1239,5 +1775,21 @@ def main():
         
         data_transfer()
 
+def main():
+    """Main application"""
+    # スクリプトの1回の実行（ユーザー操作）を1つのトレースとして記録
+    traces = st.session_state.setdefault("traces", deque(maxlen=TRACE_HISTORY))
+    with span("Page render", "ui") as run, deadline(ACTION_DEADLINE):
+        traces.append(run)
+        try:
+            render_page()
+            if st.session_state.debug_mode:
+                render_traces()
+                render_breakers()
+        finally:
+            # 通信のなかった再実行（ウィジェット操作・進捗の再描画、st.rerun()）は履歴に残さない
+            if not run.children and "action" not in run.attributes:
+                traces.remove(run)
+
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,571 @@
+#!/usr/bin/env python3
+"""
+Mock EDC connector
+==================
+
+In-process stand-in for the connector (Management API v3, DSP catalog and
+public data plane) so the UI flows can be exercised and benchmarked without
+a real connector or a remote provider. It plays both roles: contract
+definitions created through the provider API show up in its own catalog,
+and negotiations / transfers against any counterPartyAddress are served
+locally.
+
+Implemented endpoints (under /management/v3):
+
+    assets, policydefinitions, contractdefinitions   POST / PUT / DELETE /{id} / POST /request
+    catalog/request                                  datasets of the contract definitions + synthetic ones
+    contractnegotiations                             POST, GET /{id}   REQUESTED -> AGREED -> FINALIZED | TERMINATED
+    transferprocesses                                POST, GET /{id}   REQUESTED -> STARTED | TERMINATED
+    edrs/{transfer id}/dataaddress                   EDR once the transfer is STARTED (?auto_refresh=true renews it)
+
+plus GET /public (data plane, needs the EDR token), GET /health,
+GET /mock/stats and POST /mock/config (change behaviour at runtime).
+Callback addresses receive ContractNegotiation* / TransferProcess* events
+in the same shape as EDC sends them.
+
+Every request to the Management API and data plane is delayed by
+latency ± jitter and fails with HTTP 503 at failure_rate.
+
+    python mock_edc_connector.py serve --port 19193 --latency 0.05 --negotiation-time 2
+    python mock_edc_connector.py benchmark --count 200 --concurrency 32 --latency 0.02
+
+The benchmark starts the mock on a free local port and drives the full flow
+with edc_batch_runner, reporting per-stage latency distributions.
+"""
+
+import argparse
+import asyncio
+import base64
+import json
+import os
+import random
+import socket
+import threading
+import time
+import uuid
+from collections import Counter
+from typing import Any, Dict, List, Optional
+
+import httpx
+import uvicorn
+from fastapi import FastAPI, Request, Response
+from fastapi.responses import JSONResponse, StreamingResponse
+
+EDC_NS = "https://w3id.org/edc/v0.0.1/ns/"
+MANAGEMENT_V3 = "/management/v3"
+
+# Defaults for every behaviour setting (seconds / probabilities / counts)
+MOCK_EDC_LATENCY = float(os.getenv("MOCK_EDC_LATENCY", "0.01"))
+MOCK_EDC_JITTER = float(os.getenv("MOCK_EDC_JITTER", "0.005"))
+MOCK_EDC_FAILURE_RATE = float(os.getenv("MOCK_EDC_FAILURE_RATE", "0"))
+MOCK_EDC_CATALOG_SIZE = int(os.getenv("MOCK_EDC_CATALOG_SIZE", "0"))
+MOCK_EDC_NEGOTIATION_TIME = float(os.getenv("MOCK_EDC_NEGOTIATION_TIME", "1"))
+MOCK_EDC_NEGOTIATION_FAILURE_RATE = float(os.getenv("MOCK_EDC_NEGOTIATION_FAILURE_RATE", "0"))
+MOCK_EDC_TRANSFER_TIME = float(os.getenv("MOCK_EDC_TRANSFER_TIME", "0.5"))
+MOCK_EDC_TRANSFER_FAILURE_RATE = float(os.getenv("MOCK_EDC_TRANSFER_FAILURE_RATE", "0"))
+MOCK_EDC_TOKEN_TTL = float(os.getenv("MOCK_EDC_TOKEN_TTL", "300"))
+MOCK_EDC_DATA_RECORDS = int(os.getenv("MOCK_EDC_DATA_RECORDS", "100"))
+MOCK_EDC_PARTICIPANT_ID = os.getenv("MOCK_EDC_PARTICIPANT_ID", "mock-participant.handson.dataspace.internal")
+
+# EDC's QuerySpec default page size
+DEFAULT_QUERY_LIMIT = 50
+
+ENTITY_KINDS = ("assets", "policydefinitions", "contractdefinitions")
+
+
+class MockConfig:
+    """Behaviour of the mock; the *_time values are means, each process varies ±50%"""
+
+    SETTINGS = {
+        "latency": MOCK_EDC_LATENCY,
+        "jitter": MOCK_EDC_JITTER,
+        "failure_rate": MOCK_EDC_FAILURE_RATE,
+        "catalog_size": MOCK_EDC_CATALOG_SIZE,
+        "negotiation_time": MOCK_EDC_NEGOTIATION_TIME,
+        "negotiation_failure_rate": MOCK_EDC_NEGOTIATION_FAILURE_RATE,
+        "transfer_time": MOCK_EDC_TRANSFER_TIME,
+        "transfer_failure_rate": MOCK_EDC_TRANSFER_FAILURE_RATE,
+        "token_ttl": MOCK_EDC_TOKEN_TTL,
+        "data_records": MOCK_EDC_DATA_RECORDS,
+    }
+
+    def __init__(self, **overrides):
+        for name, default in self.SETTINGS.items():
+            setattr(self, name, default)
+        self.update(overrides)
+
+    def update(self, values: Dict[str, Any]):
+        for name, value in values.items():
+            if name not in self.SETTINGS:
+                raise ValueError(f"unknown setting: {name}")
+            if value is not None:
+                setattr(self, name, type(self.SETTINGS[name])(value))
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {name: getattr(self, name) for name in self.SETTINGS}
+
+
+def _varied(mean: float) -> float:
+    return mean * random.uniform(0.5, 1.5)
+
+
+def _field(entity: Dict[str, Any], name: str):
+    """Value of a (possibly namespaced) field; "id" is the entity's @id"""
+    name = name[len(EDC_NS):] if name.startswith(EDC_NS) else name
+    if name in ("id", "@id"):
+        return entity.get("@id")
+    if name in entity:
+        return entity[name]
+    return (entity.get("properties") or {}).get(name)
+
+
+def _matches(entity: Dict[str, Any], criterion: Dict[str, Any]) -> bool:
+    value = _field(entity, criterion.get("operandLeft", ""))
+    operator = criterion.get("operator", "=")
+    right = criterion.get("operandRight")
+    if operator == "=":
+        return value == right
+    if operator == "in":
+        return value in (right or [])
+    if operator == "like":
+        pattern = str(right)
+        text = str(value) if value is not None else ""
+        inner = pattern.strip("%")
+        if pattern.startswith("%") and pattern.endswith("%"):
+            return inner in text
+        if pattern.endswith("%"):
+            return text.startswith(inner)
+        if pattern.startswith("%"):
+            return text.endswith(inner)
+        return text == pattern
+    return False
+
+
+def apply_query(entities: List[Dict[str, Any]], spec: Optional[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Filter / sort / page entities like the connector applies a QuerySpec"""
+    spec = spec or {}
+    result = [e for e in entities if all(_matches(e, c) for c in spec.get("filterExpression") or [])]
+    if spec.get("sortField"):
+        result.sort(key=lambda e: str(_field(e, spec["sortField"]) or ""),
+                    reverse=spec.get("sortOrder", "ASC").upper() == "DESC")
+    offset = int(spec.get("offset", 0))
+    limit = int(spec.get("limit", DEFAULT_QUERY_LIMIT))
+    return result[offset:offset + limit]
+
+
+def _token(claims: Dict[str, Any]) -> str:
+    """Unsigned JWT-shaped token (only "exp" is read by the UI)"""
+    def encode(part: Dict[str, Any]) -> str:
+        return base64.urlsafe_b64encode(json.dumps(part).encode()).decode().rstrip("=")
+    return f"{encode({'alg': 'none', 'typ': 'JWT'})}.{encode(claims)}.mock"
+
+
+class MockConnector:
+    """In-memory connector state"""
+
+    def __init__(self, config: Optional[MockConfig] = None, participant_id: str = MOCK_EDC_PARTICIPANT_ID):
+        self.config = config or MockConfig()
+        self.participant_id = participant_id
+        self.entities: Dict[str, Dict[str, Dict[str, Any]]] = {kind: {} for kind in ENTITY_KINDS}
+        self.negotiations: Dict[str, Dict[str, Any]] = {}
+        self.agreements: Dict[str, Dict[str, Any]] = {}
+        self.transfers: Dict[str, Dict[str, Any]] = {}
+        self.tokens: Dict[str, Dict[str, Any]] = {}
+        self.stats: Counter = Counter()
+        self._tasks = set()
+
+    # ---- Catalog ----
+    def datasets(self) -> List[Dict[str, Any]]:
+        """One dataset per asset offered by a contract definition, then the synthetic ones"""
+        assets = self.entities["assets"]
+        policies = self.entities["policydefinitions"]
+        datasets: Dict[str, Dict[str, Any]] = {}
+        for definition in self.entities["contractdefinitions"].values():
+            selector = definition.get("assetsSelector") or []
+            policy = (policies.get(definition.get("contractPolicyId")) or {}).get("policy") or {}
+            for asset in assets.values():
+                if not all(_matches(asset, c) for c in selector):
+                    continue
+                dataset = datasets.setdefault(asset["@id"], {
+                    "@id": asset["@id"],
+                    "@type": "dcat:Dataset",
+                    "odrl:hasPolicy": [],
+                    "name": (asset.get("properties") or {}).get("name"),
+                })
+                dataset["odrl:hasPolicy"].append(self._offer(definition["@id"], asset["@id"], policy))
+        synthetic = [{
+            "@id": f"mock-dataset-{k}",
+            "@type": "dcat:Dataset",
+            "odrl:hasPolicy": [self._offer("mock-contract", f"mock-dataset-{k}", {})],
+            "name": f"Mock dataset {k}",
+        } for k in range(self.config.catalog_size)]
+        return list(datasets.values()) + synthetic
+
+    def _offer(self, definition_id: str, asset_id: str, policy: Dict[str, Any]) -> Dict[str, Any]:
+        offer_id = ":".join(
+            base64.b64encode(part.encode()).decode()
+            for part in (definition_id, asset_id, str(uuid.uuid5(uuid.NAMESPACE_URL, definition_id + asset_id)))
+        )
+        return {
+            "@id": offer_id,
+            "@type": "odrl:Offer",
+            "odrl:permission": policy.get("odrl:permission", []),
+            "odrl:prohibition": policy.get("odrl:prohibition", []),
+            "odrl:obligation": policy.get("odrl:obligation", []),
+        }
+
+    def catalog(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            "@id": str(uuid.uuid4()),
+            "@type": "dcat:Catalog",
+            "dcat:dataset": apply_query(self.datasets(), request.get("querySpec")),
+            "dspace:participantId": self.participant_id,
+            "@context": {"@vocab": EDC_NS, "dcat": "http://www.w3.org/ns/dcat#",
+                         "odrl": "http://www.w3.org/ns/odrl/2/", "dspace": "https://w3id.org/dspace/v0.8/"},
+        }
+
+    # ---- Negotiations / transfers ----
+    def start_negotiation(self, request: Dict[str, Any]) -> str:
+        negotiation_id = str(uuid.uuid4())
+        policy = request.get("policy") or {}
+        target = policy.get("odrl:target") or policy.get("target") or {}
+        process = {
+            "id": negotiation_id,
+            "created": time.time(),
+            "duration": _varied(self.config.negotiation_time),
+            "fails": random.random() < self.config.negotiation_failure_rate,
+            "asset_id": target.get("@id") if isinstance(target, dict) else target,
+            "agreement_id": str(uuid.uuid4()),
+            "callbacks": request.get("callbackAddresses") or [],
+        }
+        self.negotiations[negotiation_id] = process
+        self._schedule(process, "contract.negotiation", self._negotiation_event)
+        return negotiation_id
+
+    def negotiation_state(self, process: Dict[str, Any]) -> str:
+        elapsed = time.time() - process["created"]
+        if elapsed < process["duration"] / 2:
+            return "REQUESTED"
+        if elapsed < process["duration"]:
+            return "AGREED"
+        if process["fails"]:
+            return "TERMINATED"
+        self.agreements.setdefault(process["agreement_id"], {"asset_id": process["asset_id"]})
+        return "FINALIZED"
+
+    def negotiation(self, process: Dict[str, Any]) -> Dict[str, Any]:
+        state = self.negotiation_state(process)
+        body = {"@type": "ContractNegotiation", "@id": process["id"], "type": "CONSUMER", "state": state}
+        if state == "FINALIZED":
+            body["contractAgreementId"] = process["agreement_id"]
+        elif state == "TERMINATED":
+            body["errorDetail"] = "Mock negotiation terminated"
+        return body
+
+    def start_transfer(self, request: Dict[str, Any]) -> Optional[str]:
+        agreement = self.agreements.get(request.get("contractId"))
+        if agreement is None:
+            return None
+        transfer_id = str(uuid.uuid4())
+        process = {
+            "id": transfer_id,
+            "created": time.time(),
+            "duration": _varied(self.config.transfer_time),
+            "fails": random.random() < self.config.transfer_failure_rate,
+            "asset_id": request.get("assetId") or agreement["asset_id"],
+            "callbacks": request.get("callbackAddresses") or [],
+            "token": None,
+        }
+        self.transfers[transfer_id] = process
+        self._schedule(process, "transfer.process", self._transfer_event)
+        return transfer_id
+
+    def transfer_state(self, process: Dict[str, Any]) -> str:
+        if time.time() - process["created"] < process["duration"]:
+            return "REQUESTED"
+        return "TERMINATED" if process["fails"] else "STARTED"
+
+    def edr(self, process: Dict[str, Any], base_url: str, refresh: bool = False) -> Dict[str, Any]:
+        token = self.tokens.get(process["token"]) if process["token"] else None
+        if token is None or (refresh and token["exp"] - time.time() < self.config.token_ttl / 2):
+            exp = time.time() + self.config.token_ttl
+            value = _token({"exp": int(exp), "sub": process["id"], "jti": uuid.uuid4().hex})
+            self.tokens[value] = {"transfer_id": process["id"], "exp": exp}
+            process["token"] = value
+        return {
+            "@type": "DataAddress",
+            "endpointType": "https://w3id.org/idsa/v4.1/HTTP",
+            "endpoint": f"{base_url.rstrip('/')}/public",
+            "authorization": process["token"],
+        }
+
+    def data_records(self, asset_id: str):
+        """Streamed JSON array body of the data plane"""
+        count = self.config.data_records
+        yield b"["
+        for start in range(0, count, 1000):
+            chunk = ",".join(
+                json.dumps({"id": i, "asset": asset_id, "value": random.random()})
+                for i in range(start, min(count, start + 1000))
+            )
+            yield (b"," if start else b"") + chunk.encode()
+        yield b"]"
+
+    # ---- Callbacks ----
+    def _schedule(self, process: Dict[str, Any], event_prefix: str, event):
+        callbacks = [c for c in process["callbacks"]
+                     if any(e.startswith(event_prefix) for e in c.get("events") or [event_prefix])]
+        if not callbacks:
+            return
+        task = asyncio.get_running_loop().create_task(self._notify(process, callbacks, event))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _notify(self, process: Dict[str, Any], callbacks: List[Dict[str, Any]], event):
+        await asyncio.sleep(process["duration"])
+        body = event(process)
+        async with httpx.AsyncClient(timeout=5) as client:
+            for callback in callbacks:
+                try:
+                    await client.post(callback["uri"], json=body)
+                except httpx.HTTPError:
+                    pass
+
+    def _negotiation_event(self, process: Dict[str, Any]) -> Dict[str, Any]:
+        state = self.negotiation_state(process)
+        payload = {"contractNegotiationId": process["id"]}
+        if state == "FINALIZED":
+            payload["contractAgreement"] = {"@id": process["agreement_id"], "assetId": process["asset_id"]}
+        return {"id": str(uuid.uuid4()), "at": int(time.time() * 1000),
+                "type": f"ContractNegotiation{state.capitalize()}", "payload": payload}
+
+    def _transfer_event(self, process: Dict[str, Any]) -> Dict[str, Any]:
+        state = self.transfer_state(process)
+        return {"id": str(uuid.uuid4()), "at": int(time.time() * 1000),
+                "type": f"TransferProcess{state.capitalize()}",
+                "payload": {"transferProcessId": process["id"], "assetId": process["asset_id"]}}
+
+
+def _error(status: int, message: str) -> JSONResponse:
+    # Management API errors are arrays of {"message", "type"}
+    return JSONResponse([{"message": message, "type": "ObjectConflict" if status == 409 else "MockError"}],
+                        status_code=status)
+
+
+def create_app(connector: Optional[MockConnector] = None) -> FastAPI:
+    connector = connector or MockConnector()
+    app = FastAPI(title="Mock EDC Connector")
+    app.state.connector = connector
+
+    @app.middleware("http")
+    async def simulate_network(request: Request, call_next):
+        path = request.url.path
+        if path.startswith(MANAGEMENT_V3) or path == "/public":
+            config = connector.config
+            connector.stats[f"{request.method} {_route_name(path)}"] += 1
+            delay = random.gauss(config.latency, config.jitter) if config.jitter else config.latency
+            if delay > 0:
+                await asyncio.sleep(delay)
+            if random.random() < config.failure_rate:
+                connector.stats["injected failures"] += 1
+                return _error(503, "Mock failure")
+        return await call_next(request)
+
+    # ---- Provider entities ----
+    @app.post(MANAGEMENT_V3 + "/{kind}/request")
+    async def query_entities(kind: str, request: Request):
+        if kind == "catalog":
+            return connector.catalog(await request.json())
+        if kind not in ENTITY_KINDS:
+            return _error(404, f"Unknown resource: {kind}")
+        spec = await request.json() if await request.body() else None
+        return apply_query(list(connector.entities[kind].values()), spec)
+
+    @app.post(MANAGEMENT_V3 + "/{kind}")
+    async def create(kind: str, request: Request):
+        body = await request.json()
+        if kind == "contractnegotiations":
+            return _id_response(connector.start_negotiation(body))
+        if kind == "transferprocesses":
+            transfer_id = connector.start_transfer(body)
+            if transfer_id is None:
+                return _error(400, f"Unknown contract agreement: {body.get('contractId')}")
+            return _id_response(transfer_id)
+        if kind not in ENTITY_KINDS:
+            return _error(404, f"Unknown resource: {kind}")
+        entity_id = body.get("@id") or str(uuid.uuid4())
+        if entity_id in connector.entities[kind]:
+            return _error(409, f"Object of type {kind} with ID={entity_id} already exists")
+        connector.entities[kind][entity_id] = dict(body, **{"@id": entity_id, "createdAt": int(time.time() * 1000)})
+        return _id_response(entity_id)
+
+    @app.put(MANAGEMENT_V3 + "/{kind}")
+    async def update(kind: str, request: Request):
+        body = await request.json()
+        if kind not in ENTITY_KINDS:
+            return _error(404, f"Unknown resource: {kind}")
+        current = connector.entities[kind].get(body.get("@id"))
+        if current is None:
+            return _error(404, f"Object of type {kind} with ID={body.get('@id')} was not found")
+        connector.entities[kind][body["@id"]] = dict(body, createdAt=current.get("createdAt"))
+        return Response(status_code=204)
+
+    @app.delete(MANAGEMENT_V3 + "/{kind}/{entity_id}")
+    async def delete(kind: str, entity_id: str):
+        if kind not in ENTITY_KINDS or connector.entities[kind].pop(entity_id, None) is None:
+            return _error(404, f"Object of type {kind} with ID={entity_id} was not found")
+        return Response(status_code=204)
+
+    # ---- Consumer processes ----
+    @app.get(MANAGEMENT_V3 + "/contractnegotiations/{negotiation_id}")
+    async def get_negotiation(negotiation_id: str):
+        process = connector.negotiations.get(negotiation_id)
+        if process is None:
+            return _error(404, f"Negotiation {negotiation_id} not found")
+        return connector.negotiation(process)
+
+    @app.get(MANAGEMENT_V3 + "/transferprocesses/{transfer_id}")
+    async def get_transfer(transfer_id: str):
+        process = connector.transfers.get(transfer_id)
+        if process is None:
+            return _error(404, f"Transfer process {transfer_id} not found")
+        return {"@type": "TransferProcess", "@id": transfer_id, "state": connector.transfer_state(process),
+                "assetId": process["asset_id"]}
+
+    @app.get(MANAGEMENT_V3 + "/edrs/{transfer_id}/dataaddress")
+    async def get_edr(transfer_id: str, request: Request, auto_refresh: bool = False):
+        process = connector.transfers.get(transfer_id)
+        if process is None or connector.transfer_state(process) != "STARTED":
+            return _error(404, f"EDR for transfer {transfer_id} not found")
+        return connector.edr(process, str(request.base_url), refresh=auto_refresh)
+
+    # Registered after the process lookups above so those routes match first
+    @app.get(MANAGEMENT_V3 + "/{kind}/{entity_id}")
+    async def get_entity(kind: str, entity_id: str):
+        entity = connector.entities[kind].get(entity_id) if kind in ENTITY_KINDS else None
+        if entity is None:
+            return _error(404, f"Object of type {kind} with ID={entity_id} was not found")
+        return entity
+
+    # ---- Data plane ----
+    @app.get("/public")
+    async def public_data(request: Request):
+        token = connector.tokens.get(request.headers.get("authorization", ""))
+        if token is None or token["exp"] < time.time():
+            return JSONResponse({"error": "Unauthorized"}, status_code=401)
+        process = connector.transfers[token["transfer_id"]]
+        return StreamingResponse(connector.data_records(process["asset_id"]), media_type="application/json")
+
+    # ---- Mock control ----
+    @app.get("/health")
+    async def health():
+        return {"status": "healthy", "mock": True}
+
+    @app.get("/mock/stats")
+    async def stats():
+        return {
+            "config": connector.config.snapshot(),
+            "entities": {kind: len(items) for kind, items in connector.entities.items()},
+            "negotiations": len(connector.negotiations),
+            "transfers": len(connector.transfers),
+            "requests": dict(connector.stats),
+        }
+
+    @app.post("/mock/config")
+    async def configure(request: Request):
+        try:
+            connector.config.update(await request.json())
+        except (ValueError, TypeError) as e:
+            return _error(400, str(e))
+        return connector.config.snapshot()
+
+    return app
+
+
+def _id_response(entity_id: str) -> Dict[str, Any]:
+    return {"@type": "IdResponse", "@id": entity_id, "createdAt": int(time.time() * 1000)}
+
+
+def _route_name(path: str) -> str:
+    """Path with ids replaced, for request counters"""
+    parts = path[len(MANAGEMENT_V3):].strip("/").split("/") if path.startswith(MANAGEMENT_V3) else [path.strip("/")]
+    if len(parts) > 1 and parts[1] not in ("request", "dataaddress"):
+        parts[1] = "{id}"
+    return "/".join(parts)
+
+
+class MockServer:
+    """Runs the mock with uvicorn in a daemon thread (for benchmarks and scripts)"""
+
+    def __init__(self, connector: Optional[MockConnector] = None, host: str = "127.0.0.1", port: int = 0):
+        self.connector = connector or MockConnector()
+        if not port:
+            with socket.socket() as s:
+                s.bind((host, 0))
+                port = s.getsockname()[1]
+        self.url = f"http://{host}:{port}"
+        self._server = uvicorn.Server(uvicorn.Config(create_app(self.connector), host=host, port=port,
+                                                     log_level="warning"))
+        self._thread = threading.Thread(target=self._server.run, name="mock-edc", daemon=True)
+
+    def __enter__(self):
+        self._thread.start()
+        while not self._server.started:
+            time.sleep(0.01)
+        return self
+
+    def __exit__(self, *exc):
+        self._server.should_exit = True
+        self._thread.join(5)
+
+
+def _benchmark(args, config: MockConfig):
+    from edc_batch_runner import print_report, run_manifest
+
+    with MockServer(MockConnector(config)) as server:
+        manifest = {
+            "management_url": server.url,
+            "provider_dsp": f"{server.url}/protocol",
+            "callback_url": "",
+            "count": args.count,
+            "concurrency": args.concurrency,
+            "transfer": not args.no_transfer,
+            "defaults": {"asset_id": f"bench-{uuid.uuid4().hex[:6]}-{{i}}",
+                         "base_url": f"{server.url}/source"},
+        }
+        print(f"Mock connector at {server.url}: {json.dumps(config.snapshot())}\n")
+        report = asyncio.run(run_manifest(manifest))
+        print_report(report)
+        print("\nRequests served by the mock:")
+        for route, count in sorted(server.connector.stats.items()):
+            print(f"  {route:<48}{count:>8}")
+    if args.report:
+        with open(args.report, "w", encoding="utf-8") as f:
+            json.dump({"config": config.snapshot(), **report}, f, indent=2, ensure_ascii=False)
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Mock EDC connector and end-to-end flow benchmark")
+    commands = parser.add_subparsers(dest="command", required=True)
+    serve = commands.add_parser("serve", help="run the mock connector")
+    serve.add_argument("--host", default="0.0.0.0")
+    serve.add_argument("--port", type=int, default=19193)
+    bench = commands.add_parser("benchmark", help="run the full flow against an in-process mock")
+    bench.add_argument("--count", type=int, default=100)
+    bench.add_argument("--concurrency", type=int, default=16)
+    bench.add_argument("--no-transfer", action="store_true")
+    bench.add_argument("--report", help="also write the report as JSON to this file")
+    for command in (serve, bench):
+        for name, default in MockConfig.SETTINGS.items():
+            command.add_argument(f"--{name.replace('_', '-')}", type=type(default), default=default)
+    args = parser.parse_args(argv)
+
+    config = MockConfig(**{name: getattr(args, name) for name in MockConfig.SETTINGS})
+    if args.command == "serve":
+        uvicorn.run(create_app(MockConnector(config)), host=args.host, port=args.port)
+    else:
+        _benchmark(args, config)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,358 @@
+#!/usr/bin/env python3
+"""
+ODRL policy engine
+==================
+
+Evaluates the ODRL policies attached to catalog offers against the
+consumer's own attributes (participant ID, ...).
+
+Each policy is compiled once into a tree of predicates and memoized by a
+canonical hash of its rules. Offer-specific keys such as "@id" and
+"odrl:target" are not part of the hash, so thousands of offers that share
+a handful of policies only compile a handful of times.
+
+Supported:
+- atomic constraints with eq / neq / isAnyOf / isNoneOf
+- logical constraints with and / or / xone (andSequence is treated as and)
+- any left operand present in the evaluation context
+
+Constraints whose left operand or operator cannot be evaluated on the
+consumer side are skipped (permissive); the provider still enforces them
+during negotiation.
+
+Run this file directly to benchmark it on a synthetic catalog:
+
+    python policy_engine.py --offers 20000 --policies 8
+"""
+
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, List, Optional, Tuple
+
+import orjson
+
+EDC_NS = "https://w3id.org/edc/v0.0.1/ns/"
+ODRL_NS = "http://www.w3.org/ns/odrl/2/"
+
+PARTICIPANT_ID_OPERAND = "participantId"
+
+# Number of compiled policies kept in memory, and verdicts kept per policy
+POLICY_CACHE_SIZE = 1024
+VERDICT_CACHE_SIZE = 64
+
+# (allowed, message); allowed is None when nothing could be evaluated
+Verdict = Tuple[Optional[bool], Optional[str]]
+Predicate = Callable[[Dict[str, Any]], Verdict]
+
+_RULE_KEYS = ("odrl:permission", "odrl:prohibition", "odrl:obligation")
+_LOGICAL_OPERATORS = ("and", "or", "xone", "andSequence")
+
+
+def _local_name(value: Any) -> str:
+    """Strip JSON-LD prefixes/namespaces: 'odrl:eq', 'http://.../odrl/2/eq' -> 'eq'"""
+    if isinstance(value, dict):
+        value = value.get("@id", "")
+    if not isinstance(value, str):
+        return ""
+    for prefix in (EDC_NS, ODRL_NS, "edc:", "odrl:"):
+        if value.startswith(prefix):
+            return value[len(prefix):]
+    return value
+
+
+def _as_list(value: Any) -> List[Any]:
+    if value is None:
+        return []
+    if isinstance(value, list):
+        return value
+    return [value]
+
+
+def _right_value(value: Any) -> Any:
+    """Unwrap JSON-LD value objects ({"@value": ...} / {"@id": ...})"""
+    if isinstance(value, dict):
+        return value.get("@value", value.get("@id"))
+    if isinstance(value, list):
+        return [_right_value(v) for v in value]
+    return value
+
+
+def _get(obj: Dict[str, Any], name: str, default: Any = None) -> Any:
+    """Read an ODRL property whether or not it carries the odrl: prefix"""
+    for key in (f"odrl:{name}", name, f"{ODRL_NS}{name}"):
+        if key in obj:
+            return obj[key]
+    return default
+
+
+# ---- Messages ----
+
+def _participant_message(allowed: bool, operator: str, required: Any, actual: Any) -> str:
+    if operator == "eq":
+        if allowed:
+            return f"✅ Participant ID matches: {required}"
+        return f"❌ Participant ID mismatch. Required: {required}, Your ID: {actual}"
+    if allowed:
+        return f"✅ Participant ID allowed ({operator} {required})"
+    return f"❌ Participant ID not allowed ({operator} {required}), Your ID: {actual}"
+
+
+def _message(left: str, allowed: bool, operator: str, required: Any, actual: Any) -> str:
+    if left == PARTICIPANT_ID_OPERAND:
+        return _participant_message(allowed, operator, required, actual)
+    mark = "✅" if allowed else "❌"
+    return f"{mark} {left} {operator} {required} (yours: {actual})"
+
+
+# ---- Compilation ----
+
+_OPERATORS: Dict[str, Callable[[Any, Any], bool]] = {
+    "eq": lambda actual, required: actual == required,
+    "neq": lambda actual, required: actual != required,
+    "isAnyOf": lambda actual, required: actual in _as_list(required),
+    "isNoneOf": lambda actual, required: actual not in _as_list(required),
+}
+
+
+def _compile_atomic(constraint: Dict[str, Any]) -> Predicate:
+    left = _local_name(_get(constraint, "leftOperand"))
+    operator = _local_name(_get(constraint, "operator", {}))
+    if operator in ("EQ", "NEQ"):
+        operator = operator.lower()
+    required = _right_value(_get(constraint, "rightOperand"))
+    compare = _OPERATORS.get(operator)
+
+    if compare is None:
+        return lambda context: (None, None)
+
+    def predicate(context: Dict[str, Any]) -> Verdict:
+        if left not in context:
+            return None, None
+        actual = context[left]
+        allowed = compare(actual, required)
+        return allowed, _message(left, allowed, operator, required, actual)
+
+    return predicate
+
+
+def _compile_logical(operator: str, operands: List[Any]) -> Predicate:
+    children = [_compile_constraint(c) for c in _as_list(operands) if isinstance(c, dict)]
+
+    def predicate(context: Dict[str, Any]) -> Verdict:
+        verdicts = [child(context) for child in children]
+        passed = [message for allowed, message in verdicts if allowed]
+        failed = [message for allowed, message in verdicts if allowed is False]
+        unknown = len(verdicts) - len(passed) - len(failed)
+
+        # A branch that cannot be evaluated here may still hold on the provider side
+        if operator == "or":
+            allowed = True if passed else (None if unknown else False)
+        elif operator == "xone":
+            if len(passed) > 1:
+                return False, f"❌ Exactly one constraint must hold (xone), but {len(passed)} do: " + "; ".join(passed)
+            allowed = None if unknown else len(passed) == 1
+        else:
+            allowed = False if failed else (True if passed else None)
+
+        if allowed is None:
+            return None, None
+        if allowed:
+            return True, "; ".join(passed)
+        return False, "; ".join(failed)
+
+    return predicate
+
+
+def _compile_constraint(constraint: Dict[str, Any]) -> Predicate:
+    for operator in _LOGICAL_OPERATORS:
+        operands = _get(constraint, operator)
+        if operands is not None:
+            return _compile_logical("and" if operator == "andSequence" else operator, operands)
+    return _compile_atomic(constraint)
+
+
+def _compile_permission(permission: Dict[str, Any]) -> Predicate:
+    constraints: List[Any] = []
+    for key in ("odrl:constraint", "constraint", "odrl:constraints", "constraints"):
+        constraints.extend(_as_list(permission.get(key)))
+    return _compile_logical("and", constraints)
+
+
+class CompiledPolicy:
+    """Policy compiled into a predicate over an evaluation context"""
+
+    def __init__(self, rules: Dict[str, Any], policy_hash: str):
+        self.policy_hash = policy_hash
+        permissions = [p for p in _as_list(rules.get("odrl:permission")) if isinstance(p, dict)]
+        self.has_permissions = bool(permissions)
+        self._permissions = [_compile_permission(p) for p in permissions]
+        self._verdicts: Dict[Hashable, Tuple[bool, str]] = {}
+
+    def evaluate(self, context: Dict[str, Any]) -> Tuple[bool, str]:
+        """Return (allowed, message), remembering the verdict per context"""
+        try:
+            key = tuple(sorted(context.items()))
+            hash(key)
+        except TypeError:
+            return self._evaluate(context)
+        verdict = self._verdicts.get(key)
+        if verdict is None:
+            verdict = self._evaluate(context)
+            if len(self._verdicts) >= VERDICT_CACHE_SIZE:
+                self._verdicts.clear()
+            self._verdicts[key] = verdict
+        return verdict
+
+    def _evaluate(self, context: Dict[str, Any]) -> Tuple[bool, str]:
+        """Every permission must be satisfied"""
+        if not self.has_permissions:
+            return True, "No permissions defined"
+        messages = []
+        for permission in self._permissions:
+            allowed, message = permission(context)
+            if allowed is False:
+                return False, message
+            if allowed:
+                messages.append(message)
+        if not messages:
+            return True, "No participant constraints found"
+        return True, "; ".join(messages)
+
+
+def _policy_rules(policy: Dict[str, Any]) -> Dict[str, Any]:
+    """The parts of a policy that decide access (offer ids and targets excluded)"""
+    rules = {key: policy[key] for key in _RULE_KEYS if key in policy}
+    if "odrl:permission" not in rules and "permission" in policy:
+        rules["odrl:permission"] = policy["permission"]
+    return rules
+
+
+def policy_hash(policy: Dict[str, Any]) -> str:
+    """Canonical hash of a policy's rules, independent of key order and offer id"""
+    canonical = orjson.dumps(_policy_rules(policy), option=orjson.OPT_SORT_KEYS)
+    return hashlib.sha256(canonical).hexdigest()
+
+
+_compiled: "OrderedDict[str, CompiledPolicy]" = OrderedDict()
+_compiled_lock = threading.Lock()
+_stats = {"hits": 0, "misses": 0}
+
+
+def compile_policy(policy: Dict[str, Any]) -> CompiledPolicy:
+    """Compile a policy, reusing an earlier compilation of identical rules"""
+    key = policy_hash(policy)
+    with _compiled_lock:
+        compiled = _compiled.get(key)
+        if compiled is not None:
+            _compiled.move_to_end(key)
+            _stats["hits"] += 1
+            return compiled
+        _stats["misses"] += 1
+
+    compiled = CompiledPolicy(_policy_rules(policy), key)
+    with _compiled_lock:
+        _compiled[key] = compiled
+        while len(_compiled) > POLICY_CACHE_SIZE:
+            _compiled.popitem(last=False)
+    return compiled
+
+
+def cache_stats() -> Dict[str, int]:
+    with _compiled_lock:
+        return {**_stats, "size": len(_compiled)}
+
+
+def clear_cache():
+    with _compiled_lock:
+        _compiled.clear()
+        _stats.update(hits=0, misses=0)
+
+
+def evaluate_policy(policy: Optional[Dict[str, Any]], context: Dict[str, Any]) -> Tuple[bool, str]:
+    """Evaluate a catalog offer policy against the consumer's attributes
+
+    context maps left operand names (without namespace) to the consumer's
+    values, e.g. {"participantId": "..."}.
+    """
+    if not policy or not any(context.values()):
+        return True, "No policy constraints"
+    return compile_policy(policy).evaluate(context)
+
+
+# ---- Benchmark ----
+
+def _synthetic_catalog(offers: int, policies: int) -> List[Dict[str, Any]]:
+    """Offers spread over a few distinct policies, like a real provider catalog"""
+    templates = []
+    for i in range(policies):
+        kind = i % 4
+        if kind == 0:
+            permission = {"odrl:action": {"@id": "odrl:use"}}
+        elif kind == 1:
+            permission = {"odrl:action": {"@id": "odrl:use"}, "odrl:constraint": {
+                "odrl:leftOperand": {"@id": f"{EDC_NS}participantId"},
+                "odrl:operator": {"@id": "odrl:eq"},
+                "odrl:rightOperand": f"participant-{i}"}}
+        elif kind == 2:
+            permission = {"odrl:action": {"@id": "odrl:use"}, "odrl:constraint": {"odrl:or": [
+                {"odrl:leftOperand": {"@id": f"{EDC_NS}participantId"},
+                 "odrl:operator": {"@id": "odrl:isAnyOf"},
+                 "odrl:rightOperand": [f"participant-{n}" for n in range(i, i + 5)]},
+                {"odrl:leftOperand": {"@id": f"{EDC_NS}region"},
+                 "odrl:operator": {"@id": "odrl:eq"},
+                 "odrl:rightOperand": "jp"}]}}
+        else:
+            permission = {"odrl:action": {"@id": "odrl:use"}, "odrl:constraint": {"odrl:and": [
+                {"odrl:leftOperand": {"@id": f"{EDC_NS}participantId"},
+                 "odrl:operator": {"@id": "odrl:neq"},
+                 "odrl:rightOperand": f"participant-{i}"},
+                {"odrl:leftOperand": {"@id": f"{EDC_NS}region"},
+                 "odrl:operator": {"@id": "odrl:isNoneOf"},
+                 "odrl:rightOperand": ["us", "eu"]}]}}
+        templates.append(permission)
+
+    return [{
+        "@id": f"offer-{n}",
+        "@type": "odrl:Offer",
+        "odrl:permission": templates[n % policies],
+        "odrl:prohibition": [],
+        "odrl:obligation": [],
+    } for n in range(offers)]
+
+
+def _benchmark(offers: int, policies: int, rounds: int):
+    import time
+
+    catalog = _synthetic_catalog(offers, policies)
+    context = {PARTICIPANT_ID_OPERAND: "participant-3", "region": "jp"}
+
+    def uncached():
+        for offer in catalog:
+            rules = _policy_rules(offer)
+            CompiledPolicy(rules, "")._evaluate(context)
+
+    def memoized():
+        for offer in catalog:
+            evaluate_policy(offer, context)
+
+    for name, fn in (("compile every offer", uncached), ("memoized", memoized)):
+        clear_cache()
+        timings = []
+        for _ in range(rounds):
+            started = time.perf_counter()
+            fn()
+            timings.append(time.perf_counter() - started)
+        best = min(timings)
+        print(f"{name:>20}: {best * 1000:8.1f} ms/round  ({offers / best:,.0f} offers/s)  cache={cache_stats()}")
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Benchmark policy evaluation on a synthetic catalog")
+    parser.add_argument("--offers", type=int, default=20000)
+    parser.add_argument("--policies", type=int, default=8)
+    parser.add_argument("--rounds", type=int, default=5)
+    args = parser.parse_args()
+    _benchmark(args.offers, args.policies, args.rounds)
@@ -0,0 +1,309 @@
+#!/usr/bin/env python3
+"""
+Resilience for connector calls
+==============================
+
+Shared by EdcClient and AsyncEdcClient so that a struggling connector is
+not hit harder by every rerun:
+
+- Retries: an attempt is retried only when it is safe and likely to help,
+  with full-jitter exponential backoff. Any call is retried when the server
+  never saw it or refused to process it (connection failures, 429, 503);
+  timeouts and 502/504 only for idempotent calls.
+- Circuit breakers: one per endpoint (local connector, remote provider,
+  data plane host). After BREAKER_FAILURE_THRESHOLD consecutive failures the
+  breaker opens and calls fail fast with CircuitOpenError; after
+  BREAKER_RESET_TIMEOUT seconds a single trial call is let through.
+- Deadlines: deadline(seconds) sets a time budget for everything the
+  enclosed block sends; call timeouts are cut to what is left and no retry
+  is scheduled past it (DeadlineExceeded once it is used up).
+
+Both clients drive the same loop:
+
+    attempts = Attempts(endpoint, method, path, timeout)
+    while True:
+        timeout = attempts.start()
+        try:
+            response = send(timeout=timeout)
+        except Exception as e:
+            delay = attempts.failed(e)
+            if delay is None:
+                raise
+        else:
+            delay = attempts.completed(response)
+            if delay is None:
+                return response
+        sleep(delay)
+"""
+
+import os
+import random
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Iterator, List, Optional
+
+import httpx
+import requests
+from urllib3.exceptions import NewConnectionError
+
+from tracing import current_span
+
+# Attempts per call (including the first) and the backoff between them (seconds)
+RETRY_ATTEMPTS = int(os.getenv("EDC_RETRY_ATTEMPTS", "3"))
+RETRY_BASE_DELAY = float(os.getenv("EDC_RETRY_BASE_DELAY", "0.2"))
+RETRY_MAX_DELAY = float(os.getenv("EDC_RETRY_MAX_DELAY", "2"))
+# Consecutive failures that open a breaker, and how long it stays open (seconds)
+BREAKER_FAILURE_THRESHOLD = int(os.getenv("EDC_BREAKER_FAILURES", "5"))
+BREAKER_RESET_TIMEOUT = float(os.getenv("EDC_BREAKER_RESET_TIMEOUT", "15"))
+
+RETRYABLE_STATUSES = (429, 502, 503, 504)
+# Statuses meaning the request was not processed (safe to resend even when not idempotent)
+NOT_PROCESSED_STATUSES = (429, 503)
+IDEMPOTENT_METHODS = ("GET", "HEAD", "PUT", "DELETE")
+TRANSPORT_ERRORS = (requests.RequestException, httpx.TransportError)
+
+# Breaker states
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half-open"
+
+_deadline: ContextVar[Optional[float]] = ContextVar("edc_deadline", default=None)
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of sending a request while the endpoint's breaker is open"""
+
+    def __init__(self, endpoint: str, retry_in: float):
+        super().__init__(f"{endpoint} is failing; not sending requests for {retry_in:.0f}s (circuit open)")
+        self.endpoint = endpoint
+        self.retry_in = retry_in
+
+
+class DeadlineExceeded(TimeoutError):
+    """Raised when the current action's time budget is used up"""
+
+
+def is_idempotent(method: str, path: str) -> bool:
+    """Whether sending the call twice is harmless (Management API queries are POSTs to */request)"""
+    return method in IDEMPOTENT_METHODS or (method == "POST" and path.rstrip("/").endswith("/request"))
+
+
+def _not_sent(error: Exception) -> bool:
+    """Whether the request failed before reaching the server (safe to retry for any method)"""
+    if isinstance(error, (httpx.ConnectError, httpx.ConnectTimeout, requests.ConnectTimeout)):
+        return True
+    if isinstance(error, requests.ConnectionError) and error.args:
+        return isinstance(getattr(error.args[0], "reason", None), NewConnectionError)
+    return False
+
+
+def backoff_delay(attempt: int, base: float = RETRY_BASE_DELAY, cap: float = RETRY_MAX_DELAY) -> float:
+    """Full-jitter exponential backoff before retry number `attempt` (1-based)"""
+    return random.uniform(0, min(cap, base * 2 ** (attempt - 1)))
+
+
+def _retry_after(response) -> Optional[float]:
+    try:
+        return float(response.headers.get("retry-after"))
+    except (TypeError, ValueError):
+        return None
+
+
+# ---- Deadlines ----
+
+@contextmanager
+def deadline(seconds: Optional[float]) -> Iterator[None]:
+    """Limit the calls made in this block to `seconds` in total (an outer, shorter budget still applies)"""
+    if seconds is None or seconds <= 0:
+        yield
+        return
+    outer = _deadline.get()
+    at = time.monotonic() + seconds
+    token = _deadline.set(at if outer is None else min(outer, at))
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+
+def remaining() -> Optional[float]:
+    """Seconds left in the current budget (None when there is none)"""
+    at = _deadline.get()
+    return None if at is None else at - time.monotonic()
+
+
+def carry_deadline(coro):
+    """Run a coroutine under the caller's deadline (for other threads' event loops)"""
+    at = _deadline.get()
+    if at is None:
+        return coro
+
+    async def bound():
+        _deadline.set(at)
+        return await coro
+    return bound()
+
+
+# ---- Circuit breakers ----
+
+class CircuitBreaker:
+    """Consecutive-failure breaker for one endpoint (thread-safe)"""
+
+    def __init__(self, endpoint: str, failure_threshold: int = BREAKER_FAILURE_THRESHOLD,
+                 reset_timeout: float = BREAKER_RESET_TIMEOUT):
+        self.endpoint = endpoint
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = CLOSED
+        self.consecutive_failures = 0
+        self.opened_at: Optional[float] = None
+        self._trial_started: Optional[float] = None
+        self.counters = {"calls": 0, "failures": 0, "retries": 0, "rejected": 0, "opened": 0}
+        self._lock = threading.Lock()
+
+    def before_call(self):
+        """Admit a call or raise CircuitOpenError
+
+        An open breaker lets one trial call through after the reset timeout;
+        a trial that never reports back (cancelled) is replaced after another.
+        """
+        with self._lock:
+            now = time.monotonic()
+            if self.state == OPEN and now - self.opened_at >= self.reset_timeout:
+                self.state = HALF_OPEN
+                self._trial_started = None
+            trial_pending = self._trial_started is not None and now - self._trial_started < self.reset_timeout
+            if self.state == OPEN or (self.state == HALF_OPEN and trial_pending):
+                self.counters["rejected"] += 1
+                retry_in = max(0.0, self.opened_at + self.reset_timeout - now)
+                raise CircuitOpenError(self.endpoint, retry_in)
+            if self.state == HALF_OPEN:
+                self._trial_started = now
+            self.counters["calls"] += 1
+
+    def release(self):
+        """End an admitted call without an outcome (it failed for reasons unrelated to the endpoint)"""
+        with self._lock:
+            self._trial_started = None
+
+    def record(self, ok: bool):
+        with self._lock:
+            self._trial_started = None
+            if ok:
+                self.state = CLOSED
+                self.consecutive_failures = 0
+                return
+            self.counters["failures"] += 1
+            self.consecutive_failures += 1
+            if self.state == HALF_OPEN or self.consecutive_failures >= self.failure_threshold:
+                if self.state != OPEN:
+                    self.counters["opened"] += 1
+                self.state = OPEN
+                self.opened_at = time.monotonic()
+
+    def count_retry(self):
+        with self._lock:
+            self.counters["retries"] += 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            retry_in = None
+            if self.state == OPEN:
+                retry_in = max(0.0, self.opened_at + self.reset_timeout - time.monotonic())
+            return {
+                "endpoint": self.endpoint,
+                "state": self.state,
+                "consecutive_failures": self.consecutive_failures,
+                "retry_in": retry_in,
+                **self.counters,
+            }
+
+
+class BreakerRegistry:
+    """Circuit breakers by endpoint, created on first use"""
+
+    def __init__(self):
+        self._breakers: Dict[str, CircuitBreaker] = {}
+        self._lock = threading.Lock()
+
+    def get(self, endpoint: str) -> CircuitBreaker:
+        with self._lock:
+            breaker = self._breakers.get(endpoint)
+            if breaker is None:
+                breaker = self._breakers[endpoint] = CircuitBreaker(endpoint)
+            return breaker
+
+    def snapshot(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            breakers = list(self._breakers.values())
+        return [breaker.snapshot() for breaker in breakers]
+
+
+# Shared by every client in the process
+BREAKERS = BreakerRegistry()
+
+
+def breaker_states() -> List[Dict[str, Any]]:
+    """State and counters of every endpoint's breaker"""
+    return BREAKERS.snapshot()
+
+
+# ---- Attempt loop ----
+
+class Attempts:
+    """Retry state of one call; see the module docstring for the loop that drives it
+
+    start() admits an attempt and returns its timeout (cut to the deadline).
+    failed()/completed() record the outcome with the breaker and return the
+    delay before the next attempt, or None when the caller should stop and
+    raise the error / return the response. The retry count is recorded on
+    the current tracing span.
+    """
+
+    def __init__(self, endpoint: str, method: str, path: str, timeout: float, attempts: int = RETRY_ATTEMPTS):
+        self.breaker = BREAKERS.get(endpoint)
+        self.method = method
+        self.idempotent = is_idempotent(method, path)
+        self.timeout = timeout
+        self.attempts = max(1, attempts)
+        self.attempt = 0
+
+    def start(self) -> float:
+        left = remaining()
+        if left is not None and left <= 0:
+            raise DeadlineExceeded(f"time budget used up before {self.method} to {self.breaker.endpoint}")
+        self.breaker.before_call()
+        self.attempt += 1
+        return self.timeout if left is None else min(self.timeout, left)
+
+    def failed(self, error: Exception) -> Optional[float]:
+        if not isinstance(error, TRANSPORT_ERRORS):
+            # 通信と関係ない例外はエンドポイントの失敗として数えない
+            self.breaker.release()
+            return None
+        self.breaker.record(False)
+        return self._next_delay(self.idempotent or _not_sent(error))
+
+    def completed(self, response) -> Optional[float]:
+        status = response.status_code
+        self.breaker.record(status < 500)
+        if status not in RETRYABLE_STATUSES or not (self.idempotent or status in NOT_PROCESSED_STATUSES):
+            return None
+        return self._next_delay(True, _retry_after(response))
+
+    def _next_delay(self, retryable: bool, retry_after: Optional[float] = None) -> Optional[float]:
+        if not retryable or self.attempt >= self.attempts or self.breaker.state == OPEN:
+            return None
+        delay = backoff_delay(self.attempt)
+        if retry_after is not None:
+            delay = max(delay, min(retry_after, RETRY_MAX_DELAY))
+        left = remaining()
+        if left is not None and delay >= left:
+            return None
+        self.breaker.count_retry()
+        current = current_span()
+        if current is not None:
+            current.set(retries=self.attempt)
+        return delay
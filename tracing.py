@@ -0,0 +1,223 @@
+#!/usr/bin/env python3
+"""
+Lightweight call tracing
+========================
+
+Timing spans for outbound calls, nested under the span of the user action
+(Streamlit script run) that caused them:
+
+    with span("Fetch catalog", "ui") as root:          # one trace per action
+        with span("POST /catalog/request", "provider") as s:
+            ...
+            s.set(status=200, bytes=1234)
+
+The current span lives in a ContextVar, so it follows asyncio tasks; use
+bind() to carry it into coroutines handed to another thread's event loop.
+Background jobs that outlive the action run as their own trace (as_job())
+instead, and a trace keeps at most TRACE_MAX_SPANS spans.
+Spans without a parent are roots; whoever opens one keeps it (the UI keeps
+the last few per session) and unreferenced roots are simply dropped.
+
+Span kinds: "ui" (script run / action), "job" (background job),
+"connector" (Management API), "provider" (calls answered by a remote
+connector), "data-plane", "http" (other services) and "wait" (polling for
+a state change).
+"""
+
+import os
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+# Kinds of spans that are outbound calls (leaves of the time breakdown)
+CALL_KINDS = ("connector", "provider", "data-plane", "http")
+# Spans kept per trace; later ones are still timed but only counted on the root
+TRACE_MAX_SPANS = int(os.getenv("TRACE_MAX_SPANS", "500"))
+
+_current: ContextVar[Optional["Span"]] = ContextVar("edc_trace_span", default=None)
+# Children are appended from the event loop thread while pages read traces
+_lock = threading.Lock()
+
+
+class Span:
+    """One timed operation"""
+
+    def __init__(self, name: str, kind: str, parent: Optional["Span"] = None, **attributes):
+        self.span_id = uuid.uuid4().hex[:16]
+        self.trace_id = parent.trace_id if parent else uuid.uuid4().hex
+        self.parent_id = parent.span_id if parent else None
+        self.root: "Span" = parent.root if parent else self
+        self.name = name
+        self.kind = kind
+        self.attributes: Dict[str, Any] = attributes
+        self.start = time.time()
+        self.duration: Optional[float] = None
+        self.error: Optional[str] = None
+        self.children: List["Span"] = []
+        # ルートのみ使用: トレース内のスパン数と上限超過で記録しなかった数
+        self.span_count = 1
+        self.dropped_spans = 0
+        self._started = time.perf_counter()
+
+    def set(self, **attributes):
+        with _lock:
+            self.attributes.update(attributes)
+
+    def finish(self):
+        self.duration = time.perf_counter() - self._started
+
+    def elapsed(self) -> float:
+        """Duration, or time since start while still open"""
+        return self.duration if self.duration is not None else time.perf_counter() - self._started
+
+    def walk(self, depth: int = 0) -> Iterator[Tuple[int, "Span"]]:
+        """(depth, span) for this span and its descendants in start order"""
+        yield depth, self
+        with _lock:
+            children = sorted(self.children, key=lambda child: child.start)
+        for child in children:
+            yield from child.walk(depth + 1)
+
+    def to_dict(self) -> Dict[str, Any]:
+        with _lock:
+            attributes = dict(self.attributes)
+        return {
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "kind": self.kind,
+            "start": self.start,
+            "duration": self.duration,
+            "error": self.error,
+            "attributes": attributes,
+        }
+
+
+def current_span() -> Optional[Span]:
+    return _current.get()
+
+
+@contextmanager
+def span(name: str, kind: str = "internal", **attributes) -> Iterator[Span]:
+    """Time the block as a child of the current span (a new root when there is none)"""
+    parent = _current.get()
+    current = Span(name, kind, parent, **attributes)
+    if parent is not None:
+        with _lock:
+            root = parent.root
+            if root.span_count < TRACE_MAX_SPANS:
+                parent.children.append(current)
+                root.span_count += 1
+            else:
+                root.dropped_spans += 1
+    token = _current.set(current)
+    try:
+        yield current
+    except Exception as e:
+        current.error = str(e) or type(e).__name__
+        raise
+    except BaseException:
+        # キャンセル（先に完了した待機に負けたロングポーリングなど）はエラー扱いしない
+        current.set(cancelled=True)
+        raise
+    finally:
+        current.finish()
+        _current.reset(token)
+
+
+@contextmanager
+def detached() -> Iterator[None]:
+    """Run the block outside any trace (for long-lived loops started while handling an action)"""
+    token = _current.set(None)
+    try:
+        yield
+    finally:
+        _current.reset(token)
+
+
+def bind(coro):
+    """Run a coroutine under the caller's current span (for other threads' event loops)"""
+    parent = _current.get()
+    if parent is None:
+        return coro
+
+    async def bound():
+        _current.set(parent)
+        return await coro
+    return bound()
+
+
+def as_job(coro, name: str, **attributes):
+    """Run a coroutine as the root of its own trace (background work that outlives the action)
+
+    The job's calls are not added to the caller's trace, which would keep
+    growing after the action has finished; the caller's trace id is kept in
+    the started_by attribute.
+    """
+    parent = _current.get()
+    if parent is not None:
+        attributes["started_by"] = parent.trace_id
+
+    async def job():
+        _current.set(None)
+        with span(name, "job", **attributes):
+            return await coro
+    return job()
+
+
+def _busy_time(intervals: List[Tuple[float, float]]) -> float:
+    """Length of the union of (start, end) intervals"""
+    total = 0.0
+    end_of_covered = None
+    for start, end in sorted(intervals):
+        if end_of_covered is None or start > end_of_covered:
+            total += end - start
+            end_of_covered = end
+        elif end > end_of_covered:
+            total += end - end_of_covered
+            end_of_covered = end
+    return total
+
+
+def summarize(root: Span) -> Dict[str, Any]:
+    """Time per call kind and the root's own time (rendering / Python) outside calls and waits"""
+    by_kind: Dict[str, float] = {}
+    calls = 0
+    window_end = root.start + root.elapsed()
+    busy = []
+    for _, s in root.walk():
+        if s is root:
+            continue
+        if s.kind in CALL_KINDS:
+            calls += 1
+            by_kind[s.kind] = by_kind.get(s.kind, 0.0) + s.elapsed()
+        if s.kind in CALL_KINDS or s.kind == "wait":
+            start = max(s.start, root.start)
+            end = min(s.start + s.elapsed(), window_end)
+            if end > start:
+                busy.append((start, end))
+    return {
+        "duration": root.elapsed(),
+        "calls": calls,
+        "by_kind": by_kind,
+        "self_time": max(0.0, root.elapsed() - _busy_time(busy)),
+        "dropped_spans": root.dropped_spans,
+    }
+
+
+def export_traces(roots: List[Span]) -> Dict[str, Any]:
+    """Trace JSON: one entry per root with its spans as a flat list (parent_id links them)"""
+    return {
+        "format": "edc-simple-ui-trace/1",
+        "exported_at": time.time(),
+        "traces": [{
+            "trace_id": root.trace_id,
+            "name": root.name,
+            "summary": summarize(root),
+            "spans": [s.to_dict() for _, s in root.walk()],
+        } for root in roots],
+    }